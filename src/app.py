@@ -1,8 +1,11 @@
 from reminder import ReminderManager
 from datetime_wrapper import DateTimeWrapper
+from db import DB, DB_NAME, STORAGE_PROFILES
+import argparse
 import time
 import tkinter as tk
 from view import ReminderAppView
+from worker import ReminderWorker
 
 
 TIME_CHECK_INTERVAL_SECONDS: float = 10
@@ -18,9 +21,18 @@ TIME_CHECK_INTERVAL_SECONDS: float = 10
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reminder App")
+    parser.add_argument("--db", default=DB_NAME, help="path of the reminder database file")
+    parser.add_argument("--storage-profile", default="durable", choices=list(STORAGE_PROFILES), help="sqlite journaling and sync settings")
+    args = parser.parse_args()
+
     root = tk.Tk()
-    reminder_manager: ReminderManager = ReminderManager()
+    # the manager, its db and its timer live on the worker thread so commits never stall the ui
+    worker = ReminderWorker(lambda: ReminderManager(DB(args.db, args.storage_profile)))
+    worker.start()
+    worker.attach(root)
 
-    reminder_manager.show_all_reminders()
-    app = ReminderAppView(root, reminder_manager)
+    worker.submit(lambda reminder_manager: reminder_manager.show_all_reminders())
+    app = ReminderAppView(root, worker)
     root.mainloop()
+    worker.stop()
@@ -0,0 +1,48 @@
+from benchmarks.common import best_of, parse_sizes
+from datetime_wrapper import DateTimeWrapper
+from reminder import Reminder
+from occurrence_cache import OccurrenceCache
+import heapq
+import sys
+
+
+WINDOW_DAYS = 7
+
+def make_recurring_reminders(n: int):
+    # every recurring type with its start spread over the previous month
+    now = DateTimeWrapper()
+    reminders = []
+    for i in range(n):
+        start_dt_wrapper = now.shifted(minutes=-(i % (30 * 24 * 60)))
+        kind = i % 4
+        if kind == 0:
+            reminders.append(Reminder(str(i), "title", "message", "Hour", start_dt_wrapper, None, None, 1 + i % 6))
+        elif kind == 1:
+            reminders.append(Reminder(str(i), "title", "message", "Day", start_dt_wrapper))
+        elif kind == 2:
+            reminders.append(Reminder(str(i), "title", "message", "Week", start_dt_wrapper, None, None, 1, [1, 3, 5]))
+        else:
+            reminders.append(Reminder(str(i), "title", "message", "Month", start_dt_wrapper, None, None, 1, [1, 15]))
+    return reminders
+
+def agenda(reminders, cache, start_dt_wrapper, end_dt_wrapper):
+    # the merge of ReminderManager.agenda without the db
+    expansions = [[(epoch_minutes, reminder.reminder_id) for epoch_minutes in cache.occurrences(reminder.reminder_id, reminder.recurrence, start_dt_wrapper, end_dt_wrapper)]
+                  for reminder in reminders]
+    return sum(1 for _ in heapq.merge(*expansions))
+
+def run(size: int) -> None:
+    reminders = make_recurring_reminders(size)
+    start_dt_wrapper = DateTimeWrapper()
+    end_dt_wrapper = start_dt_wrapper.shifted(days=WINDOW_DAYS)
+    count = agenda(reminders, OccurrenceCache(size), start_dt_wrapper, end_dt_wrapper)
+    cold = best_of(lambda: agenda(reminders, OccurrenceCache(size), start_dt_wrapper, end_dt_wrapper), repeat=3)
+    cache = OccurrenceCache(size)
+    agenda(reminders, cache, start_dt_wrapper, end_dt_wrapper)
+    warm = best_of(lambda: agenda(reminders, cache, start_dt_wrapper, end_dt_wrapper), repeat=3)
+    print(f"{size:>9} reminders | {count:>9} occurrences in {WINDOW_DAYS} days | cold agenda {cold * 1000:10.1f} ms, cached {warm * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    for size in parse_sizes(sys.argv, "100,1000,10000"):
+        run(size)
@@ -0,0 +1,63 @@
+from benchmarks.common import parse_sizes
+from datetime_wrapper import DateTimeWrapper
+from reminder import ReminderManager
+from db import DB
+import subprocess
+import tempfile
+import resource
+import atexit
+import time
+import json
+import sys
+import os
+import bulk
+
+
+RECURRENCE_TYPES = ["Once", "Hour", "Day", "Week", "Month"]
+
+def write_records(path: str, size: int) -> None:
+    # a mix of every recurrence type starting over the coming year
+    now = DateTimeWrapper().to_epoch_minutes()
+    with open(path, "w") as f:
+        for i in range(size):
+            recurrence_type = RECURRENCE_TYPES[i % len(RECURRENCE_TYPES)]
+            record = {"title": f"title {i}", "message": f"message {i}", "recurrence_type": recurrence_type,
+                      "start": DateTimeWrapper.from_epoch_minutes(now + i * 365 * 24 * 60 // size).datetime_string}
+            if recurrence_type == "Week":
+                record["list"] = [1, 3, 5]
+            elif recurrence_type == "Month":
+                record["list"] = [1, 15]
+            f.write(json.dumps(record) + "\n")
+
+def import_and_export(records_path: str, db_path: str, export_path: str) -> None:
+    # runs in a fresh interpreter so the peak rss belongs to this import alone, the same setup as `python -m bulk import`
+    reminder_manager = ReminderManager(DB(db_path, "fast"), lazy_horizon_minutes=0)
+    atexit.unregister(reminder_manager.on_exit)
+    start = time.perf_counter()
+    count = bulk.import_file(reminder_manager, records_path)
+    imported = time.perf_counter() - start
+    start = time.perf_counter()
+    bulk.export_file(reminder_manager.db, export_path)
+    exported = time.perf_counter() - start
+    peak_rss_mib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{count} {imported:.3f} {exported:.3f} {peak_rss_mib:.1f}")
+
+def run(size: int, directory: str) -> None:
+    records_path = os.path.join(directory, f"records_{size}.jsonl")
+    write_records(records_path, size)
+    for suffix in (".csv", ".jsonl", ".ics"):
+        output = subprocess.run([sys.executable, "-m", "benchmarks.bench_bulk", "--child", records_path,
+                                 os.path.join(directory, f"bulk_{size}{suffix}.db"), os.path.join(directory, f"export_{size}{suffix}")],
+                                capture_output=True, text=True, check=True).stdout.split()
+        count, imported, exported, peak_rss_mib = int(output[0]), float(output[1]), float(output[2]), float(output[3])
+        print(f"{size:>9} records | import {count / max(imported, 1e-9):10.0f} /s ({imported:7.2f} s), export to {suffix:<6} {count / max(exported, 1e-9):10.0f} /s,"
+              f" peak rss {peak_rss_mib:8.1f} MiB")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        import_and_export(*sys.argv[2:5])
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            for size in parse_sizes(sys.argv, "1000,100000,1000000"):
+                run(size, directory)
@@ -0,0 +1,58 @@
+from benchmarks.common import parse_sizes
+from datetime_wrapper import DateTimeWrapper
+from reminder import ReminderManager, MISFIRE_POLICIES, CATCH_UP_BUDGET_SECONDS
+from clock import ManualClock
+from db import DB
+import tempfile
+import atexit
+import time
+import sys
+import os
+
+
+DOWN_MINUTES = 24 * 60
+
+def seed(path: str, size: int, now: int) -> None:
+    # hourly and daily reminders that missed a day of fires, and one due on time
+    reminder_db = DB(path, "fast")
+    reminder_db.conn.executemany('INSERT INTO reminders (reminder_id, title, message, recurrence_type, start_at, end_at, next_fire, interval, list) VALUES (?, ?, ?, ?, ?, NULL, ?, 1, "")',
+                                 ((str(i), f"title {i}", f"message {i}", "Hour" if i % 2 else "Day", now - DOWN_MINUTES, now - DOWN_MINUTES + i % 60) for i in range(size)))
+    reminder_db.conn.execute('INSERT INTO reminders (reminder_id, title, message, recurrence_type, start_at, end_at, next_fire, interval, list) VALUES ("on time", "", "", "Day", ?, NULL, ?, 1, "")',
+                             (now, now))
+    reminder_db.conn.commit()
+    reminder_db.close()
+
+def catch_up(path: str, now: DateTimeWrapper, misfire_policy: str, budget_seconds: float):
+    # seconds until the on-time reminder fired, ticks and seconds until the backlog was gone, notifications
+    reminder_manager = ReminderManager(DB(path, "fast"), clock=ManualClock(now), misfire_policy=misfire_policy, catch_up_budget_seconds=budget_seconds)
+    atexit.unregister(reminder_manager.on_exit)
+    start = time.perf_counter()
+    on_time = None
+    ticks = notifications = 0
+    while on_time is None or reminder_manager.catch_up:
+        fired = reminder_manager.fire_due_occurrences()
+        ticks += 1
+        notifications += len(fired)
+        if on_time is None and any(reminder.reminder_id == "on time" for reminder, _ in fired):
+            on_time = time.perf_counter() - start
+    elapsed = time.perf_counter() - start
+    reminder_manager.close()
+    return on_time, ticks, elapsed, notifications
+
+def run(size: int, directory: str) -> None:
+    now = DateTimeWrapper()
+    now = DateTimeWrapper(now.year, now.month, now.day, now.hour, now.minute)
+    for misfire_policy in MISFIRE_POLICIES:
+        for budget_seconds in (CATCH_UP_BUDGET_SECONDS, float("inf")):
+            path = os.path.join(directory, f"catch_up_{size}_{misfire_policy}_{budget_seconds}")
+            seed(path, size, now.to_epoch_minutes())
+            on_time, ticks, elapsed, notifications = catch_up(path, now, misfire_policy, budget_seconds)
+            budget = f"{budget_seconds * 1000:.0f} ms" if budget_seconds != float("inf") else "none"
+            print(f"{size:>9} late | {misfire_policy:<9} budget {budget:>5}: on time fire after {on_time * 1000:9.1f} ms, "
+                  f"caught up in {ticks:4} ticks {elapsed * 1000:9.1f} ms, {notifications} notifications")
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        for size in parse_sizes(sys.argv, "1000,100000"):
+            run(size, directory)
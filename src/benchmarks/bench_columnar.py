@@ -0,0 +1,36 @@
+from benchmarks.common import best_of, make_reminders, parse_sizes
+from columnar import ColumnarScheduler
+from datetime_wrapper import DateTimeWrapper
+from scheduler import Scheduler
+import sys
+
+
+DUE_FRACTION = 0.01
+
+def scan_tick(reminders, current_dt_wrapper):
+    # the per-object python loop
+    return [reminder for reminder in reminders.values() if reminder.should_remind_now(current_dt_wrapper)]
+
+def run(size: int) -> None:
+    due = int(size * DUE_FRACTION)
+    results = {}
+    for name in ("scan", "heap", "columnar"):
+        reminders = {reminder.reminder_id: reminder for reminder in make_reminders(size, due=due)}
+        current_dt_wrapper = DateTimeWrapper()
+        if name == "scan":
+            busy = best_of(lambda: scan_tick(reminders, current_dt_wrapper), repeat=1)
+            idle = best_of(lambda: scan_tick(reminders, current_dt_wrapper), repeat=3)
+        else:
+            scheduler = Scheduler() if name == "heap" else ColumnarScheduler(capacity=size)
+            for reminder_id, reminder in reminders.items():
+                scheduler.schedule(reminder_id, reminder.next_recur_dt_wrapper, reminder.recurrence)
+            busy = best_of(lambda: scheduler.fire_due(current_dt_wrapper, reminders), repeat=1)
+            idle = best_of(lambda: scheduler.fire_due(current_dt_wrapper, reminders))
+        results[name] = (busy, idle)
+    print(f"{size:>9} reminders, {due} due | " + " | ".join(
+        f"{name}: due tick {busy * 1000:9.2f} ms, idle tick {idle * 1000:8.2f} ms" for name, (busy, idle) in results.items()))
+
+
+if __name__ == "__main__":
+    for size in parse_sizes(sys.argv, "100000,1000000"):
+        run(size)
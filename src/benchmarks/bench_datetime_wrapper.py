@@ -0,0 +1,64 @@
+from benchmarks.common import best_of
+from datetime_wrapper import DateTimeWrapper, FORMAT
+from dateutil.relativedelta import relativedelta
+from datetime import datetime, timedelta
+import tracemalloc
+import copy
+
+
+COUNT = 100000
+
+class LegacyDateTimeWrapper:
+    # the datetime backed wrapper that formatted its string eagerly
+    def __init__(self, year: int, month: int, day: int, hour: int, minute: int) -> None:
+        self.my_datetime = datetime(year, month, day, hour, minute)
+        self.datetime_string = self.my_datetime.strftime(FORMAT)
+
+    def __lt__(self, other) -> bool:
+        if isinstance(other, LegacyDateTimeWrapper):
+            return self.my_datetime < other.my_datetime
+        raise TypeError("Unsupported operand type. Can only compare DateTimeWrapper objects.")
+
+    def increment(self, months: int = 0, days: int = 0, hours: int = 0, minutes: int = 0) -> None:
+        self.my_datetime += timedelta(days=days, hours=hours, minutes=minutes)
+        self.my_datetime += relativedelta(months=months)
+        self.datetime_string = self.my_datetime.strftime(FORMAT)
+
+def bytes_per_instance(wrapper_class) -> float:
+    tracemalloc.start()
+    wrappers = [wrapper_class(2024, 1, 1 + i % 28, i % 24, i % 60) for i in range(COUNT)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del wrappers
+    return size / COUNT
+
+def report(name: str, legacy_seconds: float, current_seconds: float) -> None:
+    print(f"{name:<24} legacy {legacy_seconds / COUNT * 1e9:8.0f} ns, current {current_seconds / COUNT * 1e9:8.0f} ns")
+
+def run() -> None:
+    print(f"{'bytes per instance':<24} legacy {bytes_per_instance(LegacyDateTimeWrapper):8.0f},    current {bytes_per_instance(DateTimeWrapper):8.0f}")
+
+    report("construct", best_of(lambda: [LegacyDateTimeWrapper(2024, 1, 1, 9, 0) for _ in range(COUNT)]),
+                        best_of(lambda: [DateTimeWrapper(2024, 1, 1, 9, 0) for _ in range(COUNT)]))
+
+    legacy_a, legacy_b = LegacyDateTimeWrapper(2024, 1, 1, 9, 0), LegacyDateTimeWrapper(2024, 1, 2, 9, 0)
+    current_a, current_b = DateTimeWrapper(2024, 1, 1, 9, 0), DateTimeWrapper(2024, 1, 2, 9, 0)
+    report("compare", best_of(lambda: [legacy_a < legacy_b for _ in range(COUNT)]),
+                      best_of(lambda: [current_a < current_b for _ in range(COUNT)]))
+
+    def legacy_advance():
+        dt_wrapper = LegacyDateTimeWrapper(2024, 1, 1, 9, 0)
+        for _ in range(COUNT):
+            dt_wrapper.increment(hours=1)
+    def current_advance():
+        dt_wrapper = DateTimeWrapper(2024, 1, 1, 9, 0)
+        for _ in range(COUNT):
+            dt_wrapper = dt_wrapper.shifted(hours=1)
+    report("advance one hour", best_of(legacy_advance), best_of(current_advance))
+
+    report("deepcopy", best_of(lambda: [copy.deepcopy(legacy_a) for _ in range(COUNT)]),
+                       best_of(lambda: [copy.deepcopy(current_a) for _ in range(COUNT)]))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,86 @@
+from benchmarks.common import best_of, parse_sizes
+from datetime_wrapper import DateTimeWrapper
+import tempfile
+import sqlite3
+import time
+import sys
+import os
+import db
+
+
+FIRES = 200
+START = DateTimeWrapper(2024, 1, 1, 9, 0)
+
+class LegacyStore:
+    # the version 1 layout, one datetime_wrappers row per stored time
+    def __init__(self, path: str) -> None:
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript('''
+            CREATE TABLE datetime_wrappers (id INTEGER PRIMARY KEY AUTOINCREMENT, year INTEGER, month INTEGER, day INTEGER, hour INTEGER, minute INTEGER);
+            CREATE TABLE reminders (reminder_id TEXT PRIMARY KEY, title TEXT, message TEXT, recurrence_type TEXT,
+                                    start_dt_wrapper_id INTEGER, end_dt_wrapper_id INTEGER, next_recur_dt_wrapper_id INTEGER, interval INTEGER, list TEXT);
+        ''')
+
+    def seed(self, size: int) -> None:
+        self.conn.executemany('INSERT INTO datetime_wrappers (year, month, day, hour, minute) VALUES (2024, 1, 1, 9, 0)', ([] for _ in range(2 * size)))
+        self.conn.executemany('INSERT INTO reminders VALUES (?, ?, ?, ?, ?, NULL, ?, 1, "")',
+                              ((str(i), f"title {i}", f"message {i}", "Day", 2 * i + 1, 2 * i + 2) for i in range(size)))
+        self.conn.commit()
+
+    def load(self):
+        return self.conn.execute('''
+            SELECT reminders.*, start.*, end.*, next.* FROM reminders
+            LEFT JOIN datetime_wrappers AS start ON reminders.start_dt_wrapper_id = start.id
+            LEFT JOIN datetime_wrappers AS end ON reminders.end_dt_wrapper_id = end.id
+            LEFT JOIN datetime_wrappers AS next ON reminders.next_recur_dt_wrapper_id = next.id
+        ''').fetchall()
+
+    def fire(self, reminder_id: str) -> None:
+        # what update_reminder(next_recur_dt_wrapper=...) used to do
+        (wrapper_id,) = self.conn.execute('SELECT next_recur_dt_wrapper_id FROM reminders WHERE reminder_id = ?', (reminder_id,)).fetchone()
+        self.conn.execute('DELETE FROM datetime_wrappers WHERE id = ?', (wrapper_id,))
+        self.conn.commit()
+        cursor = self.conn.execute('INSERT INTO datetime_wrappers (year, month, day, hour, minute) VALUES (2024, 1, 2, 9, 0)')
+        self.conn.commit()
+        self.conn.execute('UPDATE reminders SET next_recur_dt_wrapper_id = ? WHERE reminder_id = ?', (cursor.lastrowid, reminder_id))
+        self.conn.commit()
+
+def seed_current(reminder_db: db.DB, size: int) -> None:
+    start = START.to_epoch_minutes()
+    reminder_db.conn.executemany('INSERT INTO reminders (reminder_id, title, message, recurrence_type, start_at, end_at, next_fire, interval, list) VALUES (?, ?, ?, ?, ?, NULL, ?, 1, "")',
+                                 ((str(i), f"title {i}", f"message {i}", "Day", start, start + i % 10000) for i in range(size)))
+    reminder_db.conn.commit()
+
+def fires_per_second(fire) -> float:
+    start = time.perf_counter()
+    for i in range(FIRES):
+        fire(str(i))
+    return FIRES / (time.perf_counter() - start)
+
+def run(size: int, directory: str) -> None:
+    legacy = LegacyStore(os.path.join(directory, f"legacy_{size}"))
+    legacy.seed(size)
+    legacy_load = best_of(legacy.load, repeat=3)
+    legacy_fires = fires_per_second(legacy.fire)
+    legacy.conn.close()
+
+    db.DB_NAME = os.path.join(directory, f"current_{size}")
+    reminder_db = db.DB()
+    seed_current(reminder_db, size)
+    current_load = best_of(reminder_db.get_all_reminders, repeat=3)
+    next_fire = DateTimeWrapper(2024, 1, 2, 9, 0)
+    current_fires = fires_per_second(lambda reminder_id: reminder_db.update_reminder(reminder_id, next_recur_dt_wrapper=next_fire))
+    start = time.perf_counter()
+    reminder_db.update_next_fires((str(i), next_fire) for i in range(FIRES))
+    batched_fires = FIRES / (time.perf_counter() - start)
+    due_query = best_of(lambda: reminder_db.get_reminders_due_before(DateTimeWrapper(2024, 1, 1, 9, 10)))
+    reminder_db.close()
+
+    print(f"{size:>9} reminders | load: legacy {legacy_load * 1000:9.1f} ms, current {current_load * 1000:9.1f} ms"
+          f" | fires/s: legacy {legacy_fires:8.0f}, current {current_fires:8.0f}, batched {batched_fires:8.0f} | due-before query {due_query * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        for size in parse_sizes(sys.argv, "1000,100000,1000000"):
+            run(size, directory)
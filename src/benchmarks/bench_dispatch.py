@@ -0,0 +1,36 @@
+from benchmarks.common import make_reminders, parse_sizes
+from datetime_wrapper import DateTimeWrapper
+from dispatch import DispatchPipeline, CallbackSink
+from typing import List, Tuple
+import time
+import sys
+
+
+SINK_CALL_SECONDS = 0.0005  # round trip of one delivery, e.g. a local webhook
+WORKERS = [1, 4]
+
+def slow_sink(notifications: List[Tuple], fire_dt_wrapper: DateTimeWrapper) -> None:
+    time.sleep(SINK_CALL_SECONDS)
+
+def run(size: int) -> None:
+    # a burst of size reminders due in the same minute
+    reminders = make_reminders(size, due=size)
+    fire_dt_wrapper = DateTimeWrapper()
+    start = time.perf_counter()
+    for reminder in reminders:  # what notify did, one delivery per reminder on the scheduler thread
+        slow_sink([(reminder.reminder_id, reminder.title, reminder.message, reminder.next_recur_dt_wrapper, fire_dt_wrapper)], fire_dt_wrapper)
+    serial = time.perf_counter() - start
+    print(f"{size:>7} due | serial on the scheduler thread {serial * 1000:9.1f} ms")
+    for workers in WORKERS:
+        pipeline = DispatchPipeline({"slow": CallbackSink(slow_sink)}, workers)
+        start = time.perf_counter()
+        pipeline.dispatch([(reminder, fire_dt_wrapper) for reminder in reminders], fire_dt_wrapper)
+        blocked = time.perf_counter() - start
+        pipeline.close()
+        delivered = time.perf_counter() - start
+        print(f"{'':>11} | pipeline, {workers} workers per sink: scheduler blocked {blocked * 1000:7.2f} ms, all delivered after {delivered * 1000:7.1f} ms ({pipeline.delivered} delivered)")
+
+
+if __name__ == "__main__":
+    for size in parse_sizes(sys.argv, "100,1000,10000"):
+        run(size)
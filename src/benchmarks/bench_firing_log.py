@@ -0,0 +1,58 @@
+from benchmarks.common import parse_sizes
+from datetime_wrapper import DateTimeWrapper
+from firing_log import FiringLog
+from db import DB
+import tempfile
+import random
+import time
+import sys
+import os
+
+
+TICKS = 200
+
+def seed(path: str, size: int) -> None:
+    reminder_db = DB(path, "fast")
+    reminder_db.conn.executemany('INSERT INTO reminders (reminder_id, title, message, recurrence_type, start_at, end_at, next_fire, interval, list) VALUES (?, ?, ?, ?, 0, NULL, 0, 1, "")',
+                                 ((str(i), f"title {i}", f"message {i}", "Day") for i in range(size)))
+    reminder_db.conn.commit()
+    reminder_db.close()
+
+def ticks(size: int, fires_per_tick: int):
+    # reminders scattered over the table, as due times are
+    rng = random.Random(size)
+    return [[(str(rng.randrange(size)), DateTimeWrapper.from_epoch_minutes(tick + 1)) for _ in range(fires_per_tick)] for tick in range(TICKS)]
+
+def run(size: int, fires_per_tick: int, directory: str) -> None:
+    path = os.path.join(directory, f"firing_{size}_{fires_per_tick}")
+    seed(path, size)
+    fired = ticks(size, fires_per_tick)
+
+    reminder_db = DB(path, "durable")
+    start = time.perf_counter()
+    for next_fires in fired:
+        reminder_db.update_next_fires(next_fires)
+    in_place = time.perf_counter() - start
+
+    firing_log = FiringLog(path + ".log")
+    start = time.perf_counter()
+    for next_fires in fired:
+        firing_log.append(next_fires)
+    firing_log.sync()
+    logged = time.perf_counter() - start
+    start = time.perf_counter()
+    firing_log.compact(reminder_db)
+    compacted = time.perf_counter() - start
+    firing_log.close()
+    reminder_db.close()
+
+    fires = TICKS * fires_per_tick
+    print(f"{size:>9} reminders, {fires_per_tick:>5} fires/tick | db update per tick {fires / in_place:10.0f} fires/s"
+          f" | firing log {fires / logged:10.0f} fires/s, {firing_log.syncs} fsyncs, compaction {compacted * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        for size in parse_sizes(sys.argv, "100000,1000000"):
+            for fires_per_tick in parse_sizes(sys.argv[1:], "1,100,1000"):
+                run(size, fires_per_tick, directory)
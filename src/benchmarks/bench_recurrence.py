@@ -0,0 +1,75 @@
+from benchmarks.common import best_of
+from datetime_wrapper import DateTimeWrapper
+from recurrence import Recurrence, Once, Hour, Day, Week, Month
+import calendar
+import bisect
+
+
+COUNT = 100000
+STEPS = 500     # per recurrence, keeps monthly ones within a few decades like real reminders
+
+class LegacyWeek(Week):
+    # the step that searched the weekdays list every time
+    def _set_next_recurrence_dt_wrapper(self):
+        weekday = self.next_recur_dt_wrapper.weekday
+        if weekday not in self.weekdays:
+            next_idx = bisect.bisect_left(self.weekdays, weekday)
+        else:
+            next_idx = self.weekdays.index(weekday) + 1
+        if next_idx == len(self.weekdays):
+            delta_days = ((self.interval - 1) * 7) + (7 - weekday + self.weekdays[0])
+        else:
+            delta_days = self.weekdays[next_idx] - weekday
+        self.next_recur_dt_wrapper = self.next_recur_dt_wrapper.shifted(days=delta_days)
+
+class LegacyMonth(Month):
+    # the step that searched the days list and asked calendar for the length of the month every time
+    def _set_next_recurrence_dt_wrapper(self):
+        dt_wrapper = self.next_recur_dt_wrapper
+        day = dt_wrapper.day
+        if day not in self.days:
+            next_idx = bisect.bisect_left(self.days, day)
+        else:
+            next_idx = self.days.index(day) + 1
+        if next_idx == len(self.days) or self.days[next_idx] > calendar.monthrange(dt_wrapper.year, dt_wrapper.month)[1]:
+            first_day_dt_wrapper = dt_wrapper.shifted(days=-day+1).shifted(months=self.interval)
+            self.next_recur_dt_wrapper = first_day_dt_wrapper.shifted(days=self.days[0] - 1)
+        else:
+            self.next_recur_dt_wrapper = dt_wrapper.shifted(days=self.days[next_idx] - day)
+
+def steps(make_recurrence) -> float:
+    # seconds per advance of the next recurrence
+    def run():
+        for _ in range(COUNT // STEPS):
+            recurrence: Recurrence = make_recurrence()
+            for _ in range(STEPS):
+                recurrence._set_next_recurrence_dt_wrapper()
+    return best_of(run) / COUNT
+
+def should_recur_once() -> float:
+    # Once has no steps, firing it is the whole cost
+    start_dt_wrapper = DateTimeWrapper(2024, 1, 1, 9, 0)
+    def run():
+        for _ in range(COUNT):
+            Once(start_dt_wrapper).should_recur(start_dt_wrapper)
+    return best_of(run) / COUNT
+
+def report(name: str, seconds: float, legacy_seconds: float = None) -> None:
+    legacy = f", legacy {legacy_seconds * 1e9:8.0f} ns ({legacy_seconds / seconds:.1f}x)" if legacy_seconds else ""
+    print(f"{name:<32} {seconds * 1e9:8.0f} ns{legacy}")
+
+def run() -> None:
+    start_dt_wrapper = DateTimeWrapper(2024, 1, 1, 9, 0)
+    report("Once fire", should_recur_once())
+    report("Hour step", steps(lambda: Hour(start_dt_wrapper, None, 2)))
+    report("Day step", steps(lambda: Day(start_dt_wrapper, None, 3)))
+    for weekdays in ([1], [1, 3, 5], [1, 2, 3, 4, 5, 6, 7]):
+        report(f"Week step {weekdays}", steps(lambda: Week(start_dt_wrapper, None, 1, weekdays)),
+                                        steps(lambda: LegacyWeek(start_dt_wrapper, None, 1, weekdays)))
+    for days in ([1], [1, 15], [10, 20, 31]):
+        report(f"Month step {days}", steps(lambda: Month(start_dt_wrapper, None, 1, days)),
+                                     steps(lambda: LegacyMonth(start_dt_wrapper, None, 1, days)))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,43 @@
+from benchmarks.common import best_of, make_reminders, parse_sizes
+from datetime_wrapper import DateTimeWrapper
+from scheduler import Scheduler
+import sys
+
+
+DUE_PER_TICK = 10
+
+def scan_tick(reminders):
+    # the pre-scheduler ReminderManager.__get_due_reminders, minus the db writes
+    return [reminder for reminder in reminders.values() if reminder.should_remind_now()]
+
+def heap_tick(reminders, scheduler):
+    current_dt_wrapper = DateTimeWrapper()
+    due_reminders = []
+    for reminder_id in scheduler.pop_due(current_dt_wrapper):
+        reminder = reminders[reminder_id]
+        if reminder.should_remind_now(current_dt_wrapper):
+            due_reminders.append(reminder)
+        if not reminder.task_finished():
+            scheduler.schedule(reminder_id, reminder.next_recur_dt_wrapper)
+    return due_reminders
+
+def run(size: int) -> None:
+    reminders = {reminder.reminder_id: reminder for reminder in make_reminders(size, due=DUE_PER_TICK)}
+    scheduler = Scheduler()
+    for reminder_id, reminder in reminders.items():
+        scheduler.schedule(reminder_id, reminder.next_recur_dt_wrapper)
+
+    heap_first = best_of(lambda: heap_tick(reminders, scheduler), repeat=1)   # fires the due reminders
+    heap_idle = best_of(lambda: heap_tick(reminders, scheduler))
+
+    reminders = {reminder.reminder_id: reminder for reminder in make_reminders(size, due=DUE_PER_TICK)}
+    scan_first = best_of(lambda: scan_tick(reminders), repeat=1)
+    scan_idle = best_of(lambda: scan_tick(reminders), repeat=3)
+
+    print(f"{size:>9} reminders | scan: first tick {scan_first * 1000:10.3f} ms, idle tick {scan_idle * 1000:10.3f} ms"
+          f" | heap: first tick {heap_first * 1000:8.3f} ms, idle tick {heap_idle * 1000:8.3f} ms")
+
+
+if __name__ == "__main__":
+    for size in parse_sizes(sys.argv, "1000,100000,1000000"):
+        run(size)
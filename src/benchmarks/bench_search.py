@@ -0,0 +1,49 @@
+from benchmarks.common import best_of, parse_sizes
+from datetime_wrapper import DateTimeWrapper
+from db import DB
+import tempfile
+import random
+import time
+import sys
+import os
+
+
+PAGE_SIZE = 15
+COMMON_WORDS = ["call", "pay", "meeting", "review", "buy", "water", "check", "send"]  # in about one reminder of eight each
+RECURRENCE_TYPES = ["Once", "Hour", "Day", "Week", "Month"]
+
+def seed(path: str, size: int) -> None:
+    # every title has a common word and a unique one, next fires spread over the coming year
+    rng = random.Random(size)
+    now = DateTimeWrapper().to_epoch_minutes()
+    reminder_db = DB(path, "fast")
+    with reminder_db.batch():
+        reminder_db.add_reminders((str(i), f"{rng.choice(COMMON_WORDS)} item{i}", f"message {rng.choice(COMMON_WORDS)}", rng.choice(RECURRENCE_TYPES),
+                                   DateTimeWrapper.from_epoch_minutes(now + rng.randrange(365 * 24 * 60)), None, None, 1, None, None) for i in range(size))
+    reminder_db.close()
+
+def run(size: int, directory: str) -> None:
+    path = os.path.join(directory, f"search_{size}")
+    start = time.perf_counter()
+    seed(path, size)
+    seeded = time.perf_counter() - start
+    reminder_db = DB(path)
+    now = DateTimeWrapper()
+    queries = {
+        "rare word": dict(text=f"item{size // 2}"),
+        "common word": dict(text="meeting"),
+        "common word + type": dict(text="meeting", recurrence_type="Week"),
+        "type + next week": dict(recurrence_type="Day", from_dt_wrapper=now, until_dt_wrapper=now.shifted(days=7)),
+    }
+    print(f"{size:>9} reminders | seeded with the index in {seeded:.1f} s")
+    for name, filters in queries.items():
+        page = best_of(lambda: reminder_db.search_reminders(**filters, limit=PAGE_SIZE))
+        count = best_of(lambda: reminder_db.count_search_results(**filters))
+        print(f"{'':>9}           | {name:<20} first page {page * 1000:8.2f} ms, count {count * 1000:8.2f} ms ({reminder_db.count_search_results(**filters)} matches)")
+    reminder_db.close()
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        for size in parse_sizes(sys.argv, "1000,100000,1000000"):
+            run(size, directory)
@@ -0,0 +1,43 @@
+from benchmarks.common import parse_sizes
+from datetime_wrapper import DateTimeWrapper
+from sharded import ShardedReminderManager, shard_db_name, shard_of
+from db import DB
+import tempfile
+import time
+import sys
+import os
+
+
+def seed(db_name: str, shards: int, size: int) -> None:
+    # hourly reminders that are all due, written straight into the shard files
+    now = DateTimeWrapper().to_epoch_minutes()
+    shard_dbs = [DB(shard_db_name(db_name, shard), "fast") for shard in range(shards)]
+    rows = [[] for _ in range(shards)]
+    for i in range(size):
+        reminder_id = f"reminder {i}"
+        rows[shard_of(reminder_id, shards)].append((reminder_id, f"title {i}", f"message {i}", "Hour", now - 1 - i % 30, now - 1 - i % 30))
+    for shard_db, shard_rows in zip(shard_dbs, rows):
+        shard_db.conn.executemany('INSERT INTO reminders (reminder_id, title, message, recurrence_type, start_at, end_at, next_fire, interval, list) VALUES (?, ?, ?, ?, ?, NULL, ?, 1, "")', shard_rows)
+        shard_db.conn.commit()
+        shard_db.close()
+
+def run(size: int, shards: int, directory: str) -> None:
+    db_name = os.path.join(directory, f"sharded_{size}_{shards}")
+    seed(db_name, shards, size)
+    sharded = ShardedReminderManager(db_name, shards, "fast", sink=lambda notification_text: None)
+    sharded.start()
+    while sharded.delivered < size:
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - sharded.started_at
+    sharded.stop()
+    print(f"{size:>9} due reminders | {shards:>2} shards | {size / elapsed:10.0f} fires/s ({elapsed * 1000:8.1f} ms)")
+
+
+if __name__ == "__main__":
+    # python -m benchmarks.bench_sharded [sizes] [shard counts], shard counts default to powers of two up to the core count
+    default_shard_counts = sorted({1, 2, 4, 8, os.cpu_count()} & set(range(1, os.cpu_count() + 1)))
+    shard_counts = parse_sizes(sys.argv[1:], ",".join(map(str, default_shard_counts)))
+    with tempfile.TemporaryDirectory() as directory:
+        for size in parse_sizes(sys.argv, "10000,100000"):
+            for shards in shard_counts:
+                run(size, shards, directory)
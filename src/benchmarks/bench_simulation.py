@@ -0,0 +1,40 @@
+from benchmarks.common import make_mixed_records, parse_sizes
+from datetime_wrapper import DateTimeWrapper
+from reminder import ReminderManager
+from simulation import Simulation
+from clock import ManualClock
+from db import DB
+import tempfile
+import atexit
+import sys
+import os
+
+
+ENGINES = [("heap", None), ("columnar", None), ("heap lazy", 60)]
+
+def run(size: int, days: int, directory: str) -> None:
+    # the mixed reminders start over the coming year, so later days have more of them running
+    path = os.path.join(directory, f"simulation_{size}")
+    reminder_db = DB(path, "fast")
+    with reminder_db.batch():
+        reminder_db.add_reminders((str(i), *record) for i, record in enumerate(make_mixed_records(size)))
+    reminder_db.close()
+    start_dt_wrapper = DateTimeWrapper()
+    for name, lazy_horizon_minutes in ENGINES:
+        # every engine replays the same days from a copy of the seeded rows
+        temp_path = f"{path}_{name}"
+        with open(path, "rb") as source, open(temp_path, "wb") as target:
+            target.write(source.read())
+        reminder_manager = ReminderManager(DB(temp_path, "fast"), lazy_horizon_minutes, name.split()[0], clock=ManualClock(start_dt_wrapper))
+        atexit.unregister(reminder_manager.on_exit)
+        result = Simulation(reminder_manager).run(start_dt_wrapper.shifted(days=days), record=False)
+        reminder_manager.close()
+        print(f"{size:>8} reminders | {days} days | {name:<9} | {result.fires:>9} fires in {result.ticks:>6} ticks, {result.wall_seconds:7.2f} s, {result.fires_per_second:9.0f} fires/s")
+
+
+if __name__ == "__main__":
+    # python -m benchmarks.bench_simulation [sizes] [days]
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    with tempfile.TemporaryDirectory() as directory:
+        for size in parse_sizes(sys.argv, "1000,10000,100000"):
+            run(size, days, directory)
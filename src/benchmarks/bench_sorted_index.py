@@ -0,0 +1,47 @@
+from benchmarks.common import best_of, make_reminders, parse_sizes
+from sorted_index import SortedIndex
+import sys
+
+
+RESORT_LIMIT = 10000    # re-sorting on every insert is quadratic, larger sizes would take minutes
+
+def resort_insert(reminders):
+    # the pre-index ReminderManager.add_reminder, which re-sorted the whole dict on every insert
+    ordered = {}
+    for reminder in reminders:
+        ordered[reminder.reminder_id] = reminder
+        ordered = dict(sorted(ordered.items(), key=lambda item: item[1]))
+    return ordered
+
+def index_insert(reminders):
+    index = SortedIndex()
+    for reminder in reminders:
+        index.add(reminder.reminder_id, reminder.next_recur_dt_wrapper)
+    return index
+
+def index_bulk_load(reminders):
+    index = SortedIndex()
+    index.add_many((reminder.reminder_id, reminder.next_recur_dt_wrapper) for reminder in reminders)
+    return index
+
+def index_reschedule(index, reminders):
+    for reminder in reminders:
+        index.add(reminder.reminder_id, reminder.next_recur_dt_wrapper.shifted(days=1))
+
+def run(size: int) -> None:
+    reminders = make_reminders(size)
+    inserted = best_of(lambda: index_insert(reminders), repeat=3)
+    bulk = best_of(lambda: index_bulk_load(reminders), repeat=3)
+    index = index_bulk_load(reminders)
+    rescheduled = best_of(lambda: index_reschedule(index, reminders[:1000]), repeat=1)
+    line = (f"{size:>9} reminders | index: insert one by one {inserted * 1000:10.3f} ms, bulk load {bulk * 1000:10.3f} ms,"
+            f" reschedule {rescheduled / min(size, 1000) * 1e6:7.3f} us/reminder")
+    if size <= RESORT_LIMIT:
+        resorted = best_of(lambda: resort_insert(reminders), repeat=1)
+        line += f" | re-sort on insert {resorted * 1000:12.3f} ms"
+    print(line)
+
+
+if __name__ == "__main__":
+    for size in parse_sizes(sys.argv, "1000,10000,100000,1000000"):
+        run(size)
@@ -0,0 +1,50 @@
+from benchmarks.common import parse_sizes
+from datetime_wrapper import DateTimeWrapper
+from reminder import ReminderManager
+from db import DB
+import subprocess
+import tempfile
+import resource
+import atexit
+import time
+import sys
+import os
+
+
+HORIZON_MINUTES = 60
+
+def seed(path: str, size: int) -> None:
+    # next fires spread evenly over the coming year
+    reminder_db = DB(path, "fast")
+    now = DateTimeWrapper().to_epoch_minutes()
+    reminder_db.conn.executemany('INSERT INTO reminders (reminder_id, title, message, recurrence_type, start_at, end_at, next_fire, interval, list) VALUES (?, ?, ?, ?, ?, NULL, ?, 1, "")',
+                                 ((str(i), f"title {i}", f"message {i}", "Day", now, now + i * 365 * 24 * 60 // size) for i in range(size)))
+    reminder_db.conn.commit()
+    reminder_db.close()
+
+def cold_start(path: str, mode: str) -> None:
+    # runs in a fresh interpreter so the peak rss belongs to this start alone
+    start = time.perf_counter()
+    reminder_manager = ReminderManager(DB(path), HORIZON_MINUTES if mode == "lazy" else None)
+    elapsed = time.perf_counter() - start
+    atexit.unregister(reminder_manager.on_exit)
+    peak_rss_mib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{elapsed:.3f} {peak_rss_mib:.1f} {len(reminder_manager.reminders)}")
+
+def run(size: int, directory: str) -> None:
+    path = os.path.join(directory, f"startup_{size}")
+    seed(path, size)
+    for mode in ("eager", "lazy"):
+        output = subprocess.run([sys.executable, "-m", "benchmarks.bench_startup", "--child", path, mode],
+                                capture_output=True, text=True, check=True).stdout.split()
+        elapsed, peak_rss_mib, resident = float(output[0]), float(output[1]), int(output[2])
+        print(f"{size:>9} stored | {mode:<5} cold start {elapsed * 1000:10.1f} ms, peak rss {peak_rss_mib:8.1f} MiB, {resident} reminders in memory")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        cold_start(sys.argv[2], sys.argv[3])
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            for size in parse_sizes(sys.argv, "1000,100000,1000000"):
+                run(size, directory)
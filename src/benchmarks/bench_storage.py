@@ -0,0 +1,30 @@
+from benchmarks.common import parse_sizes
+from datetime_wrapper import DateTimeWrapper
+from db import DB, STORAGE_PROFILES
+import tempfile
+import time
+import sys
+import os
+
+
+def writes_per_second(reminder_db: DB, size: int, prefix: str) -> float:
+    start_dt_wrapper = DateTimeWrapper(2024, 1, 1, 9, 0)
+    start = time.perf_counter()
+    for i in range(size):
+        reminder_db.add_reminder(f"{prefix}{i}", "title", "message", "Day", start_dt_wrapper)
+    return size / (time.perf_counter() - start)
+
+def run(size: int, directory: str) -> None:
+    for name, profile in STORAGE_PROFILES.items():
+        reminder_db = DB(os.path.join(directory, f"{name}_{size}"), profile)
+        single = writes_per_second(reminder_db, size, "single")
+        with reminder_db.batch():
+            batched = writes_per_second(reminder_db, size, "batched")
+        reminder_db.close()
+        print(f"{size:>7} writes | {name:<8} commit per write {single:10.0f}/s, one batch {batched:10.0f}/s")
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        for size in parse_sizes(sys.argv, "1000,10000"):
+            run(size, directory)
@@ -0,0 +1,65 @@
+from benchmarks.common import best_of, make_mixed_records
+from tenants import TenantReminderManager
+from scheduler import Scheduler
+from db import DB
+import tempfile
+import random
+import time
+import sys
+import os
+
+
+LOADS = 1000    # tenants loaded one after the other, to time loading and eviction
+DUE_TENANTS = 100   # tenants with one reminder already due
+
+def seed(path: str, tenants: int, per_tenant: int) -> None:
+    # the same mixed records for every tenant under their own ids, one reminder of the first DUE_TENANTS tenants already due
+    records = make_mixed_records(per_tenant)
+    due_record = make_mixed_records(1, due=1)[0]
+    reminder_db = DB(path, "fast")
+    with reminder_db.batch():
+        for tenant in range(tenants):
+            tenant_records = [due_record, *records[1:]] if tenant < DUE_TENANTS else records
+            reminder_db.add_reminders(((f"{tenant}-{i}", *record) for i, record in enumerate(tenant_records)), owner=f"tenant {tenant}")
+    reminder_db.close()
+
+def run(tenants: int, per_tenant: int, directory: str) -> None:
+    path = os.path.join(directory, f"tenants_{tenants}_{per_tenant}")
+    start = time.perf_counter()
+    seed(path, tenants, per_tenant)
+    print(f"{tenants:>6} tenants x {per_tenant} reminders | seeded in {time.perf_counter() - start:.1f} s")
+
+    start = time.perf_counter()
+    tenant_manager = TenantReminderManager(DB(path, "fast"), max_resident_tenants=LOADS // 2)
+    print(f"{'':>27}| started in {(time.perf_counter() - start) * 1000:.1f} ms with {len(tenant_manager.reminders)} reminders due within the horizon")
+
+    owners = [f"tenant {tenant}" for tenant in random.Random(0).sample(range(tenants), min(LOADS, tenants))]
+    start = time.perf_counter()
+    for owner in owners:
+        tenant_manager.load_tenant(owner)
+    loaded = (time.perf_counter() - start) / len(owners)
+    indexed = best_of(lambda: tenant_manager.db.get_owner_reminders(owners[0]))
+    full_scan = best_of(lambda: tenant_manager.db.conn.execute("SELECT * FROM reminders NOT INDEXED WHERE owner = ? ORDER BY next_fire", (owners[0],)).fetchall(), repeat=3)
+    listed = best_of(lambda: tenant_manager.get_tenant_reminders(owners[-1]))
+    print(f"{'':>27}| load a tenant {loaded * 1000:8.3f} ms incl. eviction ({len(tenant_manager.tenants)} resident, {len(tenant_manager.reminders)} reminders in memory)")
+    print(f"{'':>27}| one tenant's rows: index {indexed * 1000:8.3f} ms, full scan {full_scan * 1000:8.3f} ms, listed when resident {listed * 1000:8.3f} ms")
+
+    start = time.perf_counter()
+    fired = tenant_manager.fire_due_reminders()
+    due_tick = time.perf_counter() - start
+    idle_tick = best_of(tenant_manager.fire_due_reminders)
+    # what a scheduler per tenant would do every tick, peek at each of them
+    schedulers = [Scheduler() for _ in range(tenants)]
+    for scheduler in schedulers:
+        scheduler.schedule("next", tenant_manager.loaded_until)
+    per_tenant_idle_tick = best_of(lambda: [scheduler.peek() for scheduler in schedulers])
+    print(f"{'':>27}| due tick {due_tick * 1000:8.3f} ms ({len(fired)} fired), idle tick {idle_tick * 1e6:8.1f} us, vs {per_tenant_idle_tick * 1e6:8.1f} us peeking a scheduler per tenant")
+    tenant_manager.close()
+
+
+if __name__ == "__main__":
+    # python -m benchmarks.bench_tenants [tenants] [reminders per tenant]
+    tenants = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    per_tenant = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    with tempfile.TemporaryDirectory() as directory:
+        run(tenants, per_tenant, directory)
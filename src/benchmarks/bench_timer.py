@@ -0,0 +1,43 @@
+from app import TIME_CHECK_INTERVAL_SECONDS
+from timer import MAX_SLEEP_SECONDS
+import statistics
+import asyncio
+import random
+import time
+import sys
+
+
+SIMULATED_SECONDS = 3600
+
+def timer_overshoot_seconds(samples: int = 20, delay_seconds: float = 0.05) -> float:
+    # how late loop.call_later actually fires, the only latency left once the timer sleeps until the due time
+    async def measure():
+        loop = asyncio.get_running_loop()
+        overshoots = []
+        for _ in range(samples):
+            fired = loop.create_future()
+            deadline = time.perf_counter() + delay_seconds
+            loop.call_later(delay_seconds, fired.set_result, None)
+            await fired
+            overshoots.append(time.perf_counter() - deadline)
+        return statistics.mean(overshoots)
+    return asyncio.run(measure())
+
+def run(due_per_hour: int) -> None:
+    rng = random.Random(due_per_hour)
+    due_seconds = sorted(rng.randrange(SIMULATED_SECONDS // 60) * 60 for _ in range(due_per_hour))  # reminders are minute aligned
+
+    poll_phase = rng.uniform(0, TIME_CHECK_INTERVAL_SECONDS)
+    poll_wakeups = SIMULATED_SECONDS / TIME_CHECK_INTERVAL_SECONDS
+    poll_latency = statistics.mean((poll_phase - due) % TIME_CHECK_INTERVAL_SECONDS for due in due_seconds)
+
+    event_wakeups = len(set(due_seconds)) + SIMULATED_SECONDS // MAX_SLEEP_SECONDS
+    event_latency = timer_overshoot_seconds()
+
+    print(f"{due_per_hour:>5} due per hour | polling every {TIME_CHECK_INTERVAL_SECONDS:g} s: {poll_wakeups:5.0f} wakeups/h, mean fire latency {poll_latency * 1000:8.1f} ms"
+          f" | sleep until due: {event_wakeups:5.0f} wakeups/h, mean fire latency {event_latency * 1000:8.3f} ms")
+
+
+if __name__ == "__main__":
+    for due_per_hour in [int(count) for count in (sys.argv[1] if len(sys.argv) > 1 else "1,10,100,1000").split(",")]:
+        run(due_per_hour)
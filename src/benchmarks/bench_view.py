@@ -0,0 +1,100 @@
+from benchmarks.common import parse_sizes
+from datetime_wrapper import DateTimeWrapper
+from reminder import ReminderManager
+from view import ReminderAppView
+from worker import ReminderWorker
+from db import DB
+import tkinter as tk
+import tempfile
+import atexit
+import time
+import sys
+import os
+
+
+EDITS = 20
+
+def legacy_update(listbox, reminders):
+    # the pre-virtual ReminderAppView.update_reminder_list
+    listbox.delete(0, tk.END)
+    for reminder_id, title, message, next_recur_dtwrapper in reminders:
+        listbox.insert(tk.END, f"{title} ({next_recur_dtwrapper}): {message}")
+
+def frame_time(root, edit) -> float:
+    # an edit plus the redraw it causes, the time the ui is frozen for
+    start = time.perf_counter()
+    edit()
+    root.update()
+    return time.perf_counter() - start
+
+def run(root, size: int, directory: str) -> None:
+    path = os.path.join(directory, f"view_{size}")
+    reminder_manager = ReminderManager(DB(path, "fast"))
+    atexit.unregister(reminder_manager.on_exit)
+    now = DateTimeWrapper()
+    reminder_manager.import_reminders((f"title {i}", "message", "Day", now.shifted(minutes=i), None, None, 1, None, None) for i in range(size))
+
+    frame = tk.Frame(root)
+    frame.pack()
+    reminders = reminder_manager.get_all_reminders()
+    listbox = tk.Listbox(frame, width=50, height=15)
+    listbox.pack()
+    legacy_update(listbox, reminders)
+    root.update()
+    def legacy_add():
+        reminders.append((None, "added", "message", now))
+        legacy_update(listbox, reminders)
+    def legacy_delete():
+        del reminders[0]
+        legacy_update(listbox, reminders)
+    legacy_add_ms = max(frame_time(root, legacy_add) for _ in range(3)) * 1000
+    legacy_delete_ms = max(frame_time(root, legacy_delete) for _ in range(3)) * 1000
+    frame.destroy()
+
+    reminder_manager.db.close()
+
+    # the view posts to the worker thread, the frame is the time the ui thread is busy
+    worker = ReminderWorker(lambda: ReminderManager(DB(path, "fast")))
+    worker.start()
+    frame = tk.Frame(root)
+    frame.pack()
+    view = ReminderAppView(frame, worker)
+    def settle():
+        # round trip until the worker answered and the page is shown, commands run in order so a marker trails the edit
+        start = time.perf_counter()
+        while True:
+            done = []
+            worker.submit(lambda manager: None, done.append)
+            while not done:
+                worker.poll_results()
+                root.update()
+            if not view.refreshing:
+                return time.perf_counter() - start
+    settle()
+    add_ms, delete_ms, scroll_ms, settle_ms = [], [], [], []
+    for i in range(EDITS):
+        add_ms.append(frame_time(root, lambda: worker.submit(lambda manager: manager.add_reminder("added", "message", "Day", now.shifted(minutes=i)), view.add_reminder)))
+        settle_ms.append(settle())
+        view.reminder_tree.selection_set(view.reminder_tree.get_children()[0])
+        delete_ms.append(frame_time(root, view.remove_reminder))
+        settle_ms.append(settle())
+        scroll_ms.append(frame_time(root, lambda: view.yview("scroll", 1, "pages")))
+        settle_ms.append(settle())
+    add_ms, delete_ms, scroll_ms, settle_ms = (max(times) * 1000 for times in (add_ms, delete_ms, scroll_ms, settle_ms))
+    frame.destroy()
+    worker.stop()
+
+    print(f"{size:>9} reminders | listbox: add {legacy_add_ms:9.1f} ms, delete {legacy_delete_ms:9.1f} ms"
+          f" | virtual: add {add_ms:7.2f} ms, delete {delete_ms:7.2f} ms, page down {scroll_ms:7.2f} ms (worst frame),"
+          f" worst round trip {settle_ms:7.2f} ms")
+
+
+if __name__ == "__main__":
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        sys.exit(f"bench_view needs a display: {e}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in parse_sizes(sys.argv, "1000,10000,50000"):
+            run(root, size, directory)
+    root.destroy()
@@ -0,0 +1,52 @@
+from datetime_wrapper import DateTimeWrapper
+from reminder import Reminder
+from typing import Callable, List, Tuple
+import random
+import time
+
+
+RECURRENCE_MIX = [("Once", 20), ("Hour", 15), ("Day", 30), ("Week", 25), ("Month", 10)]   # type, weight in percent
+
+
+def best_of(func: Callable[[], object], repeat: int = 5) -> float:
+    # best wall time in seconds over a number of runs
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def make_reminders(n: int, due: int = 0) -> List[Reminder]:
+    # hourly and daily reminders spread over the coming year, the first `due` of them already due
+    now = DateTimeWrapper()
+    reminders: List[Reminder] = []
+    for i in range(n):
+        start_dt_wrapper = DateTimeWrapper(now.year, now.month, now.day, now.hour, now.minute)
+        start_dt_wrapper = start_dt_wrapper.shifted(minutes=-1 if i < due else 1 + i % (365 * 24 * 60))
+        recurrence_type = "Hour" if i % 2 else "Day"
+        reminders.append(Reminder(str(i), f"title {i}", f"message {i}", recurrence_type, start_dt_wrapper))
+    return reminders
+
+def make_mixed_records(n: int, due: int = 0, seed: int = 0) -> List[Tuple]:
+    # import_reminders records of every recurrence type in RECURRENCE_MIX, starting over the coming year, the first `due` of them already due
+    rng = random.Random(seed)
+    now = DateTimeWrapper().to_epoch_minutes()
+    types = rng.choices([recurrence_type for recurrence_type, _ in RECURRENCE_MIX], [weight for _, weight in RECURRENCE_MIX], k=n)
+    records: List[Tuple] = []
+    for i, recurrence_type in enumerate(types):
+        start_dt_wrapper = DateTimeWrapper.from_epoch_minutes(now - 1 if i < due else now + rng.randint(1, 365 * 24 * 60))
+        end_dt_wrapper = start_dt_wrapper.shifted(days=rng.randint(1, 3 * 365)) if recurrence_type != "Once" and rng.random() < 0.2 else None
+        list = None
+        if recurrence_type == "Week":
+            list = sorted(rng.sample(range(1, 8), rng.randint(1, 5)))
+        elif recurrence_type == "Month":
+            list = sorted(rng.sample(range(1, 32), rng.randint(1, 3)))
+        records.append((f"title {i}", f"message {i}", recurrence_type, start_dt_wrapper, end_dt_wrapper, None, rng.randint(1, 3), list, None))
+    return records
+
+def make_mixed_reminders(n: int, due: int = 0, seed: int = 0) -> List[Reminder]:
+    return [Reminder(str(i), *record) for i, record in enumerate(make_mixed_records(n, due, seed))]
+
+def parse_sizes(argv: List[str], default: str) -> List[int]:
+    return [int(size) for size in (argv[1] if len(argv) > 1 else default).split(",")]
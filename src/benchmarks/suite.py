@@ -0,0 +1,171 @@
+"""
+Benchmark suite of the hot paths over synthetic reminder sets mixing every recurrence type.
+
+    python -m benchmarks.suite --sizes 1000,100000,1000000 --output results.json
+    python -m benchmarks.suite --baseline results.json --threshold 0.25
+
+Every case reports seconds per operation. With --baseline the run exits with status 1 when a metric got slower
+than the baseline by more than the threshold. The bench_*.py scripts compare single features against what they replaced.
+"""
+from benchmarks.common import best_of, make_mixed_records, make_mixed_reminders
+from datetime_wrapper import DateTimeWrapper
+from reminder import ReminderManager
+from simulation import Simulation
+from clock import Clock, ManualClock, SYSTEM_CLOCK
+from db import DB
+from typing import Callable, Dict, List
+import argparse
+import platform
+import tempfile
+import atexit
+import json
+import time
+import sys
+import os
+
+
+DEFAULT_SIZES = "1000,10000,100000,1000000"
+DEFAULT_THRESHOLD = 0.25
+DUE_PER_TICK = 100
+ADDS = 1000     # single adds timed on top of an already filled db
+LAZY_HORIZON_MINUTES = 60
+SIMULATED_DAYS = 2
+
+def best_of_fresh(setup: Callable[[], object], func: Callable[[object], object], repeat: int = 3) -> float:
+    # best wall time of func on a fresh result of setup every run, for work that changes what it runs on
+    best = float("inf")
+    for _ in range(repeat):
+        state = setup()
+        start = time.perf_counter()
+        func(state)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def seed_db(path: str, size: int, due: int = 0) -> None:
+    reminder_db = DB(path, "fast")
+    with reminder_db.batch():
+        reminder_db.add_reminders((str(i), *record) for i, record in enumerate(make_mixed_records(size, due)))
+    reminder_db.close()
+
+def open_manager(path: str, lazy_horizon_minutes: int = None, clock: Clock = SYSTEM_CLOCK) -> ReminderManager:
+    reminder_manager = ReminderManager(DB(path, "fast"), lazy_horizon_minutes, clock=clock)
+    atexit.unregister(reminder_manager.on_exit)
+    return reminder_manager
+
+def bench_should_recur(size: int, directory: str) -> Dict[str, float]:
+    # one check of every recurrence, DUE_PER_TICK of them due and advanced
+    def check(reminders):
+        current_dt_wrapper = DateTimeWrapper()
+        for reminder in reminders:
+            reminder.recurrence.should_recur(current_dt_wrapper)
+    return {"should_recur": best_of_fresh(lambda: make_mixed_reminders(size, DUE_PER_TICK), check) / size}
+
+def bench_tick(size: int, directory: str) -> Dict[str, float]:
+    path = os.path.join(directory, f"tick_{size}")
+    seed_db(path, size, DUE_PER_TICK)
+    reminder_manager = open_manager(path)
+    start = time.perf_counter()
+    fired = reminder_manager.fire_due_reminders()
+    due_tick = time.perf_counter() - start
+    idle_tick = best_of(reminder_manager.fire_due_reminders)
+    reminder_manager.close()
+    return {"due_tick": due_tick / max(len(fired), 1), "idle_tick": idle_tick}
+
+def bench_db(size: int, directory: str) -> Dict[str, float]:
+    path = os.path.join(directory, f"db_{size}")
+    records = make_mixed_records(size)
+    reminder_db = DB(path, "durable")
+    start = time.perf_counter()
+    with reminder_db.batch():
+        reminder_db.add_reminders((str(i), *record) for i, record in enumerate(records))
+    add_batch = time.perf_counter() - start
+    start = time.perf_counter()
+    for i, record in enumerate(records[:ADDS]):
+        *arguments, misfire_policy = record
+        reminder_db.add_reminder(f"single {i}", *arguments, misfire_policy=misfire_policy)
+    add_single = time.perf_counter() - start
+    get_all = best_of(reminder_db.get_all_reminders, repeat=3)
+    reminder_db.close()
+    return {"add_reminder": add_single / min(size, ADDS), "add_reminders": add_batch / size, "get_all_reminders": get_all / size}
+
+def bench_startup(size: int, directory: str) -> Dict[str, float]:
+    path = os.path.join(directory, f"startup_{size}")
+    seed_db(path, size)
+    results = {}
+    for mode, lazy_horizon_minutes in (("eager", None), ("lazy", LAZY_HORIZON_MINUTES)):
+        start = time.perf_counter()
+        reminder_manager = open_manager(path, lazy_horizon_minutes)
+        results[f"{mode}_load"] = (time.perf_counter() - start) / size
+        reminder_manager.close()
+    return results
+
+def bench_simulation(size: int, directory: str) -> Dict[str, float]:
+    # every fire of SIMULATED_DAYS replayed on a manual clock, see simulation.Simulation
+    path = os.path.join(directory, f"simulation_{size}")
+    seed_db(path, size)
+    start_dt_wrapper = DateTimeWrapper()
+    reminder_manager = open_manager(path, clock=ManualClock(start_dt_wrapper))
+    result = Simulation(reminder_manager).run(start_dt_wrapper.shifted(days=SIMULATED_DAYS), record=False)
+    reminder_manager.close()
+    return {"simulated_fire": result.wall_seconds / max(result.fires, 1)}
+
+CASES: Dict[str, Callable[[int, str], Dict[str, float]]] = {
+    "should_recur": bench_should_recur,
+    "tick": bench_tick,
+    "db": bench_db,
+    "startup": bench_startup,
+    "simulation": bench_simulation,
+}
+
+def run(sizes: List[int], cases: List[str]) -> Dict:
+    results: Dict[str, Dict[str, float]] = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            for case in cases:
+                for metric, seconds in CASES[case](size, directory).items():
+                    key = f"{case}.{metric}[{size}]"
+                    results[key] = seconds
+                    print(f"{key:<40} {seconds * 1e6:12.3f} us/op", flush=True)
+    return {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(), "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "results": results,
+    }
+
+def regressions(baseline: Dict, current: Dict, threshold: float) -> List[str]:
+    # metrics present in both runs that got slower by more than threshold, a fraction of the baseline
+    found = []
+    for key, seconds in current["results"].items():
+        baseline_seconds = baseline["results"].get(key)
+        if baseline_seconds and seconds > baseline_seconds * (1 + threshold):
+            found.append(f"{key}: {baseline_seconds * 1e6:.3f} -> {seconds * 1e6:.3f} us/op (+{(seconds / baseline_seconds - 1) * 100:.0f}%)")
+    return found
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite", description="Benchmark the scheduler, recurrence engine and storage layer.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma separated reminder counts")
+    parser.add_argument("--cases", default=",".join(CASES), help=f"comma separated, of {', '.join(CASES)}")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed slowdown against the baseline, 0.25 for 25%%")
+    args = parser.parse_args(argv)
+
+    cases = args.cases.split(",")
+    unknown = [case for case in cases if case not in CASES]
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(unknown)}")
+    current = run([int(size) for size in args.sizes.split(",")], cases)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            found = regressions(json.load(f), current, args.threshold)
+        for regression in found:
+            print(f"regression {regression}", file=sys.stderr)
+        if found:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,304 @@
+from datetime_wrapper import DateTimeWrapper, FORMAT
+from recurrence import CLASS_NAME_TO_CONSTRUCTOR
+from reminder import ReminderManager, MISFIRE_POLICIES
+from db import DB, DB_NAME, STORAGE_PROFILES
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, Tuple
+import argparse
+import atexit
+import json
+import csv
+import os
+import re
+
+
+# records are (title, message, recurrence_type, start_dt_wrapper, end_dt_wrapper, next_recur_dt_wrapper, interval, list, misfire_policy) tuples,
+# see ReminderManager.import_reminders
+CSV_FIELDS = ["reminder_id", "title", "message", "recurrence_type", "start", "end", "next", "interval", "list", "misfire_policy"]
+ICS_WEEKDAYS = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]     # DateTimeWrapper.weekday 1 to 7
+ICS_FREQ_TO_RECURRENCE_TYPE = {"HOURLY": "Hour", "DAILY": "Day", "WEEKLY": "Week", "MONTHLY": "Month"}
+RECURRENCE_TYPE_TO_ICS_FREQ = {recurrence_type: freq for freq, recurrence_type in ICS_FREQ_TO_RECURRENCE_TYPE.items()}
+ICS_DATETIME_FORMAT = "%Y%m%dT%H%M%S"
+ICS_ESCAPE = re.compile(r"\\(.)")
+
+class InvalidRecordError(ValueError):
+    """
+    Raised for a record that cannot be mapped onto a reminder, with the file location it came from.
+    """
+    def __init__(self, location: str, reason: str) -> None:
+        super().__init__(f"{location}: {reason}")
+        self.location: str = location
+        self.reason: str = reason
+
+
+def validate_record(fields: Dict[str, Any], location: str) -> Tuple:
+    # fields hold title, message, recurrence_type, start, end, next, interval, list and misfire_policy as read from a file
+    def fail(reason: str):
+        raise InvalidRecordError(location, reason)
+
+    title = fields.get("title")
+    if not title or not isinstance(title, str):
+        fail("title is required")
+    message = fields.get("message") or ""
+    recurrence_type = fields.get("recurrence_type") or "Once"
+    if recurrence_type not in CLASS_NAME_TO_CONSTRUCTOR:
+        fail(f"unknown recurrence type {recurrence_type!r}")
+
+    def parse_dt_wrapper(name: str) -> DateTimeWrapper:
+        value = fields.get(name)
+        if value is None or value == "":
+            return None
+        if isinstance(value, DateTimeWrapper):
+            return value
+        try:
+            return DateTimeWrapper.from_datetime(datetime.fromisoformat(str(value)))
+        except ValueError:
+            fail(f"{name} {value!r} is not a date time like {datetime(2024, 1, 31, 9, 30).strftime(FORMAT)!r}")
+
+    start_dt_wrapper = parse_dt_wrapper("start")
+    if start_dt_wrapper is None:
+        fail("start is required")
+    end_dt_wrapper = parse_dt_wrapper("end")
+    if end_dt_wrapper is not None and end_dt_wrapper < start_dt_wrapper:
+        fail("end is before start")
+    next_recur_dt_wrapper = parse_dt_wrapper("next")
+
+    interval = fields.get("interval")
+    try:
+        interval = int(interval) if interval not in (None, "") else 1
+    except (TypeError, ValueError):
+        fail(f"interval {interval!r} is not an integer")
+    if interval < 1:
+        fail("interval must be at least 1")
+
+    values = fields.get("list")
+    if isinstance(values, str):
+        values = [value for value in values.replace(";", ",").split(",") if value.strip()]
+    try:
+        values = [int(value) for value in values] if values else None
+    except (TypeError, ValueError):
+        fail(f"list {fields.get('list')!r} is not a list of integers")
+    if values:
+        if recurrence_type == "Week" and not all(1 <= value <= 7 for value in values):
+            fail("week days go from 1 (monday) to 7 (sunday)")
+        elif recurrence_type == "Month" and not all(1 <= value <= 31 for value in values):
+            fail("month days go from 1 to 31")
+        elif recurrence_type not in ("Week", "Month"):
+            fail(f"{recurrence_type} reminders take no list")
+
+    misfire_policy = fields.get("misfire_policy") or None     # none for the policy of the manager
+    if misfire_policy is not None and misfire_policy not in MISFIRE_POLICIES:
+        fail(f"unknown misfire policy {misfire_policy!r}, expected one of {', '.join(MISFIRE_POLICIES)}")
+    return (title, message, recurrence_type, start_dt_wrapper, end_dt_wrapper, next_recur_dt_wrapper, interval, values, misfire_policy)
+
+def read_csv(path: str) -> Iterator[Tuple]:
+    with open(path, newline="", encoding="utf-8") as f:
+        for line_number, fields in enumerate(csv.DictReader(f), start=2):
+            yield validate_record(fields, f"{path}:{line_number}")
+
+def read_jsonl(path: str) -> Iterator[Tuple]:
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            location = f"{path}:{line_number}"
+            try:
+                fields = json.loads(line)
+            except ValueError as e:
+                raise InvalidRecordError(location, f"invalid json, {e}")
+            if not isinstance(fields, dict):
+                raise InvalidRecordError(location, "expected a json object")
+            yield validate_record(fields, location)
+
+def read_ics(path: str) -> Iterator[Tuple]:
+    # VEVENTs only, nested components such as VALARM are skipped
+    event: Dict[str, Tuple[Dict[str, str], str]] = None
+    event_line_number = 0
+    depth = 0
+    for line_number, line in _unfold_ics_lines(path):
+        name, params, value = _split_ics_line(line)
+        if name == "BEGIN":
+            depth += 1
+            if value == "VEVENT" and event is None:
+                event, event_line_number, depth = {}, line_number, 0
+        elif name == "END":
+            depth -= 1
+            if value == "VEVENT" and event is not None and depth < 0:
+                yield _ics_event_to_record(event, f"{path}:{event_line_number}")
+                event = None
+        elif event is not None and depth == 0:
+            event[name] = (params, value)
+
+def read_reminders(path: str) -> Iterator[Tuple]:
+    return READERS[os.path.splitext(path)[1].lower()](path)
+
+def _unfold_ics_lines(path: str) -> Iterator[Tuple[int, str]]:
+    # long content lines continue on the following lines that start with a space or a tab
+    with open(path, encoding="utf-8") as f:
+        line, line_number = None, 0
+        for number, raw_line in enumerate(f, start=1):
+            raw_line = raw_line.rstrip("\r\n")
+            if raw_line[:1] in (" ", "\t") and line is not None:
+                line += raw_line[1:]
+                continue
+            if line:
+                yield line_number, line
+            line, line_number = raw_line, number
+        if line:
+            yield line_number, line
+
+def _split_ics_line(line: str) -> Tuple[str, Dict[str, str], str]:
+    head, _, value = line.partition(":")
+    name, *params = head.split(";")
+    return name.upper(), dict(param.partition("=")[::2] for param in params), value
+
+def _parse_ics_datetime(params: Dict[str, str], value: str) -> datetime:
+    if params.get("VALUE") == "DATE" or len(value) == 8:
+        return datetime.strptime(value, "%Y%m%d")
+    if value.endswith("Z"):     # utc, reminders keep naive local time
+        return datetime.strptime(value[:-1], ICS_DATETIME_FORMAT).replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+    return datetime.strptime(value, ICS_DATETIME_FORMAT)
+
+def _unescape_ics_text(value: str) -> str:
+    return ICS_ESCAPE.sub(lambda match: "\n" if match.group(1) in "nN" else match.group(1), value)
+
+def _ics_event_to_record(event: Dict[str, Tuple[Dict[str, str], str]], location: str) -> Tuple:
+    fields: Dict[str, Any] = {
+        "title": _unescape_ics_text(event.get("SUMMARY", ({}, ""))[1]),
+        "message": _unescape_ics_text(event.get("DESCRIPTION", ({}, ""))[1]),
+        "recurrence_type": "Once",
+        "misfire_policy": event.get("X-REMINDER-MISFIRE-POLICY", ({}, ""))[1],
+    }
+    try:
+        for field, name in (("start", "DTSTART"), ("next", "X-REMINDER-NEXT")):
+            if name in event:
+                fields[field] = _parse_ics_datetime(*event[name])
+        rule = dict(part.partition("=")[::2] for part in event["RRULE"][1].split(";")) if "RRULE" in event else None
+        if rule is not None and "UNTIL" in rule:
+            fields["end"] = _parse_ics_datetime({}, rule["UNTIL"])
+    except ValueError as e:
+        raise InvalidRecordError(location, f"invalid date time, {e}")
+    if rule is not None:
+        if rule.get("FREQ") not in ICS_FREQ_TO_RECURRENCE_TYPE:
+            raise InvalidRecordError(location, f"unsupported FREQ {rule.get('FREQ')!r}")
+        if "COUNT" in rule:
+            raise InvalidRecordError(location, "COUNT is not supported, use UNTIL")
+        fields["recurrence_type"] = ICS_FREQ_TO_RECURRENCE_TYPE[rule["FREQ"]]
+        fields["interval"] = rule.get("INTERVAL")
+        if fields["recurrence_type"] == "Week" and rule.get("BYDAY"):
+            try:
+                fields["list"] = [ICS_WEEKDAYS.index(day[-2:]) + 1 for day in rule["BYDAY"].split(",")]
+            except ValueError:
+                raise InvalidRecordError(location, f"invalid BYDAY {rule['BYDAY']!r}")
+        elif fields["recurrence_type"] == "Month" and rule.get("BYMONTHDAY"):
+            fields["list"] = rule["BYMONTHDAY"]
+    return validate_record(fields, location)
+
+def import_file(reminder_manager: ReminderManager, path: str, batch_size: int = 10000) -> int:
+    return reminder_manager.import_reminders(read_reminders(path), batch_size)
+
+
+def _row_to_fields(reminder_data) -> Dict[str, Any]:
+    # a DB row, see DB.iter_all_reminders
+    def to_str(epoch_minutes: int) -> str:
+        return DateTimeWrapper.from_epoch_minutes(epoch_minutes).datetime_string if epoch_minutes is not None else ""
+    return {
+        "reminder_id": reminder_data[0],
+        "title": reminder_data[1],
+        "message": reminder_data[2],
+        "recurrence_type": reminder_data[3],
+        "start": to_str(reminder_data[6]),
+        "end": to_str(reminder_data[7]),
+        "next": to_str(reminder_data[8]),
+        "interval": reminder_data[4],
+        "list": reminder_data[5] or "",
+        "misfire_policy": reminder_data[9] or "",
+    }
+
+def write_csv(reminders_data: Iterable, path: str) -> int:
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, CSV_FIELDS)
+        writer.writeheader()
+        for reminder_data in reminders_data:
+            writer.writerow(_row_to_fields(reminder_data))
+            count += 1
+    return count
+
+def write_jsonl(reminders_data: Iterable, path: str) -> int:
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for reminder_data in reminders_data:
+            fields = _row_to_fields(reminder_data)
+            fields["list"] = [int(value) for value in fields["list"].split(",")] if fields["list"] else []
+            fields["misfire_policy"] = fields["misfire_policy"] or None
+            f.write(json.dumps(fields) + "\n")
+            count += 1
+    return count
+
+def write_ics(reminders_data: Iterable, path: str) -> int:
+    def escape(value: str) -> str:
+        return value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+    def fold(line: str) -> str:
+        # content lines longer than 75 characters continue on lines starting with a space
+        return "\r\n ".join(line[i:i + 74] for i in range(0, len(line), 74)) + "\r\n"
+    def to_ics(epoch_minutes: int) -> str:
+        return DateTimeWrapper.from_epoch_minutes(epoch_minutes).my_datetime.strftime(ICS_DATETIME_FORMAT)
+
+    count = 0
+    now = datetime.now().strftime(ICS_DATETIME_FORMAT)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        f.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//ReminderApp//EN\r\n")
+        for reminder_id, title, message, recurrence_type, interval, list, start_at, end_at, next_fire, misfire_policy in reminders_data:
+            lines = ["BEGIN:VEVENT", f"UID:{reminder_id}", f"DTSTAMP:{now}", f"DTSTART:{to_ics(start_at)}",
+                     f"SUMMARY:{escape(title)}", f"DESCRIPTION:{escape(message)}", f"X-REMINDER-NEXT:{to_ics(next_fire)}"]
+            if misfire_policy is not None:
+                lines.append(f"X-REMINDER-MISFIRE-POLICY:{misfire_policy}")
+            if recurrence_type != "Once":
+                rule = f"RRULE:FREQ={RECURRENCE_TYPE_TO_ICS_FREQ[recurrence_type]};INTERVAL={interval}"
+                if end_at is not None:
+                    rule += f";UNTIL={to_ics(end_at)}"
+                if list and recurrence_type == "Week":
+                    rule += ";BYDAY=" + ",".join(ICS_WEEKDAYS[int(day) - 1] for day in list.split(","))
+                elif list and recurrence_type == "Month":
+                    rule += f";BYMONTHDAY={list}"
+                lines.append(rule)
+            lines.append("END:VEVENT")
+            f.write("".join(fold(line) for line in lines))
+            count += 1
+        f.write("END:VCALENDAR\r\n")
+    return count
+
+def write_reminders(reminders_data: Iterable, path: str) -> int:
+    return WRITERS[os.path.splitext(path)[1].lower()](reminders_data, path)
+
+def export_file(db: DB, path: str) -> int:
+    # streamed from the db in next recurrence order
+    return write_reminders(db.iter_all_reminders(), path)
+
+
+READERS = {".csv": read_csv, ".jsonl": read_jsonl, ".ics": read_ics}
+WRITERS = {".csv": write_csv, ".jsonl": write_jsonl, ".ics": write_ics}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import or export reminders as CSV, JSON Lines or iCalendar")
+    parser.add_argument("command", choices=["import", "export"])
+    parser.add_argument("path", help="file ending in " + ", ".join(READERS))
+    parser.add_argument("--db", default=DB_NAME, help="path of the reminder database file")
+    parser.add_argument("--storage-profile", default="durable", choices=list(STORAGE_PROFILES), help="sqlite journaling and sync settings")
+    args = parser.parse_args()
+
+    db = DB(args.db, args.storage_profile)
+    if args.command == "export":
+        print(f"exported {export_file(db, args.path)} reminders")
+        db.close()
+        return
+    # lazy with no horizon so nothing but the imported rows is written, and none of them kept in memory
+    reminder_manager = ReminderManager(db, lazy_horizon_minutes=0)
+    atexit.unregister(reminder_manager.on_exit)
+    print(f"imported {import_file(reminder_manager, args.path)} reminders")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
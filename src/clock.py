@@ -0,0 +1,36 @@
+from datetime_wrapper import DateTimeWrapper
+from datetime import datetime
+
+
+class Clock:
+    """
+    Wall clock read by the managers, replaced by a ManualClock to run schedules without waiting for real time.
+    """
+    def now(self) -> datetime:
+        return datetime.now()
+
+    def now_dt_wrapper(self) -> DateTimeWrapper:
+        return DateTimeWrapper.from_datetime(self.now())
+
+
+class ManualClock(Clock):
+    """
+    Clock that stands still until it is set or advanced, see simulation.Simulation.
+    """
+    def __init__(self, start_dt_wrapper: DateTimeWrapper) -> None:
+        self.epoch_minutes: int = start_dt_wrapper.epoch_minutes
+
+    def now(self) -> datetime:
+        return self.now_dt_wrapper().my_datetime
+
+    def now_dt_wrapper(self) -> DateTimeWrapper:
+        return DateTimeWrapper.from_epoch_minutes(self.epoch_minutes)
+
+    def set(self, dt_wrapper: DateTimeWrapper) -> None:
+        self.epoch_minutes = dt_wrapper.epoch_minutes
+
+    def advance(self, minutes: int) -> None:
+        self.epoch_minutes += minutes
+
+
+SYSTEM_CLOCK: Clock = Clock()
@@ -0,0 +1,139 @@
+from datetime_wrapper import DateTimeWrapper
+from recurrence import Recurrence, Hour, Day
+from typing import Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:     # numpy is optional, only this engine needs it
+    np = None
+
+
+NO_END = 2 ** 62
+MINUTES_PER_STEP = {
+    Hour: 60,
+    Day: 24 * 60,
+}
+
+class ColumnarScheduler:
+    """
+    Scheduler that keeps the next recurrence time, end time and step of every reminder in numpy arrays.
+    The due check is one vectorized comparison, due Hour and Day reminders are advanced with array arithmetic
+    and the other recurrences fall back to their Recurrence objects.
+    """
+    def __init__(self, capacity: int = 1024) -> None:
+        if np is None:
+            raise ImportError("ColumnarScheduler needs numpy, install it or use the heap scheduler")
+        self.next_fire = np.zeros(capacity, dtype=np.int64)
+        self.end = np.zeros(capacity, dtype=np.int64)
+        self.step = np.zeros(capacity, dtype=np.int64)     # 0 for recurrences advanced through their objects
+        self.active = np.zeros(capacity, dtype=bool)
+        self.reminder_ids: List[str] = [None] * capacity
+        self.slots: Dict[str, int] = {}
+        self.free_slots: List[int] = []
+        self.size: int = 0      # slots in use or freed, everything above is untouched
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def __contains__(self, reminder_id: str) -> bool:
+        return reminder_id in self.slots
+
+    def schedule(self, reminder_id: str, next_recur_dt_wrapper: DateTimeWrapper, recurrence: Recurrence = None) -> None:
+        slot = self.slots.get(reminder_id)
+        if slot is None:
+            slot = self.__allocate_slot()
+            self.slots[reminder_id] = slot
+            self.reminder_ids[slot] = reminder_id
+        self.next_fire[slot] = next_recur_dt_wrapper.epoch_minutes
+        minutes_per_step = MINUTES_PER_STEP.get(type(recurrence))
+        self.step[slot] = minutes_per_step * recurrence.interval if minutes_per_step and recurrence.interval > 0 else 0
+        self.end[slot] = recurrence.end_dt_wrapper.epoch_minutes if recurrence is not None and recurrence.end_dt_wrapper else NO_END
+        self.active[slot] = True
+
+    def unschedule(self, reminder_id: str) -> None:
+        slot = self.slots.pop(reminder_id, None)
+        if slot is not None:
+            self.active[slot] = False
+            self.reminder_ids[slot] = None
+            self.free_slots.append(slot)
+
+    def unschedule_many(self, reminder_ids) -> None:
+        for reminder_id in reminder_ids:
+            self.unschedule(reminder_id)
+
+    def peek(self) -> Optional[DateTimeWrapper]:
+        if not self.slots:
+            return None
+        return DateTimeWrapper.from_epoch_minutes(int(np.min(self.next_fire[:self.size], initial=NO_END, where=self.active[:self.size])))
+
+    def pop_due(self, current_dt_wrapper: DateTimeWrapper) -> List[str]:
+        due_slots = self.__due_slots(current_dt_wrapper)
+        reminder_ids = [self.reminder_ids[slot] for slot in due_slots.tolist()]
+        for reminder_id in reminder_ids:
+            self.unschedule(reminder_id)
+        return reminder_ids
+
+    def fire_due(self, current_dt_wrapper: DateTimeWrapper, reminders: Dict[str, "Reminder"]) -> List["Reminder"]:
+        due_slots = self.__due_slots(current_dt_wrapper)
+        if not len(due_slots):
+            return []
+        current_minutes = current_dt_wrapper.epoch_minutes
+
+        # same arithmetic as Recurrence._check_recurrence_and_update, the next recurrence is the first step strictly after now
+        steps = self.step[due_slots]
+        vectorized = steps > 0
+        vector_slots = due_slots[vectorized]
+        vector_steps = steps[vectorized]
+        vector_next_fire = self.next_fire[vector_slots]
+        vector_next_fire += ((current_minutes - vector_next_fire) // vector_steps + 1) * vector_steps
+        self.next_fire[vector_slots] = vector_next_fire
+        vector_finished = vector_next_fire > self.end[vector_slots]
+        advanced = dict(zip(vector_slots.tolist(), zip(vector_next_fire.tolist(), vector_finished.tolist())))
+
+        due_reminders: List["Reminder"] = []
+        for slot in due_slots.tolist():
+            reminder_id = self.reminder_ids[slot]
+            reminder = reminders[reminder_id]
+            if slot in advanced:
+                next_fire, finished = advanced[slot]
+                reminder.recurrence.next_recur_dt_wrapper = DateTimeWrapper.from_epoch_minutes(next_fire)
+                reminder.recurrence.finished = finished
+                reminder.next_recur_dt_wrapper = reminder.recurrence.next_recur_dt_wrapper
+                due_reminders.append(reminder)
+            else:
+                if reminder.should_remind_now(current_dt_wrapper):
+                    due_reminders.append(reminder)
+                self.next_fire[slot] = reminder.next_recur_dt_wrapper.epoch_minutes
+            if reminder.task_finished():
+                self.unschedule(reminder_id)
+        return due_reminders
+
+    def clear(self) -> None:
+        self.active[:] = False
+        self.reminder_ids = [None] * len(self.reminder_ids)
+        self.slots.clear()
+        self.free_slots.clear()
+        self.size = 0
+
+    def __due_slots(self, current_dt_wrapper: DateTimeWrapper):
+        # slots due now, ordered by their next recurrence time like the heap scheduler pops them
+        next_fire = self.next_fire[:self.size]
+        due_slots = np.flatnonzero(self.active[:self.size] & (next_fire <= current_dt_wrapper.epoch_minutes))
+        return due_slots[np.argsort(next_fire[due_slots], kind="stable")]
+
+    def __allocate_slot(self) -> int:
+        if self.free_slots:
+            return self.free_slots.pop()
+        if self.size == len(self.next_fire):
+            self.__grow()
+        self.size += 1
+        return self.size - 1
+
+    def __grow(self) -> None:
+        capacity = 2 * len(self.next_fire)
+        for name in ("next_fire", "end", "step", "active"):
+            array = getattr(self, name)
+            grown = np.zeros(capacity, dtype=array.dtype)
+            grown[:len(array)] = array
+            setattr(self, name, grown)
+        self.reminder_ids.extend([None] * (capacity - len(self.reminder_ids)))
@@ -0,0 +1,254 @@
+from datetime_wrapper import DateTimeWrapper
+from reminder import ReminderManager, MISFIRE_POLICIES, DEFAULT_MISFIRE_POLICY, notification_text
+from dispatch import DispatchPipeline, DispatchSink, PrintSink, DISPATCH_QUEUE_SIZE, MAX_ATTEMPTS, CLOSE_TIMEOUT_SECONDS
+from timer import MAX_SLEEP_SECONDS
+from db import DB, DB_NAME, STORAGE_PROFILES
+from firing_log import FiringLog
+from metrics import Metrics
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from abc import abstractmethod
+from typing import Dict, List, Tuple
+import argparse
+import asyncio
+import atexit
+
+
+METRICS_INTERVAL_SECONDS: float = 15
+CLIENT_WRITE_TIMEOUT_SECONDS: float = 5
+
+class NotificationSink(DispatchSink):
+    """
+    Notification destination of the daemon, sending one text per notification on the event loop of the daemon.
+    The DispatchPipeline of the daemon queues the notifications of every sink on its own and calls deliver from its workers,
+    so a slow or failing sink never holds back the scheduler or the other sinks.
+    """
+    def __init__(self) -> None:
+        self.loop: asyncio.AbstractEventLoop = None
+        self.delivered: int = 0
+
+    @abstractmethod
+    async def send(self, notification_text: str) -> None:
+        pass
+
+    async def start(self) -> None:
+        self.loop = asyncio.get_running_loop()
+
+    async def close(self) -> None:
+        pass
+
+    def deliver(self, notifications: List[Tuple], fire_dt_wrapper: DateTimeWrapper) -> None:
+        # runs on a dispatch worker, raising has the pipeline retry the batch
+        notification_texts = [notification_text(title, message, next_recur_dt_wrapper, occurrence_dt_wrapper)
+                              for _, title, message, next_recur_dt_wrapper, occurrence_dt_wrapper in notifications]
+        try:
+            asyncio.run_coroutine_threadsafe(self.send_all(notification_texts), self.loop).result()
+        except CancelledError:
+            raise RuntimeError("the daemon stopped before they were sent")
+
+    async def send_all(self, notification_texts: List[str]) -> None:
+        for text in notification_texts:
+            await self.send(text)
+            self.delivered += 1
+
+
+class LogFileSink(NotificationSink):
+    def __init__(self, path: str) -> None:
+        super().__init__()
+        self.path: str = path
+
+    async def send(self, notification_text: str) -> None:
+        await self.send_all([notification_text])
+
+    async def send_all(self, notification_texts: List[str]) -> None:
+        await asyncio.to_thread(self.__append, notification_texts)  # file writes can block on slow disks
+        self.delivered += len(notification_texts)
+
+    def __append(self, notification_texts: List[str]) -> None:
+        with open(self.path, "a") as log_file:
+            log_file.write("".join(notification_text + "\n" for notification_text in notification_texts))
+
+
+class UnixSocketSink(NotificationSink):
+    # serves a unix socket and writes every notification as one line to each connected client.
+    # clients are written to concurrently, one that does not take a line within write_timeout_seconds is dropped
+    def __init__(self, path: str, write_timeout_seconds: float = CLIENT_WRITE_TIMEOUT_SECONDS) -> None:
+        super().__init__()
+        self.path: str = path
+        self.write_timeout_seconds: float = write_timeout_seconds
+        self.server: asyncio.AbstractServer = None
+        self.writers: List[asyncio.StreamWriter] = []
+
+    async def start(self) -> None:
+        self.server = await asyncio.start_unix_server(self.__on_connect, path=self.path)
+        await super().start()
+
+    async def close(self) -> None:
+        await super().close()
+        if self.server is not None:
+            self.server.close()
+        for writer in self.writers:
+            writer.close()
+
+    async def __on_connect(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.writers.append(writer)
+
+    async def send(self, notification_text: str) -> None:
+        line = " ".join(notification_text.split()).encode() + b"\n"
+        await asyncio.gather(*(self.__write(writer, line) for writer in list(self.writers)))
+
+    async def __write(self, writer: asyncio.StreamWriter, line: bytes) -> None:
+        try:
+            writer.write(line)
+            await asyncio.wait_for(writer.drain(), self.write_timeout_seconds)
+        except (asyncio.TimeoutError, ConnectionError, OSError):
+            if writer in self.writers:
+                self.writers.remove(writer)
+                writer.close()
+
+
+class ReminderDaemon:
+    """
+    Headless reminder service. ReminderManager and its sqlite connection live on one worker thread,
+    the event loop only waits for the next due time. Fired reminders go through a DispatchPipeline to the sinks,
+    which takes queue_size, max_attempts and close_timeout_seconds, see dispatch.DispatchPipeline.
+    """
+    def __init__(self, sinks: List[DispatchSink], db_name: str = None, profile: str = "durable", lazy_horizon_minutes: int = None,
+                 max_sleep_seconds: float = MAX_SLEEP_SECONDS, firing_log_path: str = None, metrics_path: str = None,
+                 metrics_interval_seconds: float = METRICS_INTERVAL_SECONDS, misfire_policy: str = DEFAULT_MISFIRE_POLICY,
+                 queue_size: int = DISPATCH_QUEUE_SIZE, max_attempts: int = MAX_ATTEMPTS, close_timeout_seconds: float = CLOSE_TIMEOUT_SECONDS) -> None:
+        self.sinks: List[DispatchSink] = sinks
+        self.queue_size: int = queue_size
+        self.max_attempts: int = max_attempts
+        self.close_timeout_seconds: float = close_timeout_seconds
+        self.dispatcher: DispatchPipeline = None
+        self.db_name: str = db_name
+        self.profile: str = profile
+        self.lazy_horizon_minutes: int = lazy_horizon_minutes
+        self.max_sleep_seconds: float = max_sleep_seconds
+        self.firing_log_path: str = firing_log_path
+        # metrics are written to metrics_path at least every metrics_interval_seconds, see metrics.Metrics.write
+        self.metrics_path: str = metrics_path
+        self.metrics_interval_seconds: float = metrics_interval_seconds
+        self.metrics: Metrics = Metrics() if metrics_path else None
+        self.misfire_policy: str = misfire_policy
+        self.executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reminder-db")
+        self.reminder_manager: ReminderManager = None
+        self.loop: asyncio.AbstractEventLoop = None
+        self.wakeup: asyncio.Event = None
+        self.stopped: bool = False
+        self.ticking: bool = False  # only touched on the worker thread
+
+    async def run(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self.wakeup = asyncio.Event()
+        notification_sinks = [sink for sink in self.sinks if isinstance(sink, NotificationSink)]    # the ones sending on this loop
+        for sink in notification_sinks:
+            await sink.start()
+        sinks: Dict[str, DispatchSink] = {}
+        for sink in self.sinks:
+            name = type(sink).__name__
+            sinks[name if name not in sinks else f"{name}-{len(sinks)}"] = sink
+        self.dispatcher = DispatchPipeline(sinks, queue_size=self.queue_size, max_attempts=self.max_attempts, metrics=self.metrics,
+                                           close_timeout_seconds=self.close_timeout_seconds)
+        await self.__call(self.__open)
+        try:
+            while not self.stopped:
+                delay_seconds = await self.__call(self.__tick)
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), delay_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                self.wakeup.clear()
+        finally:
+            await self.__call(self.__close)     # delivers what the pipeline still holds, on this loop
+            await asyncio.gather(*(sink.close() for sink in notification_sinks))
+            self.executor.shutdown()
+
+    def stop(self) -> None:
+        self.stopped = True
+        if self.wakeup is not None:
+            self.wakeup.set()
+
+    async def add_reminder(self, *args, **kwargs) -> str:
+        return await self.__call(lambda: self.reminder_manager.add_reminder(*args, **kwargs))
+
+    async def update_reminder(self, *args, **kwargs) -> None:
+        await self.__call(lambda: self.reminder_manager.update_reminder(*args, **kwargs))
+
+    async def remove_reminder(self, reminder_id: str) -> None:
+        await self.__call(lambda: self.reminder_manager.remove_reminder(reminder_id))
+
+    async def get_all_reminders(self) -> List[Tuple]:
+        return await self.__call(lambda: self.reminder_manager.get_all_reminders())
+
+    async def __call(self, func):
+        return await self.loop.run_in_executor(self.executor, func)
+
+    # the methods below run on the worker thread
+
+    def __open(self) -> None:
+        firing_log = FiringLog(self.firing_log_path) if self.firing_log_path else None
+        self.reminder_manager = ReminderManager(DB(self.db_name, self.profile, self.metrics), self.lazy_horizon_minutes, firing_log=firing_log, metrics=self.metrics,
+                                                dispatcher=self.dispatcher, misfire_policy=self.misfire_policy)
+        atexit.unregister(self.reminder_manager.on_exit)
+        self.reminder_manager.add_schedule_listener(self.__on_schedule_changed)
+
+    def __on_schedule_changed(self) -> None:
+        if not self.ticking:    # a tick computes the next delay by itself
+            self.loop.call_soon_threadsafe(self.wakeup.set)
+
+    def __tick(self) -> float:
+        self.ticking = True
+        try:
+            self.reminder_manager.notify_due_reminders()    # only queued, see dispatch.DispatchPipeline.dispatch
+        finally:
+            self.ticking = False
+        delay_seconds = self.reminder_manager.seconds_until_next_due()
+        if delay_seconds is None or delay_seconds > self.max_sleep_seconds:
+            delay_seconds = self.max_sleep_seconds
+        if self.metrics is not None:
+            self.metrics.write(self.metrics_path)
+            delay_seconds = min(delay_seconds, self.metrics_interval_seconds)
+        return delay_seconds
+
+    def __close(self) -> None:
+        if self.reminder_manager is None:
+            self.dispatcher.close()
+            return
+        self.reminder_manager.close()   # closes the dispatcher
+        if self.metrics is not None:
+            self.metrics.write(self.metrics_path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Headless reminder daemon")
+    parser.add_argument("--db", default=DB_NAME, help="path of the reminder database file")
+    parser.add_argument("--storage-profile", default="durable", choices=list(STORAGE_PROFILES), help="sqlite journaling and sync settings")
+    parser.add_argument("--lazy-horizon-minutes", type=int, default=None, help="only keep reminders due within this many minutes in memory")
+    parser.add_argument("--firing-log", help="append advanced next recurrences to this file instead of updating the db on every tick")
+    parser.add_argument("--metrics", help="write metrics to this file, as JSON if it ends in .json and in the Prometheus text format otherwise")
+    parser.add_argument("--metrics-interval", type=float, default=METRICS_INTERVAL_SECONDS, help="seconds between metrics writes")
+    parser.add_argument("--misfire-policy", default=DEFAULT_MISFIRE_POLICY, choices=MISFIRE_POLICIES,
+                        help="what reminders without a policy of their own do about recurrences missed while the daemon was down")
+    parser.add_argument("--log-file", help="also append notifications to this file")
+    parser.add_argument("--socket", help="also serve notifications on this unix socket")
+    parser.add_argument("--quiet", action="store_true", help="do not print notifications to stdout")
+    args = parser.parse_args()
+
+    async def run() -> None:
+        sinks: List[DispatchSink] = [] if args.quiet else [PrintSink()]
+        if args.log_file:
+            sinks.append(LogFileSink(args.log_file))
+        if args.socket:
+            sinks.append(UnixSocketSink(args.socket))
+        await ReminderDaemon(sinks, args.db, args.storage_profile, args.lazy_horizon_minutes, firing_log_path=args.firing_log,
+                             metrics_path=args.metrics, metrics_interval_seconds=args.metrics_interval, misfire_policy=args.misfire_policy).run()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -5,33 +5,86 @@ from typing import Tuple
 
 
 FORMAT = "%Y-%m-%d %H:%M"
+EPOCH = datetime(1970, 1, 1)
+ONE_MINUTE = timedelta(minutes=1)
 
 class DateTimeWrapper:
+    """
+    Minute precision point in time stored as minutes since the epoch of the naive local time.
+    The value is treated as immutable, shifted returns a new wrapper instead of changing this one.
+    """
+    __slots__ = ("epoch_minutes",)
+
     def __init__(self, year: int = None, month: int = None, day: int = None, hour: int = None, minute: int = None) -> None:
         if all(val is not None for val in (year, month, day, hour, minute)):
-            self.my_datetime = datetime(year, month, day, hour, minute)
+            my_datetime = datetime(year, month, day, hour, minute)
         else:
-            self.my_datetime = datetime.now()
-        self.datetime_string = self.my_datetime.strftime(FORMAT)
+            my_datetime = datetime.now()
+        self.epoch_minutes: int = (my_datetime - EPOCH) // ONE_MINUTE   # seconds are dropped
+
+    @classmethod
+    def from_datetime(cls, my_datetime: datetime) -> Self:
+        return cls.from_epoch_minutes((my_datetime - EPOCH) // ONE_MINUTE)
+
+    @classmethod
+    def from_epoch_minutes(cls, epoch_minutes: int) -> Self:
+        dt_wrapper = cls.__new__(cls)
+        dt_wrapper.epoch_minutes = epoch_minutes
+        return dt_wrapper
+
+    def to_epoch_minutes(self) -> int:
+        return self.epoch_minutes
+
+    @property
+    def my_datetime(self) -> datetime:
+        return EPOCH + timedelta(minutes=self.epoch_minutes)
+
+    @property
+    def datetime_string(self) -> str:
+        return self.my_datetime.strftime(FORMAT)
     
     def __repr__(self) -> str:
         return self.datetime_string
 
+    def __reduce__(self):
+        return (DateTimeWrapper.from_epoch_minutes, (self.epoch_minutes,))
+
+    def __copy__(self) -> Self:
+        return DateTimeWrapper.from_epoch_minutes(self.epoch_minutes)
+
+    def __deepcopy__(self, memo) -> Self:
+        return DateTimeWrapper.from_epoch_minutes(self.epoch_minutes)
+
+    def __hash__(self) -> int:
+        return hash(self.epoch_minutes)
+
     def __eq__(self, other):
         if isinstance(other, DateTimeWrapper):
-            return self.my_datetime == other.my_datetime
+            return self.epoch_minutes == other.epoch_minutes
         else:
             raise TypeError("Unsupported operand type. Can only compare DateTimeWrapper objects.")
     
     def __lt__(self, other: Self) -> bool:
         if isinstance(other, DateTimeWrapper):
-            return self.my_datetime < other.my_datetime
+            return self.epoch_minutes < other.epoch_minutes
         else:
             raise TypeError("Unsupported operand type. Can only compare DateTimeWrapper objects.")
     
     def __gt__(self, other: Self) -> bool:
         if isinstance(other, DateTimeWrapper):
-            return self.my_datetime > other.my_datetime
+            return self.epoch_minutes > other.epoch_minutes
+        else:
+            raise TypeError("Unsupported operand type. Can only compare DateTimeWrapper objects.")
+
+    def __le__(self, other: Self) -> bool:
+        if isinstance(other, DateTimeWrapper):
+            return self.epoch_minutes <= other.epoch_minutes
+        else:
+            raise TypeError("Unsupported operand type. Can only compare DateTimeWrapper objects.")
+
+    def __ge__(self, other: Self) -> bool:
+        if isinstance(other, DateTimeWrapper):
+            return self.epoch_minutes >= other.epoch_minutes
         else:
             raise TypeError("Unsupported operand type. Can only compare DateTimeWrapper objects.")
     
@@ -51,11 +104,13 @@ class DateTimeWrapper:
             former_start_dt = self.my_datetime.date() - timedelta(days=self.weekday if self.weekday != 7 else 0)
         return (later_start_dt - former_start_dt).days // 7
     
-    def increment(self, months: int = 0, days: int = 0, hours: int = 0, minutes: int = 0) -> None:
-        self.my_datetime += timedelta(days=days, hours=hours, minutes=minutes)
-        self.my_datetime += relativedelta(months=months)
-        self.datetime_string = self.my_datetime.strftime(FORMAT)
-    
+    def shifted(self, months: int = 0, days: int = 0, hours: int = 0, minutes: int = 0) -> Self:
+        epoch_minutes = self.epoch_minutes + (days * 24 + hours) * 60 + minutes
+        if months:  # month lengths vary, clamp the day to the end of the month like relativedelta does
+            my_datetime = EPOCH + timedelta(minutes=epoch_minutes) + relativedelta(months=months)
+            epoch_minutes = (my_datetime - EPOCH) // ONE_MINUTE
+        return DateTimeWrapper.from_epoch_minutes(epoch_minutes)
+
     @property
     def year(self) -> int:
         return self.my_datetime.year
@@ -74,12 +129,12 @@ class DateTimeWrapper:
     
     @property
     def weekday(self) -> int:
-        return self.my_datetime.isoweekday()
+        return (self.epoch_minutes // 1440 + 3) % 7 + 1   # 1970-01-01 was a thursday
     
     @property
     def hour(self) -> int:
-        return self.my_datetime.hour
+        return self.epoch_minutes // 60 % 24
     
     @property
     def minute(self) -> int:
-        return self.my_datetime.minute
+        return self.epoch_minutes % 60
@@ -1,111 +1,445 @@
 from datetime_wrapper import DateTimeWrapper
-from typing import List, Any, Tuple
+from metrics import Counter, Metrics
+from typing import List, Any, Callable, Dict, Iterable, Iterator, Tuple, Union
+from contextlib import contextmanager
 import sqlite3
+import re
 
 
 DB_NAME = "reminder_db"
+SCHEMA_VERSION = 5
+# timed when the DB is given a Metrics, the iter_* generators are left out since their work happens while they are consumed
+TIMED_METHODS = ("add_reminder", "add_reminders", "get_all_reminders", "get_reminder", "get_reminders_due_before", "get_owner_reminders",
+                 "count_owner_reminders", "count_reminders",
+                 "get_reminders_page", "search_reminders", "count_search_results", "remove_reminder", "remove_reminders", "update_reminder",
+                 "update_next_fires")
+# keywords the StorageProfile pragmas accept, the values are put into the PRAGMA statements as they are
+JOURNAL_MODES = ("delete", "truncate", "persist", "memory", "wal", "off")
+SYNCHRONOUS_MODES = ("off", "normal", "full", "extra")
+TEMP_STORES = ("default", "file", "memory")
+INHERIT_MISFIRE_POLICY = "inherit"     # update_reminder clears the misfire policy of the reminder, it follows its manager again
+
+class StorageProfile:
+    """
+    SQLite connection settings applied by DB when it opens its database file.
+    """
+    def __init__(self, journal_mode: str = "wal", synchronous: str = "full", cache_size_kib: int = 2000,
+                 mmap_size: int = 0, temp_store: str = "default", busy_timeout_ms: int = 5000) -> None:
+        self.journal_mode: str = self.__keyword("journal_mode", journal_mode, JOURNAL_MODES)
+        self.synchronous: str = self.__keyword("synchronous", synchronous, SYNCHRONOUS_MODES)
+        self.cache_size_kib: int = int(cache_size_kib)
+        self.mmap_size: int = int(mmap_size)
+        self.temp_store: str = self.__keyword("temp_store", temp_store, TEMP_STORES)
+        self.busy_timeout_ms: int = int(busy_timeout_ms)
+
+    @staticmethod
+    def __keyword(name: str, value: str, allowed: Tuple[str, ...]) -> str:
+        keyword = str(value).lower()
+        if keyword not in allowed:
+            raise ValueError(f"unknown {name} {value!r}, expected one of {', '.join(allowed)}")
+        return keyword
+
+    def __repr__(self) -> str:
+        return (f"StorageProfile(journal_mode={self.journal_mode}, synchronous={self.synchronous}, cache_size_kib={self.cache_size_kib}, "
+                f"mmap_size={self.mmap_size}, temp_store={self.temp_store}, busy_timeout_ms={self.busy_timeout_ms})")
+
+    def apply(self, conn: sqlite3.Connection) -> None:
+        conn.execute(f'PRAGMA busy_timeout = {int(self.busy_timeout_ms)}')
+        conn.execute(f'PRAGMA journal_mode = {self.journal_mode}')
+        conn.execute(f'PRAGMA synchronous = {self.synchronous}')
+        conn.execute(f'PRAGMA cache_size = {-int(self.cache_size_kib)}')   # negative values are KiB instead of pages
+        conn.execute(f'PRAGMA mmap_size = {int(self.mmap_size)}')
+        conn.execute(f'PRAGMA temp_store = {self.temp_store}')
+
+STORAGE_PROFILES = {
+    # sqlite defaults, a rollback journal synced on every commit
+    "compat": StorageProfile(journal_mode="delete", synchronous="full", cache_size_kib=2000),
+    # WAL lets readers and the writer work at the same time, every commit is still synced
+    "durable": StorageProfile(journal_mode="wal", synchronous="full", cache_size_kib=16000),
+    # WAL synced at checkpoints only, a power loss can drop the last commits but never corrupts the file
+    "fast": StorageProfile(journal_mode="wal", synchronous="normal", cache_size_kib=64000, mmap_size=256 * 1024 * 1024, temp_store="memory"),
+}
 
 class DB:
-    def __init__(self) -> None:
-        self.conn = sqlite3.connect(DB_NAME)
-        self.__create_table()
+    def __init__(self, db_name: str = None, profile: Union[str, StorageProfile] = "durable", metrics: Metrics = None) -> None:
+        self.db_name: str = db_name or DB_NAME
+        self.profile: StorageProfile = STORAGE_PROFILES[profile] if isinstance(profile, str) else profile
+        self.conn = sqlite3.connect(self.db_name, timeout=self.profile.busy_timeout_ms / 1000)
+        self.profile.apply(self.conn)
+        self.batch_depth: int = 0
+        self.after_commit_callbacks: Dict[str, Callable[[], None]] = {}   # see after_commit
+        self.commits: Counter = None
+        if metrics is not None:
+            self.commits = metrics.counter("reminder_db_commits_total", "Transactions committed by the reminder DB")
+            metrics.instrument(self, TIMED_METHODS, "reminder_db_call_seconds", "Latency of reminder DB calls")
+        self.__upgrade_schema()
+
+    @contextmanager
+    def batch(self) -> Iterator["DB"]:
+        # group every write made inside the block into one transaction, batches can be nested
+        self.batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self.batch_depth -= 1
+            if self.batch_depth == 0:
+                self.conn.rollback()
+                self.after_commit_callbacks.clear()
+            raise
+        self.batch_depth -= 1
+        self.__commit()
+
+    def in_batch(self) -> bool:
+        return self.batch_depth > 0
+
+    def after_commit(self, key: str, callback: Callable[[], None]) -> None:
+        # run callback once what was written so far is committed, right away outside a batch or when the outermost batch commits.
+        # a callback registered again under the same key replaces the earlier one, a rolled back batch drops them all
+        if self.batch_depth == 0:
+            callback()
+            return
+        self.after_commit_callbacks[key] = callback
+
+    def __commit(self) -> None:
+        if self.batch_depth == 0:
+            self.conn.commit()
+            if self.commits is not None:
+                self.commits.inc()
+            callbacks = list(self.after_commit_callbacks.values())
+            self.after_commit_callbacks.clear()
+            for callback in callbacks:
+                callback()
+
+    def __upgrade_schema(self) -> None:
+        version = self.conn.execute('PRAGMA user_version').fetchone()[0]
+        if version == 0 and self.__table_exists('datetime_wrappers'):   # files written before the schema was versioned
+            version = 1
+        if version == SCHEMA_VERSION:
+            return
+
+        self.conn.execute('BEGIN')
+        if version == 0:
+            self.__create_table()
+            version = 2
+        if version == 1:
+            self.__migrate_from_datetime_wrappers()
+            version = 2
+        if version == 2:
+            self.__create_search_index()
+            version = 3
+        if version == 3:
+            self.__add_owner()
+            version = 4
+        if version == 4:
+            self.__add_misfire_policy()
+        self.conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        self.conn.commit()
+
+    def __table_exists(self, table_name: str) -> bool:
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,))
+        return cursor.fetchone() is not None
 
     def __create_table(self) -> None:
+        # times are stored as minutes since the epoch, see DateTimeWrapper.to_epoch_minutes
         cursor = self.conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS datetime_wrappers (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                year INTEGER,
-                month INTEGER,
-                day INTEGER,
-                hour INTEGER,
-                minute INTEGER
-            )
-        ''')
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS reminders (
                 reminder_id TEXT PRIMARY KEY,
                 title TEXT,
                 message TEXT,
                 recurrence_type TEXT,
-                start_dt_wrapper_id INTEGER,
-                end_dt_wrapper_id INTEGER,
-                next_recur_dt_wrapper_id INTEGER,
+                start_at INTEGER,
+                end_at INTEGER,
+                next_fire INTEGER,
                 interval INTEGER,
-                list TEXT,
-                FOREIGN KEY (start_dt_wrapper_id) REFERENCES datetime_wrappers(id),
-                FOREIGN KEY (end_dt_wrapper_id) REFERENCES datetime_wrappers(id),
-                FOREIGN KEY (next_recur_dt_wrapper_id) REFERENCES datetime_wrappers(id)
+                list TEXT
             )
         ''')
-        self.conn.commit()
+        cursor.execute('CREATE INDEX IF NOT EXISTS reminders_next_fire ON reminders (next_fire)')
 
-    def add_reminder(self, reminder_id, title, message, recurrence_type, start_dt_wrapper, end_dt_wrapper=None, next_recur_dt_wrapper=None, interval=1, list=None):
-        start_dt_wrapper_id = self.__add_datetime_wrapper(start_dt_wrapper.year, start_dt_wrapper.month, start_dt_wrapper.day, start_dt_wrapper.hour, start_dt_wrapper.minute)
-        end_dt_wrapper_id = self.__add_datetime_wrapper(end_dt_wrapper.year, end_dt_wrapper.month, end_dt_wrapper.day, end_dt_wrapper.hour, end_dt_wrapper.minute) if end_dt_wrapper else None
-        next_recur_dt_wrapper_id = self.__add_datetime_wrapper(next_recur_dt_wrapper.year, next_recur_dt_wrapper.month, next_recur_dt_wrapper.day, next_recur_dt_wrapper.hour, next_recur_dt_wrapper.minute) if next_recur_dt_wrapper else start_dt_wrapper_id
+    def __create_search_index(self) -> None:
+        # full-text index of titles and messages whose text stays in reminders, kept in sync by triggers.
+        # its rows are tied to the rowids of reminders, which only a VACUUM could renumber, see rebuild_search_index
         cursor = self.conn.cursor()
         cursor.execute('''
-            INSERT INTO reminders (reminder_id, title, message, recurrence_type, start_dt_wrapper_id, end_dt_wrapper_id, next_recur_dt_wrapper_id, interval, list)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (reminder_id, title, message, recurrence_type, start_dt_wrapper_id, end_dt_wrapper_id, next_recur_dt_wrapper_id, interval, self.__list_of_int_to_str(list)))
-        self.conn.commit()
-    
-    def __add_datetime_wrapper(self, year: int, month: int, day: int, hour: int, minute: int) -> int:
-        cursor = self.conn.cursor()
+            CREATE VIRTUAL TABLE reminders_fts USING fts5(title, message, content='reminders', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2')
+        ''')
         cursor.execute('''
-            INSERT INTO datetime_wrappers (year, month, day, hour, minute)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (year, month, day, hour, minute))
-        self.conn.commit()
-        return cursor.lastrowid  # Return the id of the inserted row
+            CREATE TRIGGER reminders_fts_insert AFTER INSERT ON reminders BEGIN
+                INSERT INTO reminders_fts (rowid, title, message) VALUES (new.rowid, new.title, new.message);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER reminders_fts_delete AFTER DELETE ON reminders BEGIN
+                INSERT INTO reminders_fts (reminders_fts, rowid, title, message) VALUES ('delete', old.rowid, old.title, old.message);
+            END
+        ''')
+        # only edits of the text, not the next_fire updates of every tick
+        cursor.execute('''
+            CREATE TRIGGER reminders_fts_update AFTER UPDATE OF title, message ON reminders BEGIN
+                INSERT INTO reminders_fts (reminders_fts, rowid, title, message) VALUES ('delete', old.rowid, old.title, old.message);
+                INSERT INTO reminders_fts (rowid, title, message) VALUES (new.rowid, new.title, new.message);
+            END
+        ''')
+        cursor.execute("INSERT INTO reminders_fts (reminders_fts) VALUES ('rebuild')")
 
-    def get_all_reminders(self) -> List[Any]:
+    def __add_owner(self) -> None:
+        # the tenant a reminder belongs to, '' for the single user of ReminderManager, see tenants.TenantReminderManager
+        cursor = self.conn.cursor()
+        cursor.execute("ALTER TABLE reminders ADD COLUMN owner TEXT NOT NULL DEFAULT ''")
+        cursor.execute('CREATE INDEX reminders_owner_next_fire ON reminders (owner, next_fire)')
+
+    def __add_misfire_policy(self) -> None:
+        # NULL to follow the misfire policy of the manager, see reminder.MISFIRE_POLICIES
+        self.conn.cursor().execute('ALTER TABLE reminders ADD COLUMN misfire_policy TEXT')
+
+    def rebuild_search_index(self) -> None:
+        self.conn.execute("INSERT INTO reminders_fts (reminders_fts) VALUES ('rebuild')")
+        self.__commit()
+
+    def __migrate_from_datetime_wrappers(self) -> None:
+        # version 1 kept every time in its own datetime_wrappers row referenced from reminders
         cursor = self.conn.cursor()
         cursor.execute('''
-                       SELECT reminders.reminder_id, reminders.title, reminders.message, reminders.recurrence_type, 
+                       SELECT reminders.reminder_id, reminders.title, reminders.message, reminders.recurrence_type,
                               reminders.interval, reminders.list,
-                              start.year AS start_year, start.month AS start_month, start.day AS start_day, 
-                              start.hour AS start_hour, start.minute AS start_minute,
-                              end.year AS end_year, end.month AS end_month, end.day AS end_day, 
-                              end.hour AS end_hour, end.minute AS end_minute,
-                              next.year AS next_year, next.month AS next_month, next.day AS next_day, 
-                              next.hour AS next_hour, next.minute AS next_minute
+                              start.year, start.month, start.day, start.hour, start.minute,
+                              end.year, end.month, end.day, end.hour, end.minute,
+                              next.year, next.month, next.day, next.hour, next.minute
                         FROM reminders
                         LEFT JOIN datetime_wrappers AS start ON reminders.start_dt_wrapper_id = start.id
                         LEFT JOIN datetime_wrappers AS end ON reminders.end_dt_wrapper_id = end.id
                         LEFT JOIN datetime_wrappers AS next ON reminders.next_recur_dt_wrapper_id = next.id
                        ''')
+        rows = []
+        for row in cursor.fetchall():
+            start_at, end_at, next_fire = (self.__to_epoch_minutes(row[i:i + 5]) for i in (6, 11, 16))
+            # version 1 shared the start row with next recurrence, so removing one could leave the other dangling
+            start_at = start_at if start_at is not None else next_fire
+            next_fire = next_fire if next_fire is not None else start_at
+            rows.append((row[0], row[1], row[2], row[3], start_at, end_at, next_fire, row[4], row[5]))
+
+        cursor.execute('ALTER TABLE reminders RENAME TO reminders_v1')
+        self.__create_table()
+        cursor.executemany('''
+            INSERT INTO reminders (reminder_id, title, message, recurrence_type, start_at, end_at, next_fire, interval, list)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        cursor.execute('DROP TABLE reminders_v1')
+        cursor.execute('DROP TABLE datetime_wrappers')
+
+    def __to_epoch_minutes(self, values) -> int:
+        if values[0] is None:
+            return None
+        return DateTimeWrapper(*values).to_epoch_minutes()
+
+    def add_reminder(self, reminder_id, title, message, recurrence_type, start_dt_wrapper, end_dt_wrapper=None, next_recur_dt_wrapper=None, interval=1, list=None, owner='',
+                     misfire_policy=None):
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            INSERT INTO reminders (reminder_id, title, message, recurrence_type, start_at, end_at, next_fire, interval, list, owner, misfire_policy)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (reminder_id, title, message, recurrence_type,
+              start_dt_wrapper.to_epoch_minutes(),
+              end_dt_wrapper.to_epoch_minutes() if end_dt_wrapper else None,
+              (next_recur_dt_wrapper or start_dt_wrapper).to_epoch_minutes(),
+              interval, self.__list_of_int_to_str(list), owner, misfire_policy))
+        self.__commit()
+
+    def add_reminders(self, reminders: Iterable[Tuple], owner: str = '') -> None:
+        # bulk insert of (reminder_id, title, message, recurrence_type, start_dt_wrapper, end_dt_wrapper, next_recur_dt_wrapper, interval, list, misfire_policy)
+        # tuples of one owner.
+        # staged and then copied in one statement, the search index flushes after every statement that fires its trigger
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            CREATE TEMP TABLE IF NOT EXISTS reminders_staging (
+                reminder_id TEXT, title TEXT, message TEXT, recurrence_type TEXT, start_at INTEGER, end_at INTEGER, next_fire INTEGER, interval INTEGER, list TEXT,
+                misfire_policy TEXT
+            )
+        ''')
+        try:
+            cursor.executemany('''
+                INSERT INTO reminders_staging (reminder_id, title, message, recurrence_type, start_at, end_at, next_fire, interval, list, misfire_policy)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', ((reminder_id, title, message, recurrence_type,
+                   start_dt_wrapper.to_epoch_minutes(),
+                   end_dt_wrapper.to_epoch_minutes() if end_dt_wrapper else None,
+                   (next_recur_dt_wrapper or start_dt_wrapper).to_epoch_minutes(),
+                   interval, self.__list_of_int_to_str(list), misfire_policy)
+                  for reminder_id, title, message, recurrence_type, start_dt_wrapper, end_dt_wrapper, next_recur_dt_wrapper, interval, list, misfire_policy in reminders))
+            cursor.execute('''
+                INSERT INTO reminders (reminder_id, title, message, recurrence_type, start_at, end_at, next_fire, interval, list, misfire_policy, owner)
+                SELECT reminder_id, title, message, recurrence_type, start_at, end_at, next_fire, interval, list, misfire_policy, ? FROM reminders_staging
+            ''', (owner,))
+        finally:
+            cursor.execute('DELETE FROM reminders_staging')
+        self.__commit()
+
+    def get_all_reminders(self) -> List[Any]:
+        cursor = self.conn.cursor()
+        cursor.execute('''
+                       SELECT reminder_id, title, message, recurrence_type, interval, list, start_at, end_at, next_fire, misfire_policy
+                        FROM reminders
+                       ''')
+        return cursor.fetchall()
+
+    def get_reminder(self, reminder_id: str) -> Any:
+        cursor = self.conn.cursor()
+        cursor.execute('''
+                       SELECT reminder_id, title, message, recurrence_type, interval, list, start_at, end_at, next_fire, misfire_policy
+                        FROM reminders
+                        WHERE reminder_id = ?
+                       ''', (reminder_id,))
+        return cursor.fetchone()
+
+    def get_reminders_due_before(self, dt_wrapper: DateTimeWrapper) -> List[Any]:
+        # range scan over the next_fire index
+        cursor = self.conn.cursor()
+        cursor.execute('''
+                       SELECT reminder_id, title, message, recurrence_type, interval, list, start_at, end_at, next_fire, misfire_policy
+                        FROM reminders
+                        WHERE next_fire <= ?
+                        ORDER BY next_fire
+                       ''', (dt_wrapper.to_epoch_minutes(),))
+        return cursor.fetchall()
+
+    def iter_reminders_due_before(self, dt_wrapper: DateTimeWrapper, after_dt_wrapper: DateTimeWrapper = None, batch_size: int = 1000) -> Iterator[Any]:
+        # stream the reminders with after_dt_wrapper < next_fire <= dt_wrapper in next_fire order without loading them all at once
+        cursor = self.conn.cursor()
+        if after_dt_wrapper is None:
+            cursor.execute('''
+                           SELECT reminder_id, title, message, recurrence_type, interval, list, start_at, end_at, next_fire, misfire_policy
+                            FROM reminders
+                            WHERE next_fire <= ?
+                            ORDER BY next_fire
+                           ''', (dt_wrapper.to_epoch_minutes(),))
+        else:
+            cursor.execute('''
+                           SELECT reminder_id, title, message, recurrence_type, interval, list, start_at, end_at, next_fire, misfire_policy
+                            FROM reminders
+                            WHERE next_fire > ? AND next_fire <= ?
+                            ORDER BY next_fire
+                           ''', (after_dt_wrapper.to_epoch_minutes(), dt_wrapper.to_epoch_minutes()))
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield from rows
+
+    def iter_all_reminders(self, batch_size: int = 1000) -> Iterator[Any]:
+        cursor = self.conn.cursor()
+        cursor.execute('''
+                       SELECT reminder_id, title, message, recurrence_type, interval, list, start_at, end_at, next_fire, misfire_policy
+                        FROM reminders
+                        ORDER BY next_fire, reminder_id
+                       ''')
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield from rows
+
+    def get_owner_reminders(self, owner: str) -> List[Any]:
+        # the reminders of one owner in next_fire order, a range of the (owner, next_fire) index
+        cursor = self.conn.cursor()
+        cursor.execute('''
+                       SELECT reminder_id, title, message, recurrence_type, interval, list, start_at, end_at, next_fire, misfire_policy
+                        FROM reminders
+                        WHERE owner = ?
+                        ORDER BY next_fire, reminder_id
+                       ''', (owner,))
+        return cursor.fetchall()
+
+    def count_owner_reminders(self, owner: str) -> int:
+        return self.conn.execute('SELECT COUNT(*) FROM reminders WHERE owner = ?', (owner,)).fetchone()[0]
+
+    def iter_owned_reminders_due_before(self, dt_wrapper: DateTimeWrapper, after_dt_wrapper: DateTimeWrapper = None, batch_size: int = 1000) -> Iterator[Any]:
+        # iter_reminders_due_before over every owner, with the owner appended to each row
+        cursor = self.conn.cursor()
+        cursor.execute('''
+                       SELECT reminder_id, title, message, recurrence_type, interval, list, start_at, end_at, next_fire, misfire_policy, owner
+                        FROM reminders
+                        WHERE next_fire > ? AND next_fire <= ?
+                        ORDER BY next_fire
+                       ''', (after_dt_wrapper.to_epoch_minutes() if after_dt_wrapper is not None else -2**63, dt_wrapper.to_epoch_minutes()))
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield from rows
+
+    def count_reminders(self) -> int:
+        return self.conn.execute('SELECT COUNT(*) FROM reminders').fetchone()[0]
+
+    def get_reminders_page(self, offset: int, limit: int) -> List[Any]:
+        # next_fire order with the id as tie breaker, the order ReminderManager keeps its reminders in
+        cursor = self.conn.cursor()
+        cursor.execute('''
+                       SELECT reminder_id, title, message, recurrence_type, interval, list, start_at, end_at, next_fire, misfire_policy
+                        FROM reminders
+                        ORDER BY next_fire, reminder_id
+                        LIMIT ? OFFSET ?
+                       ''', (limit, offset))
+        return cursor.fetchall()
+
+    def search_reminders(self, text: str = None, recurrence_type: str = None, from_dt_wrapper: DateTimeWrapper = None,
+                         until_dt_wrapper: DateTimeWrapper = None, offset: int = 0, limit: int = None) -> List[Any]:
+        # reminders whose title or message has words starting with every word of text, of recurrence_type,
+        # with from <= next_fire <= until, in the order of get_reminders_page. Every filter is optional
+        joins, conditions, values = self.__search_filter(text, recurrence_type, from_dt_wrapper, until_dt_wrapper)
+        cursor = self.conn.cursor()
+        cursor.execute(f'''
+                       SELECT reminders.reminder_id, reminders.title, reminders.message, reminders.recurrence_type, reminders.interval,
+                              reminders.list, reminders.start_at, reminders.end_at, reminders.next_fire, reminders.misfire_policy
+                        FROM {joins}
+                        {conditions}
+                        ORDER BY reminders.next_fire, reminders.reminder_id
+                        LIMIT ? OFFSET ?
+                       ''', (*values, -1 if limit is None else limit, offset))
         return cursor.fetchall()
 
+    def count_search_results(self, text: str = None, recurrence_type: str = None, from_dt_wrapper: DateTimeWrapper = None,
+                             until_dt_wrapper: DateTimeWrapper = None) -> int:
+        joins, conditions, values = self.__search_filter(text, recurrence_type, from_dt_wrapper, until_dt_wrapper)
+        return self.conn.execute(f'SELECT COUNT(*) FROM {joins} {conditions}', values).fetchone()[0]
+
+    def __search_filter(self, text: str, recurrence_type: str, from_dt_wrapper: DateTimeWrapper, until_dt_wrapper: DateTimeWrapper) -> Tuple[str, str, List[Any]]:
+        # the text match drives the query when there is one, so only the matching rows are sorted
+        joins, conditions, values = 'reminders', [], []
+        match = _match_expression(text) if text else None
+        if match:
+            joins = 'reminders_fts JOIN reminders ON reminders.rowid = reminders_fts.rowid'
+            conditions.append('reminders_fts MATCH ?')
+            values.append(match)
+        if recurrence_type:
+            conditions.append('reminders.recurrence_type = ?')
+            values.append(recurrence_type)
+        if from_dt_wrapper:
+            conditions.append('reminders.next_fire >= ?')
+            values.append(from_dt_wrapper.to_epoch_minutes())
+        if until_dt_wrapper:
+            conditions.append('reminders.next_fire <= ?')
+            values.append(until_dt_wrapper.to_epoch_minutes())
+        return joins, 'WHERE ' + ' AND '.join(conditions) if conditions else '', values
+
     def remove_reminder(self, reminder_id) -> None:
-        result_tuple = self.__get_dt_wrapper_id_by_reminder_id(reminder_id)
-        if result_tuple:
-            (start_dt_wrapper_id, end_dt_wrapper_id, next_recur_dt_wrapper_id) = result_tuple
-
-            cursor = self.conn.cursor()
-            cursor.execute('DELETE FROM reminders WHERE reminder_id = ?', (reminder_id,))
-            self.__remove_datetime_wrapper(start_dt_wrapper_id)
-            self.__remove_datetime_wrapper(end_dt_wrapper_id)
-            self.__remove_datetime_wrapper(next_recur_dt_wrapper_id)
-            self.conn.commit()
-    
-    def __remove_datetime_wrapper(self, id) -> None:
         cursor = self.conn.cursor()
-        cursor.execute('DELETE FROM datetime_wrappers WHERE id = ?', (id,))
-        self.conn.commit()
+        cursor.execute('DELETE FROM reminders WHERE reminder_id = ?', (reminder_id,))
+        self.__commit()
 
-    def update_reminder(self, reminder_id: str, title: str = None, message: str = None, recurrence_type: str = None, 
-                        start_dt_wrapper: DateTimeWrapper = None, end_dt_wrapper: DateTimeWrapper = None, next_recur_dt_wrapper: DateTimeWrapper = None, 
-                        interval: int = None, list: List[int] = None) -> None:
+    def remove_reminders(self, reminder_ids: Iterable[str]) -> None:
+        cursor = self.conn.cursor()
+        cursor.executemany('DELETE FROM reminders WHERE reminder_id = ?', ((reminder_id,) for reminder_id in reminder_ids))
+        self.__commit()
+
+    def update_reminder(self, reminder_id: str, title: str = None, message: str = None, recurrence_type: str = None,
+                        start_dt_wrapper: DateTimeWrapper = None, end_dt_wrapper: DateTimeWrapper = None, next_recur_dt_wrapper: DateTimeWrapper = None,
+                        interval: int = None, list: List[int] = None, misfire_policy: str = None) -> None:
         cursor = self.conn.cursor()
         update_query = 'UPDATE reminders SET '
         update_values = []
 
-        result_tuple = self.__get_dt_wrapper_id_by_reminder_id(reminder_id)
-        if result_tuple:
-            (start_dt_wrapper_id, end_dt_wrapper_id, next_recur_dt_wrapper_id) = result_tuple
-
         if title:
             update_query += 'title = ?, '
             update_values.append(title)
@@ -116,26 +450,23 @@ class DB:
             update_query += 'recurrence_type = ?, '
             update_values.append(recurrence_type)
         if start_dt_wrapper:
-            self.__remove_datetime_wrapper(start_dt_wrapper_id)
-            start_dt_wrapper_id = self.__add_datetime_wrapper(start_dt_wrapper.year, start_dt_wrapper.month, start_dt_wrapper.day, start_dt_wrapper.hour, start_dt_wrapper.minute)
-            update_query += 'start_dt_wrapper_id = ?, '
-            update_values.append(start_dt_wrapper_id)
+            update_query += 'start_at = ?, '
+            update_values.append(start_dt_wrapper.to_epoch_minutes())
         if end_dt_wrapper:
-            self.__remove_datetime_wrapper(end_dt_wrapper_id)
-            end_dt_wrapper_id = self.__add_datetime_wrapper(end_dt_wrapper.year, end_dt_wrapper.month, end_dt_wrapper.day, end_dt_wrapper.hour, end_dt_wrapper.minute)
-            update_query += 'end_dt_wrapper_id = ?, '
-            update_values.append(end_dt_wrapper_id)
+            update_query += 'end_at = ?, '
+            update_values.append(end_dt_wrapper.to_epoch_minutes())
         if next_recur_dt_wrapper:
-            self.__remove_datetime_wrapper(next_recur_dt_wrapper_id)
-            next_recur_dt_wrapper_id = self.__add_datetime_wrapper(next_recur_dt_wrapper.year, next_recur_dt_wrapper.month, next_recur_dt_wrapper.day, next_recur_dt_wrapper.hour, next_recur_dt_wrapper.minute)
-            update_query += 'next_recur_dt_wrapper_id = ?, '
-            update_values.append(next_recur_dt_wrapper_id)
+            update_query += 'next_fire = ?, '
+            update_values.append(next_recur_dt_wrapper.to_epoch_minutes())
         if interval:
             update_query += 'interval = ?, '
             update_values.append(interval)
         if list:
             update_query += 'list = ?, '
             update_values.append(self.__list_of_int_to_str(list))
+        if misfire_policy:
+            update_query += 'misfire_policy = ?, '
+            update_values.append(misfire_policy if misfire_policy != INHERIT_MISFIRE_POLICY else None)
 
         # Remove the last comma and space from the query string
         update_query = update_query[:-2]
@@ -145,25 +476,21 @@ class DB:
         update_values.append(reminder_id)
 
         cursor.execute(update_query, update_values)
-        self.conn.commit()
-    
-    def __get_dt_wrapper_id_by_reminder_id(self, reminder_id: str) -> Tuple[int, int, int]:
+        self.__commit()
+
+    def update_next_fires(self, next_fires: Iterable[Tuple[str, DateTimeWrapper]]) -> None:
+        # bulk update of (reminder_id, next_recur_dt_wrapper) pairs
         cursor = self.conn.cursor()
-        cursor.execute('''
-                       SELECT reminders.start_dt_wrapper_id, 
-                              reminders.end_dt_wrapper_id, 
-                              reminders.next_recur_dt_wrapper_id
-                        FROM reminders
-                        WHERE reminders.reminder_id = ?
-                       ''', (reminder_id,))
-        result_list = cursor.fetchall()
-        if result_list:
-            return result_list[0]
-        return None
-    
+        cursor.executemany('UPDATE reminders SET next_fire = ? WHERE reminder_id = ?',
+                           ((next_recur_dt_wrapper.to_epoch_minutes(), reminder_id) for reminder_id, next_recur_dt_wrapper in next_fires))
+        self.__commit()
+
     def __list_of_int_to_str(self, list: List[int]) -> str:
         return ','.join(map(str, list or []))
 
     def close(self):
         self.conn.close()
-    
\ No newline at end of file
+
+def _match_expression(text: str) -> str:
+    # an FTS5 query matching words that start with every word of text, quoted so user input is never parsed as query syntax
+    return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', text))
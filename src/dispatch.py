@@ -0,0 +1,196 @@
+from datetime_wrapper import DateTimeWrapper
+from reminder import Reminder, notification_text
+from metrics import Metrics, COUNT_BUCKETS
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Tuple
+import threading
+import queue
+import time
+import sys
+
+
+DISPATCH_WORKERS: int = 1   # per sink, more than one may deliver the minutes of a sink out of order
+DISPATCH_QUEUE_SIZE: int = 10000   # batches waiting for a worker, per sink
+MAX_BATCH_SIZE: int = 1000
+MAX_ATTEMPTS: int = 3
+BACKOFF_SECONDS: float = 0.5    # before the first retry, doubled for every next one
+CLOSE_TIMEOUT_SECONDS: float = 5    # to deliver what is still queued on close
+STOP = "<stop>"
+
+class DispatchSink(ABC):
+    """
+    Destination of the notification batches of a DispatchPipeline. deliver is called from the worker threads,
+    with every notification of one minute that was queued for the sink, and raises to have the batch retried.
+    """
+    @abstractmethod
+    def deliver(self, notifications: List[Tuple], fire_dt_wrapper: DateTimeWrapper) -> None:
+        # notifications are (reminder_id, title, message, next_recur_dt_wrapper, occurrence_dt_wrapper) as of the fire,
+        # occurrence_dt_wrapper is the recurrence that fired, a caught up reminder is in a batch once for every missed one
+        pass
+
+
+class PrintSink(DispatchSink):
+    def deliver(self, notifications: List[Tuple], fire_dt_wrapper: DateTimeWrapper) -> None:
+        print("".join(notification_text(title, message, next_recur_dt_wrapper, occurrence_dt_wrapper)
+                      for _, title, message, next_recur_dt_wrapper, occurrence_dt_wrapper in notifications), flush=True)
+
+
+class CallbackSink(DispatchSink):
+    def __init__(self, callback: Callable[[List[Tuple], DateTimeWrapper], None]) -> None:
+        self.callback: Callable[[List[Tuple], DateTimeWrapper], None] = callback
+
+    def deliver(self, notifications: List[Tuple], fire_dt_wrapper: DateTimeWrapper) -> None:
+        self.callback(notifications, fire_dt_wrapper)
+
+
+class NotificationBatch:
+    def __init__(self, sink_name: str, sink: DispatchSink, fire_dt_wrapper: DateTimeWrapper) -> None:
+        self.sink_name: str = sink_name
+        self.sink: DispatchSink = sink
+        self.fire_dt_wrapper: DateTimeWrapper = fire_dt_wrapper
+        self.notifications: List[Tuple] = []
+        self.queued_at: float = time.perf_counter()
+        self.attempts: int = 0
+
+
+class DispatchPipeline:
+    """
+    Delivers fired reminders to its sinks from worker threads, so the scheduler thread only queues them.
+    Every sink has its own bounded queue and workers, a slow or failing sink never holds back the others.
+    Reminders fired for the same minute are coalesced into one batch per sink while the batch waits in its queue.
+    When a queue is full the reminders are dropped and counted instead of blocking the scheduler, failed deliveries
+    are retried with exponential backoff. Queue depth, drops, retries and delivery lag are recorded into metrics when given.
+    """
+    def __init__(self, sinks: Dict[str, DispatchSink], workers: int = DISPATCH_WORKERS, queue_size: int = DISPATCH_QUEUE_SIZE,
+                 max_batch_size: int = MAX_BATCH_SIZE, max_attempts: int = MAX_ATTEMPTS, backoff_seconds: float = BACKOFF_SECONDS,
+                 metrics: Metrics = None, close_timeout_seconds: float = CLOSE_TIMEOUT_SECONDS) -> None:
+        self.sinks: Dict[str, DispatchSink] = sinks
+        self.workers_per_sink: int = workers
+        self.max_batch_size: int = max_batch_size
+        self.max_attempts: int = max_attempts
+        self.backoff_seconds: float = backoff_seconds
+        self.metrics: Metrics = metrics
+        self.close_timeout_seconds: float = close_timeout_seconds
+        self.batches: Dict[str, queue.Queue] = {sink_name: queue.Queue(queue_size) for sink_name in sinks}
+        self.open_batches: Dict[Tuple[str, int], NotificationBatch] = {}  # (sink name, fire minute) -> queued batch still taking notifications
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()   # cuts retry backoffs short on close
+        self.delivered: int = 0
+        self.dropped: int = 0
+        self.failed: int = 0
+        self.coalesced: int = 0
+        self.workers: List[threading.Thread] = [threading.Thread(target=self.__run, args=(sink_name,), name=f"reminder-dispatch-{sink_name}-{i}", daemon=True)
+                                                for sink_name in sinks for i in range(workers)]
+        for worker in self.workers:
+            worker.start()
+
+    def dispatch(self, occurrences: List[Tuple[Reminder, DateTimeWrapper]], fire_dt_wrapper: DateTimeWrapper) -> None:
+        # never blocks, occurrences are the (reminder, recurrence time) of ReminderManager.fire_due_occurrences,
+        # the ones that find the queue full are dropped
+        if not occurrences:
+            return
+        notifications = [(reminder.reminder_id, reminder.title, reminder.message, reminder.next_recur_dt_wrapper, occurrence_dt_wrapper)
+                         for reminder, occurrence_dt_wrapper in occurrences]
+        with self.lock:
+            for sink_name, sink in self.sinks.items():
+                self.__add(sink_name, sink, fire_dt_wrapper, notifications)
+                self.__record_queue_depth(sink_name)
+
+    def __add(self, sink_name: str, sink: DispatchSink, fire_dt_wrapper: DateTimeWrapper, notifications: List[Tuple]) -> None:
+        key = (sink_name, fire_dt_wrapper.epoch_minutes)
+        batch = self.open_batches.get(key)
+        coalesced = 0
+        if batch is not None:   # coalesce into the batch of the same minute that no worker took yet
+            coalesced = min(len(notifications), self.max_batch_size - len(batch.notifications))
+            batch.notifications.extend(notifications[:coalesced])
+            self.coalesced += coalesced
+            if self.metrics is not None:
+                self.metrics.counter("dispatch_coalesced_total", "Notifications added to an already queued batch of their minute", sink=sink_name).inc(coalesced)
+        for i in range(coalesced, len(notifications), self.max_batch_size):
+            batch = NotificationBatch(sink_name, sink, fire_dt_wrapper)
+            batch.notifications = notifications[i:i + self.max_batch_size]
+            try:
+                self.batches[sink_name].put_nowait(batch)
+            except queue.Full:
+                self.__record_drop(sink_name, len(notifications) - i)
+                return
+            self.open_batches[key] = batch
+
+    def close(self, timeout: float = None) -> None:
+        # delivers what is queued within timeout, close_timeout_seconds when None, retrying failures without waiting,
+        # then stops the workers. what is still queued after that is counted as dropped
+        deadline = time.monotonic() + (self.close_timeout_seconds if timeout is None else timeout)
+        self.stopping.set()
+        for batches in self.batches.values():
+            for _ in range(self.workers_per_sink):
+                try:
+                    batches.put(STOP, timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Full:  # the workers of this sink are stuck
+                    break
+        for worker in self.workers:
+            worker.join(max(0.0, deadline - time.monotonic()))
+        with self.lock:
+            for sink_name, batches in self.batches.items():
+                while True:
+                    try:
+                        batch = batches.get_nowait()
+                    except queue.Empty:
+                        break
+                    if batch is not STOP:
+                        self.__record_drop(sink_name, len(batch.notifications))
+
+    def __run(self, sink_name: str) -> None:
+        batches = self.batches[sink_name]
+        while True:
+            batch = batches.get()
+            if batch is STOP:
+                return
+            with self.lock:
+                key = (batch.sink_name, batch.fire_dt_wrapper.epoch_minutes)
+                if self.open_batches.get(key) is batch:
+                    del self.open_batches[key]
+                self.__record_queue_depth(sink_name)
+            self.__deliver(batch)
+
+    def __deliver(self, batch: NotificationBatch) -> None:
+        while True:
+            batch.attempts += 1
+            start = time.perf_counter()
+            try:
+                batch.sink.deliver(batch.notifications, batch.fire_dt_wrapper)
+            except Exception as e:
+                if batch.attempts < self.max_attempts:
+                    self.__record("dispatch_retries_total", "Failed deliveries that were retried", batch.sink_name)
+                    self.stopping.wait(self.backoff_seconds * 2 ** (batch.attempts - 1))
+                    continue
+                with self.lock:
+                    self.failed += len(batch.notifications)
+                print(f"{batch.sink_name} failed {len(batch.notifications)} notifications after {batch.attempts} attempts: {e}", file=sys.stderr)
+                self.__record("dispatch_failed_total", "Notifications given up on after every attempt failed", batch.sink_name, len(batch.notifications))
+                return
+            end = time.perf_counter()
+            with self.lock:
+                self.delivered += len(batch.notifications)
+                if self.metrics is not None:
+                    self.metrics.counter("dispatch_delivered_total", "Notifications delivered", sink=batch.sink_name).inc(len(batch.notifications))
+                    self.metrics.histogram("dispatch_batch_size", "Notifications per delivery", COUNT_BUCKETS, sink=batch.sink_name).observe(len(batch.notifications))
+                    self.metrics.histogram("dispatch_delivery_seconds", "Duration of one delivery", sink=batch.sink_name).observe(end - start)
+                    # grows when the sinks fall behind the scheduler
+                    self.metrics.histogram("dispatch_lag_seconds", "Time from queueing a batch to its delivery", sink=batch.sink_name).observe(end - batch.queued_at)
+            return
+
+    def __record(self, name: str, help: str, sink_name: str, amount: int = 1) -> None:
+        if self.metrics is not None:
+            with self.lock:
+                self.metrics.counter(name, help, sink=sink_name).inc(amount)
+
+    def __record_drop(self, sink_name: str, count: int) -> None:
+        # called with the lock held
+        self.dropped += count
+        if self.metrics is not None:
+            self.metrics.counter("dispatch_dropped_total", "Notifications dropped because the dispatch queue was full", sink=sink_name).inc(count)
+
+    def __record_queue_depth(self, sink_name: str) -> None:
+        # called with the lock held
+        if self.metrics is not None:
+            self.metrics.gauge("dispatch_queue_depth", "Batches waiting for a dispatch worker", sink=sink_name).set(self.batches[sink_name].qsize())
@@ -0,0 +1,112 @@
+from datetime_wrapper import DateTimeWrapper
+from db import DB
+from typing import Dict, Iterable, Iterator, List, Tuple
+import json
+import time
+import os
+
+
+GROUP_SIZE: int = 1000     # fsync at least every this many appended entries
+GROUP_SECONDS: float = 1.0  # or once the oldest unsynced entry is this old
+COMPACT_ENTRIES: int = 100000
+
+class FiringLog:
+    """
+    Append-only JSON Lines log of (reminder_id, next_fire) entries, written instead of updating the reminders table on every tick.
+    Entries are fsynced in groups and compacted into the db from time to time. A crash loses at most the last unsynced group,
+    which only makes those reminders fire once more.
+    """
+    def __init__(self, path: str, group_size: int = GROUP_SIZE, group_seconds: float = GROUP_SECONDS, compact_entries: int = COMPACT_ENTRIES) -> None:
+        self.path: str = path
+        self.group_size: int = group_size
+        self.group_seconds: float = group_seconds
+        self.compact_entries: int = compact_entries
+        self.file = open(path, "a", encoding="utf-8")
+        if self.file.tell() and not self.__ends_with_newline():     # end a line torn by a crash so the next entry starts clean
+            self.file.write("\n")
+            self.file.flush()
+        self.entries: int = 0     # not compacted yet
+        # the latest logged next fire of every reminder, ahead of its row in the db until the next compaction
+        self.pending: Dict[str, int] = {}
+        for reminder_id, next_fire in self.replay():
+            if next_fire is None:   # discarded
+                self.pending.pop(reminder_id, None)
+            else:
+                self.pending[reminder_id] = next_fire
+            self.entries += 1
+        self.unsynced: int = 0
+        self.unsynced_since: float = None
+        self.syncs: int = 0
+
+    def __len__(self) -> int:
+        return self.entries
+
+    def append(self, next_fires: Iterable[Tuple[str, DateTimeWrapper]]) -> None:
+        lines = []
+        for reminder_id, next_recur_dt_wrapper in next_fires:
+            self.pending[reminder_id] = next_recur_dt_wrapper.epoch_minutes
+            lines.append(json.dumps([reminder_id, next_recur_dt_wrapper.epoch_minutes]) + "\n")
+        self.__write(lines)
+
+    def discard(self, reminder_id: str) -> None:
+        # the row of reminder_id in the db is up to date, e.g. after an update, what was logged for it must not be replayed over it
+        if self.pending.pop(reminder_id, None) is not None:
+            self.__write([json.dumps([reminder_id, None]) + "\n"])
+
+    def __write(self, lines: List[str]) -> None:
+        if not lines:
+            return
+        self.file.write("".join(lines))
+        self.file.flush()   # in the page cache, a process crash no longer loses it
+        self.entries += len(lines)
+        self.unsynced += len(lines)
+        if self.unsynced_since is None:
+            self.unsynced_since = time.monotonic()
+        if self.unsynced >= self.group_size or time.monotonic() - self.unsynced_since >= self.group_seconds:
+            self.sync()
+
+    def sync(self) -> None:
+        if self.unsynced:
+            os.fsync(self.file.fileno())
+            self.syncs += 1
+        self.unsynced = 0
+        self.unsynced_since = None
+
+    def needs_compaction(self) -> bool:
+        return self.entries >= self.compact_entries
+
+    def replay(self) -> Iterator[Tuple[str, int]]:
+        # a line torn by a crash can only be the last one, it is skipped
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    reminder_id, next_fire = json.loads(line)
+                except ValueError:
+                    continue
+                yield reminder_id, next_fire
+
+    def compact(self, db: DB) -> int:
+        # the latest next fire of every logged reminder goes to the db, the log is only emptied once that committed.
+        # inside a batch of the db the compaction waits until the batch committed, so the batch stays all or nothing
+        if not self.entries:
+            return 0
+        if db.in_batch():
+            db.after_commit("firing_log", lambda: self.compact(db))
+            return 0
+        self.sync()
+        db.update_next_fires((reminder_id, DateTimeWrapper.from_epoch_minutes(next_fire)) for reminder_id, next_fire in self.pending.items())
+        self.file.truncate(0)
+        os.fsync(self.file.fileno())
+        compacted = len(self.pending)
+        self.entries = 0
+        self.pending.clear()
+        return compacted
+
+    def __ends_with_newline(self) -> bool:
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def close(self) -> None:
+        self.sync()
+        self.file.close()
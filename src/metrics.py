@@ -0,0 +1,151 @@
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+import threading
+import bisect
+import json
+import math
+import time
+import os
+
+
+SECONDS_BUCKETS: Tuple[float, ...] = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+COUNT_BUCKETS: Tuple[float, ...] = (0, 1, 10, 100, 1000, 10000, 100000)
+MINUTES_BUCKETS: Tuple[float, ...] = (1, 5, 60, 24 * 60, 7 * 24 * 60, 30 * 24 * 60, 365 * 24 * 60)
+
+class Counter:
+    def __init__(self) -> None:
+        self.value: float = 0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+
+class Gauge:
+    def __init__(self) -> None:
+        self.value: float = 0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = SECONDS_BUCKETS) -> None:
+        self.buckets: Tuple[float, ...] = buckets
+        self.counts: List[int] = [0] * (len(buckets) + 1)   # the last one counts what is above every bucket
+        self.sum: float = 0
+        self.count: int = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self) -> List[int]:
+        # observations at or below each bucket, then at or below +Inf
+        counts, total = [], 0
+        for count in self.counts:
+            total += count
+            counts.append(total)
+        return counts
+
+
+class Metrics:
+    """
+    Registry of counters, gauges and histograms, exported as Prometheus text or a JSON snapshot.
+    ReminderManager and DB only record into one when given it, without one they skip instrumentation entirely.
+    Metrics are registered and snapshotted under a lock, the dispatch workers register theirs while the daemon writes snapshots.
+    """
+    def __init__(self) -> None:
+        self.families: Dict[str, Tuple[str, str]] = {}  # name -> (type, help)
+        self.samples: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Any] = {}   # (name, sorted labels) -> metric
+        self.lock: threading.Lock = threading.Lock()
+
+    def counter(self, name: str, help: str, **labels: str) -> Counter:
+        return self.__get(name, "counter", help, labels, Counter)
+
+    def gauge(self, name: str, help: str, **labels: str) -> Gauge:
+        return self.__get(name, "gauge", help, labels, Gauge)
+
+    def histogram(self, name: str, help: str, buckets: Tuple[float, ...] = SECONDS_BUCKETS, **labels: str) -> Histogram:
+        return self.__get(name, "histogram", help, labels, lambda: Histogram(buckets))
+
+    def __get(self, name: str, kind: str, help: str, labels: Dict[str, str], make: Callable[[], Any]) -> Any:
+        key = (name, tuple(sorted(labels.items())))
+        metric = self.samples.get(key)
+        if metric is None:
+            with self.lock:
+                metric = self.samples.get(key)    # unless another thread registered it meanwhile
+                if metric is None:
+                    family = self.families.setdefault(name, (kind, help))
+                    if family[0] != kind:
+                        raise ValueError(f"{name} is already registered as a {family[0]}")
+                    metric = self.samples[key] = make()
+        return metric
+
+    def instrument(self, obj: Any, method_names: Iterable[str], name: str, help: str) -> None:
+        # time every call of the given methods of obj into the histogram name{method=...}, by shadowing them on the instance
+        for method_name in method_names:
+            method = getattr(obj, method_name)
+            setattr(obj, method_name, self.__timed(method, self.histogram(name, help, method=method_name)))
+
+    def __timed(self, method: Callable, histogram: Histogram) -> Callable:
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+        return timed
+
+    def snapshot(self) -> Dict[str, Dict]:
+        snapshot: Dict[str, Dict] = {}
+        with self.lock:
+            samples = sorted(self.samples.items(), key=lambda item: item[0])
+            families = dict(self.families)
+        for (name, labels), metric in samples:
+            kind, help = families[name]
+            family = snapshot.setdefault(name, {"type": kind, "help": help, "samples": []})
+            sample: Dict[str, Any] = {"labels": dict(labels)}
+            if kind == "histogram":
+                sample["buckets"] = {_format_number(bound): count for bound, count in zip((*metric.buckets, math.inf), metric.cumulative_counts())}
+                sample["sum"] = metric.sum
+                sample["count"] = metric.count
+            else:
+                sample["value"] = metric.value
+            family["samples"].append(sample)
+        return snapshot
+
+    def to_prometheus(self) -> str:
+        lines: List[str] = []
+        for name, family in self.snapshot().items():
+            lines.append(f"# HELP {name} {family['help']}")
+            lines.append(f"# TYPE {name} {family['type']}")
+            for sample in family["samples"]:
+                labels = sample["labels"]
+                if family["type"] == "histogram":
+                    for bound, count in sample["buckets"].items():
+                        lines.append(f"{name}_bucket{_format_labels({**labels, 'le': bound})} {count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {_format_number(sample['sum'])}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {sample['count']}")
+                else:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_number(sample['value'])}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        # a JSON snapshot for .json paths, Prometheus text otherwise, e.g. for the node exporter textfile collector.
+        # written next to path and renamed over it, so a scrape never reads half a file
+        text = json.dumps(self.snapshot(), indent=2) if path.endswith(".json") else self.to_prometheus()
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(temp_path, path)
+
+def _format_number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for value in labels.values())
+    return "{" + ",".join(f'{label}="{value}"' for label, value in zip(labels, escaped)) + "}"
@@ -0,0 +1,54 @@
+from datetime_wrapper import DateTimeWrapper
+from recurrence import Recurrence
+from collections import OrderedDict
+from typing import Dict, Set, Tuple
+
+
+OCCURRENCE_CACHE_SIZE = 4096
+
+class OccurrenceCache:
+    """
+    Least recently used cache of the occurrences of one reminder in one window, as epoch minutes.
+    An entry is recomputed once the reminder fired, and dropped with invalidate when the reminder is edited.
+    """
+    def __init__(self, maxsize: int = OCCURRENCE_CACHE_SIZE) -> None:
+        self.maxsize: int = maxsize
+        self.entries: OrderedDict = OrderedDict()     # (reminder_id, start, end) -> (next recurrence, occurrences)
+        self.windows: Dict[str, Set[Tuple[str, int, int]]] = {}
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def occurrences(self, reminder_id: str, recurrence: Recurrence, start_dt_wrapper: DateTimeWrapper, end_dt_wrapper: DateTimeWrapper) -> Tuple[int, ...]:
+        key = (reminder_id, start_dt_wrapper.epoch_minutes, end_dt_wrapper.epoch_minutes)
+        next_minutes = -1 if recurrence.is_finished() else recurrence.next_recur_dt_wrapper.epoch_minutes
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == next_minutes:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry[1]
+        self.misses += 1
+        occurrences = tuple(dt_wrapper.epoch_minutes for dt_wrapper in recurrence.occurrences(start_dt_wrapper, end_dt_wrapper))
+        self.entries[key] = (next_minutes, occurrences)
+        self.entries.move_to_end(key)
+        self.windows.setdefault(reminder_id, set()).add(key)
+        if len(self.entries) > self.maxsize:
+            self.__forget(next(iter(self.entries)))
+        return occurrences
+
+    def invalidate(self, reminder_id: str) -> None:
+        for key in self.windows.pop(reminder_id, ()):
+            del self.entries[key]
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.windows.clear()
+
+    def __forget(self, key: Tuple[str, int, int]) -> None:
+        del self.entries[key]
+        windows = self.windows[key[0]]
+        windows.discard(key)
+        if not windows:
+            del self.windows[key[0]]
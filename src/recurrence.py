@@ -1,17 +1,42 @@
-from typing import List
+from typing import Iterator, List, Tuple
 from datetime_wrapper import DateTimeWrapper
+from datetime import date, timedelta
 from abc import ABC, abstractmethod
+import functools
 import calendar
-import bisect
 import copy
+import bisect
+
+
+MONTH_CACHE_SIZE = 1024     # months of every Month recurrence, about 85 years
+EPOCH_DATE = date(1970, 1, 1)
+
+@functools.lru_cache(maxsize=MONTH_CACHE_SIZE)
+def _month_info(month_index: int) -> Tuple[int, int]:
+    # (days since the epoch of the first day, number of days) of the month year * 12 + month - 1
+    year, month = divmod(month_index, 12)
+    return (date(year, month + 1, 1) - EPOCH_DATE).days, calendar.monthrange(year, month + 1)[1]
+
+def _civil_from_days(epoch_days: int) -> Tuple[int, int, int]:
+    # (year, month, day) of a day counted from the epoch, integer arithmetic only (Howard Hinnant's days_from_civil inverse)
+    z = epoch_days + 719468
+    era = z // 146097
+    day_of_era = z - era * 146097
+    year_of_era = (day_of_era - day_of_era // 1460 + day_of_era // 36524 - day_of_era // 146096) // 365
+    day_of_year = day_of_era - (365 * year_of_era + year_of_era // 4 - year_of_era // 100)
+    shifted_month = (5 * day_of_year + 2) // 153     # march is 0
+    day = day_of_year - (153 * shifted_month + 2) // 5 + 1
+    month = shifted_month + 3 if shifted_month < 10 else shifted_month - 9
+    return year_of_era + era * 400 + (month <= 2), month, day
 
 
 class Recurrence(ABC):
     def __init__(self, start_dt_wrapper: DateTimeWrapper, end_dt_wrapper: DateTimeWrapper, interval: int) -> None:
-        self.start_dt_wrapper: DateTimeWrapper = copy.deepcopy(start_dt_wrapper)
-        self.end_dt_wrapper: DateTimeWrapper = copy.deepcopy(end_dt_wrapper)
+        # wrappers are never changed in place, so they are shared instead of copied
+        self.start_dt_wrapper: DateTimeWrapper = start_dt_wrapper
+        self.end_dt_wrapper: DateTimeWrapper = end_dt_wrapper
         self.interval: int = interval
-        self.next_recur_dt_wrapper: DateTimeWrapper = copy.deepcopy(start_dt_wrapper)
+        self.next_recur_dt_wrapper: DateTimeWrapper = start_dt_wrapper
         self.finished: bool = False
     
     @abstractmethod
@@ -26,8 +51,8 @@ class Recurrence(ABC):
         if self.finished:   # when recurrence task is already done
             return False
         outdated_recurrence = False
-        while self.next_recur_dt_wrapper < current_dt_wrapper:  # stored next recurrence time is outdated, update first
-            self._set_next_recurrence_dt_wrapper()
+        if self.next_recur_dt_wrapper < current_dt_wrapper:  # stored next recurrence time is outdated, jump to the first recurrence at or after the current time
+            self.next_recur_dt_wrapper = self._first_recurrence_at_or_after(current_dt_wrapper)
             outdated_recurrence = True
         if not outdated_recurrence and current_dt_wrapper < self.next_recur_dt_wrapper:    # have not reach the time yet
             return False
@@ -37,6 +62,35 @@ class Recurrence(ABC):
             self.finished = True
         return True
 
+    @abstractmethod
+    def _first_recurrence_at_or_after(self, dt_wrapper: DateTimeWrapper) -> DateTimeWrapper:
+        # the recurrence _set_next_recurrence_dt_wrapper would reach from next_recur_dt_wrapper when stepping until dt_wrapper, without stepping
+        pass
+
+    def _first_fixed_step_at_or_after(self, dt_wrapper: DateTimeWrapper, step_minutes: int) -> DateTimeWrapper:
+        next_minutes = self.next_recur_dt_wrapper.epoch_minutes
+        if next_minutes >= dt_wrapper.epoch_minutes:
+            return self.next_recur_dt_wrapper
+        steps = -((next_minutes - dt_wrapper.epoch_minutes) // step_minutes)    # ceiling division
+        return DateTimeWrapper.from_epoch_minutes(next_minutes + steps * step_minutes)
+
+    def occurrences(self, start_dt_wrapper: DateTimeWrapper, end_dt_wrapper: DateTimeWrapper) -> Iterator[DateTimeWrapper]:
+        # the recurrence times from next_recur_dt_wrapper on with start <= time <= end, without changing this recurrence.
+        # the first recurrence always fires, the later ones only until end_dt_wrapper, as in _check_recurrence_and_update
+        if self.finished:
+            return
+        stepper = copy.copy(self)   # stepping only reassigns next_recur_dt_wrapper, so a shallow copy is enough
+        dt_wrapper = self._first_recurrence_at_or_after(start_dt_wrapper)
+        first = not self.next_recur_dt_wrapper < start_dt_wrapper
+        while not dt_wrapper > end_dt_wrapper:
+            if not first and self.end_dt_wrapper and dt_wrapper > self.end_dt_wrapper:
+                return
+            yield dt_wrapper
+            stepper.next_recur_dt_wrapper = dt_wrapper
+            stepper._set_next_recurrence_dt_wrapper()
+            dt_wrapper = stepper.next_recur_dt_wrapper
+            first = False
+
     def is_finished(self):
         return self.finished
     
@@ -68,6 +122,14 @@ class Once(Recurrence):
         self.finished = True
         return True
 
+    def _first_recurrence_at_or_after(self, dt_wrapper: DateTimeWrapper) -> DateTimeWrapper:
+        # there is no recurrence after the only one
+        return self.next_recur_dt_wrapper
+
+    def occurrences(self, start_dt_wrapper: DateTimeWrapper, end_dt_wrapper: DateTimeWrapper) -> Iterator[DateTimeWrapper]:
+        if not self.finished and not start_dt_wrapper > self.next_recur_dt_wrapper and not self.next_recur_dt_wrapper > end_dt_wrapper:
+            yield self.next_recur_dt_wrapper
+
 class Hour(Recurrence):
     """
     Recurrence class representing recurrence every certain number of hours.
@@ -82,7 +144,10 @@ class Hour(Recurrence):
         return super()._check_recurrence_and_update(current_dt_wrapper)
     
     def _set_next_recurrence_dt_wrapper(self):
-        self.next_recur_dt_wrapper.increment(hours=self.interval)
+        self.next_recur_dt_wrapper = self.next_recur_dt_wrapper.shifted(hours=self.interval)
+
+    def _first_recurrence_at_or_after(self, dt_wrapper: DateTimeWrapper) -> DateTimeWrapper:
+        return self._first_fixed_step_at_or_after(dt_wrapper, self.interval * 60)
 
 class Day(Recurrence):
     """
@@ -98,7 +163,10 @@ class Day(Recurrence):
         return super()._check_recurrence_and_update(current_dt_wrapper)
     
     def _set_next_recurrence_dt_wrapper(self):
-        self.next_recur_dt_wrapper.increment(days=self.interval)
+        self.next_recur_dt_wrapper = self.next_recur_dt_wrapper.shifted(days=self.interval)
+
+    def _first_recurrence_at_or_after(self, dt_wrapper: DateTimeWrapper) -> DateTimeWrapper:
+        return self._first_fixed_step_at_or_after(dt_wrapper, self.interval * 24 * 60)
 
 class Week(Recurrence):
     """
@@ -108,6 +176,7 @@ class Week(Recurrence):
     def __init__(self, start_dt_wrapper: DateTimeWrapper, end_dt_wrapper: DateTimeWrapper = None, interval: int = 1, weekdays: List[int] = None) -> None:
         super().__init__(start_dt_wrapper, end_dt_wrapper, interval)
         self.weekdays = sorted(weekdays) if weekdays else [start_dt_wrapper.weekday]
+        self.delta_minutes: List[int] = [0] + [self.__delta_days(weekday) * 24 * 60 for weekday in range(1, 8)]  # by weekday
 
     def __repr__(self) -> str:
         return f"Week(Recur every {self.interval} week on {self.weekdays} weekdays starting on {self.start_dt_wrapper} ending on {self.end_dt_wrapper})"
@@ -116,31 +185,34 @@ class Week(Recurrence):
         return super()._check_recurrence_and_update(current_dt_wrapper)
     
     def _set_next_recurrence_dt_wrapper(self):
-        weekday = self.next_recur_dt_wrapper.weekday
-        same_week = True    # whether the next recurrence time is in the same week
-
-        # check whether the next recurrence time is in the same week
-        # find the next_weekday if yes
-        # set same_week to False if no
-        if weekday not in self.weekdays:  # next_recur_dt_wrapper is not in the list of weekdays, happens when weekday of start_dt_wrapper is not in the list
-            next_idx = bisect.bisect_left(self.weekdays, weekday)
-            if next_idx == len(self.weekdays):
-                same_week = False
-            else:
-                next_weekday = self.weekdays[next_idx]
-        else:
-            idx = self.weekdays.index(weekday)
-            if idx == len(self.weekdays) - 1:   # reach the end the week
-                same_week = False
-            else:
-                next_weekday = self.weekdays[idx + 1]
-
-        # update the next recurrence time
-        if not same_week:    # not in the same week
-            delta_days = ((self.interval - 1) * 7) + (7 - weekday + self.weekdays[0])
-        else:   # in the same week
-            delta_days = (next_weekday - weekday + 7) % 7
-        self.next_recur_dt_wrapper.increment(days=delta_days)
+        epoch_minutes = self.next_recur_dt_wrapper.epoch_minutes
+        self.next_recur_dt_wrapper = DateTimeWrapper.from_epoch_minutes(epoch_minutes + self.delta_minutes[self.next_recur_dt_wrapper.weekday])
+
+    def __delta_days(self, weekday: int) -> int:
+        # days to the next listed weekday after weekday, in the same week or the first one of the interval-th week after
+        next_idx = bisect.bisect_right(self.weekdays, weekday)
+        if next_idx < len(self.weekdays):
+            return self.weekdays[next_idx] - weekday
+        return ((self.interval - 1) * 7) + (7 - weekday + self.weekdays[0])
+
+    def _first_recurrence_at_or_after(self, dt_wrapper: DateTimeWrapper) -> DateTimeWrapper:
+        next_datetime = self.next_recur_dt_wrapper.my_datetime
+        target_datetime = dt_wrapper.my_datetime
+        if next_datetime >= target_datetime:
+            return self.next_recur_dt_wrapper
+
+        # recurrences fall on the listed weekdays of every interval-th week counted from the week of next_recur_dt_wrapper,
+        # weeks start on monday when stepping since the weekdays are sorted with sunday (7) last
+        period = timedelta(weeks=self.interval)
+        first_week_start = next_datetime - timedelta(days=next_datetime.isoweekday() - 1)
+        week_start = first_week_start + (target_datetime - first_week_start) // period * period
+        days_into_week = (target_datetime - week_start).days
+        if days_into_week < 7:  # target is in a week with recurrences
+            for weekday in self.weekdays[bisect.bisect_left(self.weekdays, days_into_week + 1):]:
+                candidate_datetime = week_start + timedelta(days=weekday - 1)
+                if candidate_datetime >= target_datetime:
+                    return DateTimeWrapper.from_datetime(candidate_datetime)
+        return DateTimeWrapper.from_datetime(week_start + period + timedelta(days=self.weekdays[0] - 1))
 
 class Month(Recurrence):
     """
@@ -149,6 +221,7 @@ class Month(Recurrence):
     def __init__(self, start_dt_wrapper: DateTimeWrapper, end_dt_wrapper: DateTimeWrapper = None, interval: int = 1, days: List[int] = None) -> None:
         super().__init__(start_dt_wrapper, end_dt_wrapper, interval)
         self.days = sorted(days) if days else [start_dt_wrapper.day]
+        self.next_days: List[int] = [next((listed for listed in self.days if listed > day), 0) for day in range(32)]    # by day, 0 for none
 
     def __repr__(self) -> str:
         return f"Month(Recur every {self.interval} month on {self.days} days starting on {self.start_dt_wrapper} ending on {self.end_dt_wrapper})"
@@ -157,33 +230,45 @@ class Month(Recurrence):
         return super()._check_recurrence_and_update(current_dt_wrapper)
     
     def _set_next_recurrence_dt_wrapper(self):
-        day = self.next_recur_dt_wrapper.day
-        same_month = True    # whether the next recurrence time is in the same month
-
-        # check whether the next recurrence time is in the same month
-        # find the next_day if yes
-        # set same_month to False if no
-        if day not in self.days:  # next_recur_dt_wrapper is not in the list of days, happens when day of start_dt_wrapper is not in the list
-            next_idx = bisect.bisect_left(self.days, day)
-            if next_idx == len(self.days):
-                same_month = False
-            else:
-                next_day = self.days[next_idx]
-        else:
-            idx = self.days.index(day)
-            if idx == len(self.days) - 1:   # reach the end the month
-                same_month = False
-            else:
-                next_day = self.days[idx + 1]
-
-        # update the next recurrence time
-        if not same_month or next_day > calendar.monthrange(self.next_recur_dt_wrapper.year, self.next_recur_dt_wrapper.month)[1]:    # not in the same month, or the next day doesn't exist in the current month
-            self.next_recur_dt_wrapper.increment(days=-day+1)
-            self.next_recur_dt_wrapper.increment(months=self.interval)
-            self.next_recur_dt_wrapper.increment(days=self.days[0] - 1)
-        else:   # in the same month
-            delta_days = next_day - day
-            self.next_recur_dt_wrapper.increment(days=delta_days)
+        self.next_recur_dt_wrapper = self.__next_day_after(self.next_recur_dt_wrapper)
+
+    def __next_day_after(self, dt_wrapper: DateTimeWrapper) -> DateTimeWrapper:
+        epoch_days, minute_of_day = divmod(dt_wrapper.epoch_minutes, 24 * 60)
+        year, month, day = _civil_from_days(epoch_days)
+        month_index = year * 12 + month - 1
+        next_day = self.next_days[day]
+        if next_day and next_day <= _month_info(month_index)[1]:   # the next listed day exists in the same month
+            return DateTimeWrapper.from_epoch_minutes(dt_wrapper.epoch_minutes + (next_day - day) * 24 * 60)
+        # the first listed day of the interval-th month after, a day past its end spills over into the month after that
+        first_day = _month_info(month_index + self.interval)[0]
+        return DateTimeWrapper.from_epoch_minutes((first_day + self.days[0] - 1) * 24 * 60 + minute_of_day)
+
+    def _first_recurrence_at_or_after(self, dt_wrapper: DateTimeWrapper) -> DateTimeWrapper:
+        next_datetime = self.next_recur_dt_wrapper.my_datetime
+        target_datetime = dt_wrapper.my_datetime
+        if next_datetime >= target_datetime:
+            return self.next_recur_dt_wrapper
+
+        if self.days[0] > 28:   # the first day can spill over into the following month when stepping, which shifts later months
+            next_dt_wrapper = self.next_recur_dt_wrapper
+            while next_dt_wrapper < dt_wrapper:
+                next_dt_wrapper = self.__next_day_after(next_dt_wrapper)
+            return next_dt_wrapper
+
+        # recurrences fall on the listed days that exist in every interval-th month counted from the month of next_recur_dt_wrapper
+        first_month_index = next_datetime.year * 12 + next_datetime.month - 1
+        target_month_index = target_datetime.year * 12 + target_datetime.month - 1
+        month_index = first_month_index + (target_month_index - first_month_index) // self.interval * self.interval
+        if month_index == target_month_index:   # target is in a month with recurrences
+            days_in_month = _month_info(target_month_index)[1]
+            for day in self.days[bisect.bisect_left(self.days, target_datetime.day):]:
+                if day > days_in_month:
+                    break
+                candidate_datetime = next_datetime.replace(year=target_datetime.year, month=target_datetime.month, day=day)
+                if candidate_datetime >= target_datetime:
+                    return DateTimeWrapper.from_datetime(candidate_datetime)
+        year, month = divmod(month_index + self.interval, 12)
+        return DateTimeWrapper.from_datetime(next_datetime.replace(year=year, month=month + 1, day=self.days[0]))
 
 CLASS_NAME_TO_CONSTRUCTOR = {
     "Once": Once,
@@ -1,14 +1,37 @@
 from recurrence import Recurrence, CLASS_NAME_TO_CONSTRUCTOR
 from datetime_wrapper import DateTimeWrapper
-from typing import Dict, List, Tuple
+from clock import Clock, SYSTEM_CLOCK
+from typing import Callable, Dict, Iterable, Iterator, List, Set, Tuple
 from typing_extensions import Self
+from scheduler import Scheduler
+from columnar import ColumnarScheduler
+from sorted_index import SortedIndex
+from occurrence_cache import OccurrenceCache
 from uuid import uuid4
-from db import DB
+import itertools
+import heapq
+from db import DB, INHERIT_MISFIRE_POLICY
+from firing_log import FiringLog
+from metrics import Metrics, COUNT_BUCKETS, MINUTES_BUCKETS
+import collections
 import atexit
+import time
+
+
+# what a reminder does about the recurrences it missed while the app was down or asleep, when it is caught up
+MISFIRE_POLICIES = ("fire_once", "fire_all", "skip")    # fire one notification, one for every missed recurrence up to misfire_cap, none
+DEFAULT_MISFIRE_POLICY = "fire_once"
+MISFIRE_CAP = 10
+CATCH_UP_BUDGET_SECONDS = 0.05  # of one tick, the rest of a backlog is caught up by the next ones
+CATCH_UP_BATCH_SIZE = 1000
+MISFIRE_GRACE_MINUTES = 5   # a recurrence at most this late, after a slow tick or a pause, still fires as if on time
 
 
 class Reminder:
-    def __init__(self, reminder_id: str, title: str, message: str, recurrence_type: str, start_dt_wrapper: DateTimeWrapper, end_dt_wrapper: DateTimeWrapper = None, next_recur_dt_wrapper: DateTimeWrapper = None, interval: int = 1, list: List[int] = None) -> None:
+    def __init__(self, reminder_id: str, title: str, message: str, recurrence_type: str, start_dt_wrapper: DateTimeWrapper, end_dt_wrapper: DateTimeWrapper = None, next_recur_dt_wrapper: DateTimeWrapper = None, interval: int = 1, list: List[int] = None,
+                 misfire_policy: str = None) -> None:
+        if misfire_policy is not None and misfire_policy not in MISFIRE_POLICIES:
+            raise ValueError(f"unknown misfire policy {misfire_policy}, expected one of {', '.join(MISFIRE_POLICIES)}")
         self.reminder_id: str = reminder_id
         self.title: str = title
         self.message: str = message
@@ -27,6 +50,7 @@ class Reminder:
 
         self.recurrence: Recurrence = recurrence
         self.next_recur_dt_wrapper: DateTimeWrapper = self.recurrence.next_recur_dt_wrapper
+        self.misfire_policy: str = misfire_policy   # None for the policy of the manager
     
     def __repr__(self) -> str:
         return f"Reminder(title={self.title}, message={self.message}, recur_datetime={self.next_recur_dt_wrapper}, Recurrence={self.recurrence})"
@@ -49,32 +73,190 @@ class Reminder:
         else:
             raise TypeError("Unsupported operand type. Can only compare Reminder objects.")
 
-    def should_remind_now(self) -> bool:
-        current_dt_wrapper: DateTimeWrapper = DateTimeWrapper()
+    def should_remind_now(self, current_dt_wrapper: DateTimeWrapper = None, clock: Clock = SYSTEM_CLOCK) -> bool:
+        if current_dt_wrapper is None:
+            current_dt_wrapper = clock.now_dt_wrapper()
         res = self.recurrence.should_recur(current_dt_wrapper)
         self.next_recur_dt_wrapper: DateTimeWrapper = self.recurrence.next_recur_dt_wrapper
         return res
     
-    def notify(self) -> None:
-        print('''
-              tile = {},
-              message = {},
-              next recurrence time = {}
-              '''.format(self.title, self.message, self.recurrence.next_recur_dt_wrapper))
+    def catch_up(self, current_dt_wrapper: DateTimeWrapper, misfire_policy: str, misfire_cap: int, missed_before: DateTimeWrapper = None) -> List[DateTimeWrapper]:
+        # advance a reminder whose next recurrence is before missed_before like should_remind_now, and return the recurrences it fires.
+        # the ones before missed_before were missed and fire by its misfire policy, or the given one when it has none,
+        # the ones since always fire. fire_once sends a single notification for all of them, fire_all the most recent misfire_cap
+        misfire_policy = self.misfire_policy or misfire_policy
+        missed_before = missed_before or current_dt_wrapper
+        if misfire_policy == "fire_once":
+            fired = [self.next_recur_dt_wrapper]
+        elif misfire_policy == "fire_all":
+            fired = list(collections.deque(self.recurrence.occurrences(self.next_recur_dt_wrapper, current_dt_wrapper), maxlen=misfire_cap))
+        else:
+            fired = list(self.recurrence.occurrences(missed_before, current_dt_wrapper))
+        self.should_remind_now(current_dt_wrapper)
+        return fired
+
+    def notify(self, occurrence_dt_wrapper: DateTimeWrapper = None) -> None:
+        print(self.notification_text(occurrence_dt_wrapper))
+
+    def notification_text(self, occurrence_dt_wrapper: DateTimeWrapper = None) -> str:
+        return notification_text(self.title, self.message, self.recurrence.next_recur_dt_wrapper, occurrence_dt_wrapper)
     
     def task_finished(self) -> bool:
         return self.recurrence.is_finished()
 
 
+def notification_text(title: str, message: str, next_recur_dt_wrapper: DateTimeWrapper, occurrence_dt_wrapper: DateTimeWrapper = None) -> str:
+    # occurrence_dt_wrapper is the recurrence that fired, a caught up reminder can fire for several missed ones at once
+    if occurrence_dt_wrapper is None:
+        return '''
+              tile = {},
+              message = {},
+              next recurrence time = {}
+              '''.format(title, message, next_recur_dt_wrapper)
+    return '''
+              tile = {},
+              message = {},
+              recurrence time = {},
+              next recurrence time = {}
+              '''.format(title, message, occurrence_dt_wrapper, next_recur_dt_wrapper)
+
+def reminder_from_row(reminder_data) -> Reminder:
+    # a Reminder from a (reminder_id, title, message, recurrence_type, interval, list, start_at, end_at, next_fire, misfire_policy) db row
+    start_dt_wrapper = DateTimeWrapper.from_epoch_minutes(reminder_data[6])
+    end_dt_wrapper = DateTimeWrapper.from_epoch_minutes(reminder_data[7]) if reminder_data[7] is not None else None
+    next_recur_dt_wrapper = DateTimeWrapper.from_epoch_minutes(reminder_data[8])
+    list = [int(x) for x in reminder_data[5].split(',')] if reminder_data[5] else []
+    return Reminder(reminder_data[0], reminder_data[1], reminder_data[2], reminder_data[3], start_dt_wrapper, end_dt_wrapper, next_recur_dt_wrapper, reminder_data[4], list, reminder_data[9])
+
+
+class CatchUpQueue:
+    """
+    Reminders that missed recurrences, taken off their scheduler and advanced by their misfire policy batch by batch,
+    at most budget_seconds of them per tick so a backlog never holds back the reminders due on time.
+    A recurrence counts as missed when it is more than grace_minutes late, the later ones are left to the scheduler.
+    Shared by ReminderManager and tenants.TenantReminderManager.
+    """
+    def __init__(self, misfire_policy: str = DEFAULT_MISFIRE_POLICY, misfire_cap: int = MISFIRE_CAP, budget_seconds: float = CATCH_UP_BUDGET_SECONDS,
+                 grace_minutes: int = MISFIRE_GRACE_MINUTES) -> None:
+        if misfire_policy not in MISFIRE_POLICIES:
+            raise ValueError(f"unknown misfire policy {misfire_policy}, expected one of {', '.join(MISFIRE_POLICIES)}")
+        self.misfire_policy: str = misfire_policy   # of the reminders that have none
+        self.misfire_cap: int = misfire_cap
+        self.budget_seconds: float = budget_seconds
+        self.grace_minutes: int = grace_minutes
+        self.queue: collections.deque = collections.deque()
+        self.pending: Set[str] = set()  # the queued ids that were not removed or updated since
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+    def __contains__(self, reminder_id: str) -> bool:
+        return reminder_id in self.pending
+
+    def extend(self, reminder_ids: List[str]) -> None:
+        # the reminders have to be off the scheduler already
+        self.pending.update(reminder_ids)
+        self.queue.extend(reminder_ids)
+
+    def discard(self, reminder_id: str) -> None:
+        self.pending.discard(reminder_id)
+
+    def missed_before(self, current_dt_wrapper: DateTimeWrapper) -> DateTimeWrapper:
+        # the recurrences before the returned time are missed
+        return current_dt_wrapper.shifted(minutes=-self.grace_minutes)
+
+    def run(self, current_dt_wrapper: DateTimeWrapper, reminders: Dict[str, Reminder], scheduler: Scheduler) -> Tuple[List[Tuple[Reminder, DateTimeWrapper]], List[Reminder]]:
+        # returns the fired (reminder, recurrence time) occurrences and every reminder advanced, the unfinished ones are scheduled again
+        fired: List[Tuple[Reminder, DateTimeWrapper]] = []
+        advanced: List[Reminder] = []
+        deadline = time.perf_counter() + self.budget_seconds
+        while self.queue:
+            for _ in range(min(CATCH_UP_BATCH_SIZE, len(self.queue))):
+                reminder_id = self.queue.popleft()
+                if reminder_id not in self.pending:
+                    continue
+                self.pending.remove(reminder_id)
+                reminder = reminders[reminder_id]
+                occurrences = reminder.catch_up(current_dt_wrapper, self.misfire_policy, self.misfire_cap, self.missed_before(current_dt_wrapper))
+                fired.extend((reminder, occurrence_dt_wrapper) for occurrence_dt_wrapper in occurrences)
+                advanced.append(reminder)
+                if not reminder.task_finished():
+                    scheduler.schedule(reminder_id, reminder.next_recur_dt_wrapper, reminder.recurrence)
+            if time.perf_counter() > deadline:
+                break
+        return fired, advanced
+
+
 class ReminderManager:
-    def __init__(self) -> None:
+    def __init__(self, db: DB = None, lazy_horizon_minutes: int = None, engine: str = "heap", firing_log: FiringLog = None, metrics: Metrics = None,
+                 clock: Clock = SYSTEM_CLOCK, dispatcher: "DispatchPipeline" = None, misfire_policy: str = DEFAULT_MISFIRE_POLICY,
+                 misfire_cap: int = MISFIRE_CAP, catch_up_budget_seconds: float = CATCH_UP_BUDGET_SECONDS, misfire_grace_minutes: int = MISFIRE_GRACE_MINUTES) -> None:
         self.reminders: Dict[str, Reminder] = {}
-        self.db: DB = DB()
-        self.__fetch_reminders_data_from_db()
+        self.index: SortedIndex = SortedIndex()    # reminder ids in next recurrence order
+        self.occurrence_cache: OccurrenceCache = OccurrenceCache()
+        # "columnar" keeps the due check in numpy arrays, for very large reminder sets
+        self.scheduler: Scheduler = ColumnarScheduler() if engine == "columnar" else Scheduler()
+        self.db: DB = db if db is not None else DB()
+        # in lazy mode only the reminders due before loaded_until are kept in memory, the rest stay in the db
+        self.lazy_horizon_minutes: int = lazy_horizon_minutes
+        self.loaded_until: DateTimeWrapper = None
+        # called whenever the earliest next recurrence may have changed, see timer.ReminderTimer
+        self.schedule_listeners: List[Callable[[], None]] = []
+        # advanced next recurrences are appended here instead of updated in the db, and compacted into it from time to time.
+        # in lazy mode the reminders paged out with their next recurrence only logged wait in logged_evictions, a heap of
+        # (next fire, reminder_id), until the horizon reaches them
+        self.firing_log: FiringLog = firing_log
+        self.logged_evictions: List[Tuple[int, str]] = []
+        # ticks, catch-ups and the startup load are recorded here when given, see metrics.Metrics
+        self.metrics: Metrics = metrics
+        # every "now" of the manager is read from here, a ManualClock replays schedules without waiting, see simulation.Simulation
+        self.clock: Clock = clock
+        # fired reminders are handed to its worker threads instead of printed one by one, see dispatch.DispatchPipeline
+        self.dispatcher: "DispatchPipeline" = dispatcher
+        # reminders that missed recurrences wait here to be caught up by their misfire policy
+        self.catch_up: CatchUpQueue = CatchUpQueue(misfire_policy, misfire_cap, catch_up_budget_seconds, misfire_grace_minutes)
+        start = time.perf_counter()
+        self.compact_firing_log()   # replay what the last run logged
+        current_dt_wrapper = self.clock.now_dt_wrapper()
+        if self.is_lazy():
+            self.__extend_horizon(current_dt_wrapper)
+        else:
+            self.__fetch_reminders_data_from_db()
+        self.__queue_misfires(current_dt_wrapper)   # caught up by the first ticks
+        if self.metrics is not None:
+            self.metrics.gauge("reminder_load_seconds", "Time the manager took to load its reminders at startup").set(time.perf_counter() - start)
         atexit.register(self.on_exit)
 
-    def add_reminder(self, title: str, message: str, recurrence_type: str, start_dt_wrapper: DateTimeWrapper, end_dt_wrapper: DateTimeWrapper = None, next_recur_dt_wrapper: DateTimeWrapper = None, interval: int = 1, list: List[int] = None) -> str:
-        reminder_id = str(uuid4())
+    def is_lazy(self) -> bool:
+        return self.lazy_horizon_minutes is not None
+
+    def add_schedule_listener(self, listener: Callable[[], None]) -> None:
+        self.schedule_listeners.append(listener)
+
+    def __notify_schedule_listeners(self) -> None:
+        for listener in self.schedule_listeners:
+            listener()
+
+    def next_wakeup(self) -> DateTimeWrapper:
+        # when fire_due_reminders next has work to do, None when nothing is scheduled
+        if self.catch_up:
+            return self.clock.now_dt_wrapper()
+        next_dt_wrapper = self.scheduler.peek()
+        if self.is_lazy() and (next_dt_wrapper is None or self.loaded_until < next_dt_wrapper):  # wake up to page in the next reminders
+            next_dt_wrapper = self.loaded_until
+        return next_dt_wrapper
+
+    def seconds_until_next_due(self) -> float:
+        # None when nothing is scheduled
+        next_dt_wrapper = self.next_wakeup()
+        if next_dt_wrapper is None:
+            return None
+        return max(0.0, (next_dt_wrapper.my_datetime - self.clock.now()).total_seconds())
+
+    def add_reminder(self, title: str, message: str, recurrence_type: str, start_dt_wrapper: DateTimeWrapper, end_dt_wrapper: DateTimeWrapper = None, next_recur_dt_wrapper: DateTimeWrapper = None, interval: int = 1, list: List[int] = None, reminder_id: str = None,
+                     misfire_policy: str = None) -> str:
+        # reminder_id is only given by callers that need to know it up front, see sharded.ShardedReminderManager
+        reminder_id = reminder_id or str(uuid4())
         reminder = Reminder(
             reminder_id,
             title, 
@@ -84,103 +266,330 @@ class ReminderManager:
             end_dt_wrapper,
             next_recur_dt_wrapper,
             interval, 
-            list
+            list,
+            misfire_policy
         )
-        self.reminders[reminder_id] = reminder
-        self.reminders = dict(sorted(self.reminders.items(), key=lambda item: item[1]))
-        self.db.add_reminder(reminder_id, title, message, recurrence_type, start_dt_wrapper, end_dt_wrapper, next_recur_dt_wrapper, interval, list)
+        if not self.is_lazy() or not reminder.next_recur_dt_wrapper > self.loaded_until:
+            self.reminders[reminder_id] = reminder
+            self.index.add(reminder_id, reminder.next_recur_dt_wrapper)
+            self.scheduler.schedule(reminder_id, reminder.next_recur_dt_wrapper, reminder.recurrence)
+        self.db.add_reminder(reminder_id, title, message, recurrence_type, start_dt_wrapper, end_dt_wrapper, next_recur_dt_wrapper, interval, list, misfire_policy=misfire_policy)
+        self.__notify_schedule_listeners()
         return reminder_id
 
+    def import_reminders(self, records: Iterable[Tuple], batch_size: int = 10000) -> int:
+        # records are (title, message, recurrence_type, start_dt_wrapper, end_dt_wrapper, next_recur_dt_wrapper, interval, list, misfire_policy),
+        # see bulk.read_reminders. They are written in one transaction and admitted
+        # batch by batch, a bad record rolls the transaction back and takes the admitted reminders out of memory again
+        records = iter(records)
+        admitted: List[str] = []
+        count = 0
+        try:
+            with self.db.batch():
+                while True:
+                    rows = [(str(uuid4()), *record) for record in itertools.islice(records, batch_size)]
+                    if not rows:
+                        break
+                    self.db.add_reminders(rows)
+                    count += len(rows)
+                    # rows are the arguments of Reminder, (reminder_id, title, message, recurrence_type, start_dt_wrapper, end_dt_wrapper, next_recur_dt_wrapper, ...)
+                    batch = [Reminder(*row) for row in rows if not self.is_lazy() or not (row[6] or row[4]) > self.loaded_until]
+                    self.__admit_reminders(batch)
+                    admitted.extend(reminder.reminder_id for reminder in batch)
+        except BaseException:
+            for reminder_id in admitted:
+                self.scheduler.unschedule(reminder_id)
+                self.reminders.pop(reminder_id, None)
+                self.index.remove(reminder_id)
+            raise
+        self.__notify_schedule_listeners()
+        return count
+
+    def update_reminder(self, reminder_id: str, title: str = None, message: str = None, recurrence_type: str = None, start_dt_wrapper: DateTimeWrapper = None, end_dt_wrapper: DateTimeWrapper = None, next_recur_dt_wrapper: DateTimeWrapper = None, interval: int = None, list: List[int] = None,
+                        misfire_policy: str = None) -> None:
+        # misfire_policy INHERIT_MISFIRE_POLICY takes the policy of the manager again
+        if misfire_policy is not None and misfire_policy not in MISFIRE_POLICIES + (INHERIT_MISFIRE_POLICY,):
+            raise ValueError(f"unknown misfire policy {misfire_policy}, expected one of {', '.join(MISFIRE_POLICIES)}")
+        stored = self.db.get_reminder(reminder_id)
+        if stored is None:
+            raise KeyError(f"no reminder {reminder_id}")
+        schedule_changed = any(value is not None for value in (recurrence_type, start_dt_wrapper, end_dt_wrapper, interval, list))
+        if schedule_changed and next_recur_dt_wrapper is None:  # recur again from the (new) start time
+            next_recur_dt_wrapper = start_dt_wrapper or DateTimeWrapper.from_epoch_minutes(stored[6])
+        if next_recur_dt_wrapper is None and self.firing_log is not None and reminder_id in self.firing_log.pending:
+            next_recur_dt_wrapper = DateTimeWrapper.from_epoch_minutes(self.firing_log.pending[reminder_id])   # keep the logged one
+        self.db.update_reminder(reminder_id, title, message, recurrence_type, start_dt_wrapper, end_dt_wrapper, next_recur_dt_wrapper, interval, list, misfire_policy)
+        if self.firing_log is not None:
+            self.firing_log.discard(reminder_id)   # a logged next recurrence must not overwrite this update later
+
+        # rebuild the reminder from its stored row, caught up again if it is still late
+        self.catch_up.discard(reminder_id)
+        self.scheduler.unschedule(reminder_id)
+        self.reminders.pop(reminder_id, None)
+        self.index.remove(reminder_id)
+        self.occurrence_cache.invalidate(reminder_id)
+        reminder_data = self.db.get_reminder(reminder_id)
+        if not self.is_lazy() or not reminder_data[8] > self.loaded_until.epoch_minutes:
+            self.__load_reminders([reminder_data])
+        self.__notify_schedule_listeners()
+
     def remove_reminder(self, reminder_id: str) -> None:
-        del self.reminders[reminder_id]
+        self.catch_up.discard(reminder_id)
+        if self.is_lazy():  # the reminder may not be loaded yet
+            self.reminders.pop(reminder_id, None)
+        else:
+            del self.reminders[reminder_id]
+        self.index.remove(reminder_id)
+        self.occurrence_cache.invalidate(reminder_id)
+        self.scheduler.unschedule(reminder_id)
         self.db.remove_reminder(reminder_id)
+        if self.firing_log is not None:
+            self.firing_log.discard(reminder_id)
+        self.__notify_schedule_listeners()
     
     def notify_due_reminders(self) -> None:
-        reminders: List[Reminder] = self.__get_due_reminders()
-        for reminder in reminders:
-            reminder.notify()
-        self.__remove_finished_reminders()
-
-    def __get_due_reminders(self) -> List[Reminder]:
-        due_reminders: List[Reminder] = []
-        for reminder_id, reminder in self.reminders.items():
-            if reminder.should_remind_now():
-                due_reminders.append(reminder)
-                self.db.update_reminder(reminder_id=reminder_id, next_recur_dt_wrapper=reminder.next_recur_dt_wrapper)
-        return due_reminders
+        self.notify(self.fire_due_occurrences())
+
+    def notify(self, occurrences: List[Tuple[Reminder, DateTimeWrapper]]) -> None:
+        if self.dispatcher is not None:
+            self.dispatcher.dispatch(occurrences, self.clock.now_dt_wrapper())
+            return
+        for reminder, occurrence_dt_wrapper in occurrences:
+            reminder.notify(occurrence_dt_wrapper)
+
+    def fire_due_reminders(self) -> List[Reminder]:
+        # the reminders that fired, once each, see fire_due_occurrences
+        return list({reminder.reminder_id: reminder for reminder, _ in self.fire_due_occurrences()}.values())
+
+    def fire_due_occurrences(self) -> List[Tuple[Reminder, DateTimeWrapper]]:
+        # advance and persist the due reminders without notifying, for callers that deliver notifications themselves.
+        # one (reminder, recurrence time) per notification, a caught up reminder fires for every recurrence its misfire policy
+        # fires and for none when it skips
+        start = time.perf_counter()
+        occurrences, advanced = self.__get_due_reminders()
+        self.__remove_finished_reminders(advanced)
+        if self.metrics is not None:
+            self.__record_tick(time.perf_counter() - start, len(occurrences))
+        return occurrences
+
+    def __record_tick(self, seconds: float, due: int) -> None:
+        self.metrics.histogram("reminder_tick_seconds", "Duration of scheduler ticks").observe(seconds)
+        self.metrics.histogram("reminder_due_per_tick", "Reminders fired by one tick", COUNT_BUCKETS).observe(due)
+        self.metrics.counter("reminder_fired_total", "Reminders fired").inc(due)
+        self.metrics.gauge("reminder_resident", "Reminders held in memory").set(len(self.reminders))
+
+    def __record_catch_ups(self, current_dt_wrapper: DateTimeWrapper, due_reminders: List[Reminder]) -> None:
+        # a caught up reminder is still indexed at its missed recurrence and jumped over the ones after it
+        # in one step (see Recurrence._first_recurrence_at_or_after), so the skipped time is recorded
+        current_minutes = current_dt_wrapper.epoch_minutes
+        for reminder in due_reminders:
+            key = self.index.key_of.get(reminder.reminder_id)
+            if key is not None and key[0] < current_minutes:
+                self.metrics.counter("reminder_catch_ups_total", "Due reminders that had missed recurrences").inc()
+                self.metrics.histogram("reminder_catch_up_lag_minutes", "Minutes a caught up reminder was late", MINUTES_BUCKETS).observe(current_minutes - key[0])
+
+    def __get_due_reminders(self) -> Tuple[List[Tuple[Reminder, DateTimeWrapper]], List[Reminder]]:
+        # the fired occurrences and every reminder advanced by this tick. the scheduler only looks at the reminders that can be due,
+        # the ones that missed recurrences are caught up after them
+        current_dt_wrapper: DateTimeWrapper = self.clock.now_dt_wrapper()
+        if self.is_lazy():
+            self.__extend_horizon(current_dt_wrapper)
+        self.__queue_misfires(current_dt_wrapper)
+        due_reminders: List[Reminder] = self.scheduler.fire_due(current_dt_wrapper, self.reminders)
+        # fired at the recurrence they were indexed at, up to grace minutes before now
+        due_fired = [(reminder, DateTimeWrapper.from_epoch_minutes(self.index.key_of[reminder.reminder_id][0])) for reminder in due_reminders]
+        caught_up_fired, caught_up = self.__catch_up(current_dt_wrapper)
+        if self.metrics is not None:
+            self.__record_catch_ups(current_dt_wrapper, caught_up)
+        advanced = caught_up + due_reminders
+        rescheduled: List[Tuple[str, DateTimeWrapper]] = []
+        for reminder in advanced:
+            if self.is_lazy() and not reminder.task_finished() and reminder.next_recur_dt_wrapper > self.loaded_until:    # paged in again once the horizon reaches it
+                self.scheduler.unschedule(reminder.reminder_id)
+                del self.reminders[reminder.reminder_id]
+                self.index.remove(reminder.reminder_id)
+                if self.firing_log is not None:
+                    heapq.heappush(self.logged_evictions, (reminder.next_recur_dt_wrapper.epoch_minutes, reminder.reminder_id))
+            else:
+                rescheduled.append((reminder.reminder_id, reminder.next_recur_dt_wrapper))
+        self.index.add_many(rescheduled)
+        # persist every advanced next recurrence time of this tick in one transaction, or one append
+        next_fires = ((reminder.reminder_id, reminder.next_recur_dt_wrapper) for reminder in advanced)
+        if self.firing_log is None:
+            self.db.update_next_fires(next_fires)
+        else:
+            self.firing_log.append(next_fires)
+            if self.firing_log.needs_compaction():
+                self.compact_firing_log()
+        return caught_up_fired + due_fired, advanced
+
+    def __queue_misfires(self, current_dt_wrapper: DateTimeWrapper) -> None:
+        # take the reminders whose next recurrence passed without a tick, during downtime or a sleep, off the scheduler
+        missed_before = self.catch_up.missed_before(current_dt_wrapper)
+        next_dt_wrapper = self.scheduler.peek()
+        if next_dt_wrapper is None or not next_dt_wrapper < missed_before:
+            return
+        missed = [reminder_id for reminder_id in self.index.iter_until(missed_before.shifted(minutes=-1))
+                  if reminder_id in self.scheduler and reminder_id not in self.catch_up]
+        self.scheduler.unschedule_many(missed)
+        self.catch_up.extend(missed)
+        if self.metrics is not None:
+            self.metrics.gauge("reminder_catch_up_backlog", "Reminders with missed recurrences waiting to be caught up").set(len(self.catch_up))
+
+    def __catch_up(self, current_dt_wrapper: DateTimeWrapper) -> Tuple[List[Tuple[Reminder, DateTimeWrapper]], List[Reminder]]:
+        # the fired occurrences and every reminder advanced, see CatchUpQueue.run
+        fired, advanced = self.catch_up.run(current_dt_wrapper, self.reminders, self.scheduler)
+        if self.metrics is not None and advanced:
+            self.metrics.gauge("reminder_catch_up_backlog", "Reminders with missed recurrences waiting to be caught up").set(len(self.catch_up))
+        return fired, advanced
     
-    def __remove_finished_reminders(self) -> None:
-        reminders_list = list(self.reminders.values())
-        for reminder in reminders_list:
-            if reminder.task_finished():
-                self.remove_reminder(reminder.reminder_id)
+    def __remove_finished_reminders(self, reminders: List[Reminder]) -> None:
+        with self.db.batch():
+            for reminder in reminders:
+                if reminder.task_finished():
+                    self.remove_reminder(reminder.reminder_id)
     
     def __fetch_reminders_data_from_db(self) -> List[Reminder]:
         reminders_data = self.db.get_all_reminders()
-        reminders = self.__create_reminders(reminders_data)
+        self.__load_reminders(reminders_data)
+
+    def __extend_horizon(self, current_dt_wrapper: DateTimeWrapper) -> None:
+        # page in the reminders that moved inside the horizon since the last tick
+        horizon_dt_wrapper = current_dt_wrapper.shifted(minutes=self.lazy_horizon_minutes)
+        if self.loaded_until is not None and not horizon_dt_wrapper > self.loaded_until:
+            return
+        reminders_data = self.__iter_reminders_due_before(horizon_dt_wrapper, self.loaded_until)
+        self.loaded_until = horizon_dt_wrapper
+        self.__load_reminders(reminders_data)
+
+    def __iter_reminders_due_before(self, dt_wrapper: DateTimeWrapper, after_dt_wrapper: DateTimeWrapper):
+        # as DB.iter_reminders_due_before, with the next recurrences of the firing log that are not compacted into the db yet
+        if self.firing_log is None:
+            yield from self.db.iter_reminders_due_before(dt_wrapper, after_dt_wrapper)
+            return
+        pending = self.firing_log.pending
+        for reminder_data in self.db.iter_reminders_due_before(dt_wrapper, after_dt_wrapper):
+            if reminder_data[0] not in pending:     # the row is behind the log, a logged reminder is in memory or in logged_evictions
+                yield reminder_data
+        while self.logged_evictions and self.logged_evictions[0][0] <= dt_wrapper.epoch_minutes:
+            next_fire, reminder_id = heapq.heappop(self.logged_evictions)
+            reminder_data = self.db.get_reminder(reminder_id) if pending.get(reminder_id) == next_fire else None   # else fired again, compacted or removed
+            if reminder_data is not None:
+                yield (*reminder_data[:8], next_fire, *reminder_data[9:])
+
+    def __load_reminders(self, reminders_data) -> None:
+        self.__admit_reminders(self.__create_reminders(reminders_data))
+
+    def __admit_reminders(self, reminders: Iterable[Reminder]) -> None:
+        loaded: List[Tuple[str, DateTimeWrapper]] = []
         for reminder in reminders:
+            if reminder.reminder_id in self.reminders:
+                continue
             self.reminders[reminder.reminder_id] = reminder
-        self.reminders = dict(sorted(self.reminders.items(), key=lambda item: item[1]))
+            loaded.append((reminder.reminder_id, reminder.next_recur_dt_wrapper))
+            if not reminder.task_finished():
+                self.scheduler.schedule(reminder.reminder_id, reminder.next_recur_dt_wrapper, reminder.recurrence)
+        self.index.add_many(loaded)
 
     def __create_reminders(self, reminders_data):
-        created_reminders = []
         for reminder_data in reminders_data:
-            start_dt_wrapper = DateTimeWrapper(
-                reminder_data[6], 
-                reminder_data[7], 
-                reminder_data[8], 
-                reminder_data[9], 
-                reminder_data[10]
-            )
-
-            if reminder_data[11] is not None:
-                end_dt_wrapper = DateTimeWrapper(
-                    reminder_data[11], 
-                    reminder_data[12], 
-                    reminder_data[13], 
-                    reminder_data[14], 
-                    reminder_data[15]
-                )
-            else:
-                end_dt_wrapper = None
-            
-            next_recur_dt_wrapper = DateTimeWrapper(
-                reminder_data[16], 
-                reminder_data[17], 
-                reminder_data[18], 
-                reminder_data[19], 
-                reminder_data[20]
-            )
-
-            reminder = Reminder(
-                reminder_data[0],
-                reminder_data[1], 
-                reminder_data[2], 
-                reminder_data[3], 
-                start_dt_wrapper, 
-                end_dt_wrapper,
-                next_recur_dt_wrapper,
-                reminder_data[4], 
-                self.__convert_str_to_list(reminder_data[5])
-            )
-            created_reminders.append(reminder)
-        return created_reminders
-    
-    def __convert_str_to_list(self, list_int_str: str) -> List[int]:
-        return [int(x) for x in list_int_str.split(',')] if list_int_str else []
+            yield reminder_from_row(reminder_data)
     
     def show_all_reminders(self):
         print("Stored Reminders: ")
-        for reminder_id, reminder in self.reminders.items():
-            print(reminder_id, reminder)
+        for reminder_id in self.index:
+            print(reminder_id, self.reminders[reminder_id])
     
     def get_all_reminders(self) -> List[Tuple]:
         res = []
-        for reminder_id, reminder in self.reminders.items():
+        if self.is_lazy():  # most reminders are not in memory, read them straight from the db
+            reminders_data = sorted(self.__with_logged_next_fires(self.db.iter_all_reminders()), key=lambda reminder_data: (reminder_data[8], reminder_data[0]))
+            for reminder_data in reminders_data:
+                res.append((reminder_data[0], reminder_data[1], reminder_data[2], DateTimeWrapper.from_epoch_minutes(reminder_data[8])))
+            return res
+        for reminder_id in self.index:
+            reminder = self.reminders[reminder_id]
+            res.append((reminder_id, reminder.title, reminder.message, reminder.next_recur_dt_wrapper))
+        return res
+
+    def compact_firing_log(self) -> None:
+        # bring the db up to date with the firing log. inside a batch of the db it waits until the batch committed
+        if self.firing_log is None:
+            return
+        if self.db.in_batch():
+            self.db.after_commit("compact_firing_log", self.compact_firing_log)
+            return
+        self.firing_log.compact(self.db)
+        self.logged_evictions.clear()   # the rows are up to date, the horizon pages them in from the db
+
+    def __with_logged_next_fires(self, reminders_data: Iterable[Tuple]) -> Iterator[Tuple]:
+        # rows of the db with the next fire the firing log holds for them until the next compaction
+        pending = self.firing_log.pending if self.firing_log is not None else {}
+        for reminder_data in reminders_data:
+            next_fire = pending.get(reminder_data[0])
+            yield reminder_data if next_fire is None else reminder_data[:8] + (next_fire,) + reminder_data[9:]
+
+    def count_reminders(self) -> int:
+        return self.db.count_reminders() if self.is_lazy() else len(self.index)
+
+    def get_reminders_page(self, offset: int, limit: int) -> List[Tuple]:
+        # the slice [offset, offset + limit) of get_all_reminders, without building the rest of it
+        if self.is_lazy():  # ordered by the stored next fires, a logged one only shows in the row until it is compacted
+            return [(reminder_data[0], reminder_data[1], reminder_data[2], DateTimeWrapper.from_epoch_minutes(reminder_data[8]))
+                    for reminder_data in self.__with_logged_next_fires(self.db.get_reminders_page(offset, limit))]
+        res = []
+        for reminder_id in self.index.page(offset, limit):
+            reminder = self.reminders[reminder_id]
             res.append((reminder_id, reminder.title, reminder.message, reminder.next_recur_dt_wrapper))
         return res
 
+    def search(self, text: str = None, recurrence_type: str = None, from_dt_wrapper: DateTimeWrapper = None, until_dt_wrapper: DateTimeWrapper = None,
+               offset: int = 0, limit: int = None) -> List[Tuple]:
+        # reminders matching every given filter, see DB.search_reminders, as get_reminders_page rows.
+        # answered by the db's full-text index in both modes, nothing is loaded into memory for it.
+        # the time filters and paging see the stored next fires, a logged one only shows in the row until it is compacted
+        return [(reminder_data[0], reminder_data[1], reminder_data[2], DateTimeWrapper.from_epoch_minutes(reminder_data[8]))
+                for reminder_data in self.__with_logged_next_fires(self.db.search_reminders(text, recurrence_type, from_dt_wrapper, until_dt_wrapper, offset, limit))]
+
+    def count_search_results(self, text: str = None, recurrence_type: str = None, from_dt_wrapper: DateTimeWrapper = None, until_dt_wrapper: DateTimeWrapper = None) -> int:
+        return self.db.count_search_results(text, recurrence_type, from_dt_wrapper, until_dt_wrapper)
+
+    def agenda(self, start_dt_wrapper: DateTimeWrapper, end_dt_wrapper: DateTimeWrapper, limit: int = None) -> List[Tuple]:
+        # every recurrence with start <= time <= end as (reminder_id, title, message, occurrence_dt_wrapper), in time order
+        reminders: Dict[str, Reminder] = {}
+        expansions = []
+        for reminder in self.__reminders_recurring_until(end_dt_wrapper):
+            occurrences = self.occurrence_cache.occurrences(reminder.reminder_id, reminder.recurrence, start_dt_wrapper, end_dt_wrapper)
+            if occurrences:
+                reminders[reminder.reminder_id] = reminder
+                expansions.append(zip(occurrences, itertools.repeat(reminder.reminder_id)))
+        res = []
+        for epoch_minutes, reminder_id in itertools.islice(heapq.merge(*expansions), limit):
+            reminder = reminders[reminder_id]
+            res.append((reminder_id, reminder.title, reminder.message, DateTimeWrapper.from_epoch_minutes(epoch_minutes)))
+        return res
+
+    def __reminders_recurring_until(self, dt_wrapper: DateTimeWrapper):
+        # only reminders whose next recurrence is at or before dt_wrapper can recur until then
+        if not self.is_lazy():
+            for reminder_id in self.index.iter_until(dt_wrapper):
+                yield self.reminders[reminder_id]
+            return
+        # most reminders are not in memory, the ones that are may be ahead of their row, and so may logged ones
+        reminders_data = (reminder_data for reminder_data in self.__with_logged_next_fires(self.db.iter_reminders_due_before(dt_wrapper))
+                          if reminder_data[0] not in self.reminders and reminder_data[8] <= dt_wrapper.epoch_minutes)
+        yield from self.reminders.values()
+        yield from self.__create_reminders(reminders_data)
+
     def on_exit(self):
         self.show_all_reminders()
+        self.close()
+
+    def close(self) -> None:
+        self.compact_firing_log()
+        if self.firing_log is not None:
+            self.firing_log.close()
+        if self.dispatcher is not None:
+            self.dispatcher.close()
         self.db.close()
     
\ No newline at end of file
@@ -0,0 +1,74 @@
+from datetime_wrapper import DateTimeWrapper
+from recurrence import Recurrence
+from typing import Dict, List, Optional
+import itertools
+import heapq
+
+
+REMOVED = "<removed>"
+
+class Scheduler:
+    """
+    Min-heap of reminder ids keyed on their next recurrence time.
+    Entries of removed or rescheduled reminders are dropped lazily when they reach the top of the heap.
+    """
+    def __init__(self) -> None:
+        self.heap: List[list] = []
+        self.entries: Dict[str, list] = {}
+        self.counter = itertools.count()    # tie breaker so reminder ids are never compared
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, reminder_id: str) -> bool:
+        return reminder_id in self.entries
+
+    def schedule(self, reminder_id: str, next_recur_dt_wrapper: DateTimeWrapper, recurrence: Recurrence = None) -> None:
+        # recurrence is only needed by engines that advance reminders themselves, see columnar.ColumnarScheduler
+        if reminder_id in self.entries:
+            self.unschedule(reminder_id)
+        entry = [next_recur_dt_wrapper.epoch_minutes, next(self.counter), reminder_id]
+        self.entries[reminder_id] = entry
+        heapq.heappush(self.heap, entry)
+
+    def unschedule(self, reminder_id: str) -> None:
+        entry = self.entries.pop(reminder_id, None)
+        if entry is not None:
+            entry[-1] = REMOVED
+
+    def unschedule_many(self, reminder_ids) -> None:
+        for reminder_id in reminder_ids:
+            self.unschedule(reminder_id)
+        if len(self.heap) > 2 * len(self.entries):  # rebuild rather than pop the removed entries one by one
+            self.heap = [entry for entry in self.heap if entry[-1] is not REMOVED]
+            heapq.heapify(self.heap)
+
+    def peek(self) -> Optional[DateTimeWrapper]:
+        while self.heap and self.heap[0][-1] is REMOVED:
+            heapq.heappop(self.heap)
+        return DateTimeWrapper.from_epoch_minutes(self.heap[0][0]) if self.heap else None
+
+    def pop_due(self, current_dt_wrapper: DateTimeWrapper) -> List[str]:
+        due_reminder_ids: List[str] = []
+        current_minutes = current_dt_wrapper.epoch_minutes
+        while self.heap and self.heap[0][0] <= current_minutes:
+            _, _, reminder_id = heapq.heappop(self.heap)
+            if reminder_id is not REMOVED:
+                del self.entries[reminder_id]
+                due_reminder_ids.append(reminder_id)
+        return due_reminder_ids
+
+    def fire_due(self, current_dt_wrapper: DateTimeWrapper, reminders: Dict[str, "Reminder"]) -> List["Reminder"]:
+        # advance every due reminder, reschedule the recurring ones and drop the finished ones
+        due_reminders: List["Reminder"] = []
+        for reminder_id in self.pop_due(current_dt_wrapper):
+            reminder = reminders[reminder_id]
+            if reminder.should_remind_now(current_dt_wrapper):
+                due_reminders.append(reminder)
+            if not reminder.task_finished():    # reschedule recurring reminders on their advanced time
+                self.schedule(reminder_id, reminder.next_recur_dt_wrapper, reminder.recurrence)
+        return due_reminders
+
+    def clear(self) -> None:
+        self.heap.clear()
+        self.entries.clear()
@@ -0,0 +1,163 @@
+from datetime_wrapper import DateTimeWrapper
+from reminder import Reminder, ReminderManager
+from timer import DeadlineReminderTimer, MAX_SLEEP_SECONDS
+from db import DB, DB_NAME
+from typing import Any, Callable, List, Tuple
+from uuid import uuid4
+import multiprocessing
+import contextlib
+import threading
+import itertools
+import atexit
+import heapq
+import queue
+import zlib
+import time
+import os
+
+
+STOP = "<stop>"
+READY = "<ready>"
+
+def shard_of(reminder_id: str, shards: int) -> int:
+    # crc32 rather than hash(), which is salted differently in every process
+    return zlib.crc32(reminder_id.encode()) % shards
+
+def shard_db_name(db_name: str, shard: int) -> str:
+    return f"{db_name}.shard{shard}"
+
+def _run_shard(shard: int, db_name: str, profile: str, lazy_horizon_minutes: int, max_sleep_seconds: float,
+               commands: multiprocessing.Queue, replies: multiprocessing.Queue, notifications: multiprocessing.Queue, go) -> None:
+    # the loop of one shard process, the same as worker.ReminderWorker with method names instead of functions as commands
+    reminder_manager = ReminderManager(DB(shard_db_name(db_name, shard), profile), lazy_horizon_minutes)
+    atexit.unregister(reminder_manager.on_exit)
+    def on_fired(occurrences: List[Tuple[Reminder, DateTimeWrapper]]) -> None:
+        # one message per tick, pickling every notification on its own would cost more than firing it
+        notifications.put([(reminder.reminder_id, reminder.notification_text(occurrence_dt_wrapper)) for reminder, occurrence_dt_wrapper in occurrences])
+    timer = DeadlineReminderTimer(reminder_manager, on_fired, max_sleep_seconds)
+    replies.put((READY, None))
+    go.wait()
+    timer.start()
+    try:
+        while True:
+            if timer.seconds_left() == 0:
+                timer.tick()
+            try:
+                command = commands.get(timeout=timer.seconds_left())
+            except queue.Empty:
+                continue
+            if command == STOP:
+                return
+            method, args, kwargs = command
+            try:
+                replies.put((getattr(reminder_manager, method)(*args, **kwargs), None))
+            except Exception as e:
+                replies.put((None, e))
+    finally:
+        timer.stop()
+        reminder_manager.close()
+
+
+class ShardedReminderManager:
+    """
+    Reminders partitioned by a hash of their id over worker processes, each with its own scheduler and sqlite file.
+    Calls for one reminder go to its shard, listings are merged from all of them,
+    and the notifications of every shard are merged through one queue into a single sink.
+    """
+    def __init__(self, db_name: str = None, shards: int = None, profile: str = "durable", lazy_horizon_minutes: int = None,
+                 sink: Callable[[str], None] = print, max_sleep_seconds: float = MAX_SLEEP_SECONDS) -> None:
+        self.db_name: str = db_name or DB_NAME
+        self.shards: int = shards or os.cpu_count()
+        self.profile: str = profile
+        self.lazy_horizon_minutes: int = lazy_horizon_minutes
+        self.sink: Callable[[str], None] = sink
+        self.max_sleep_seconds: float = max_sleep_seconds
+        self.delivered: int = 0
+        self.started_at: float = None
+        # spawn instead of fork, forking a process that already runs threads can deadlock the child
+        self.context = multiprocessing.get_context("spawn")
+        self.notifications: multiprocessing.Queue = None
+        self.processes: List[multiprocessing.Process] = []
+        self.commands: List[multiprocessing.Queue] = []
+        self.replies: List[multiprocessing.Queue] = []
+        self.locks: List[threading.Lock] = [threading.Lock() for _ in range(self.shards)]   # one request in flight per shard, replies come back in order
+        self.merger: threading.Thread = None
+
+    def start(self) -> None:
+        self.notifications = self.context.Queue()
+        go = self.context.Event()
+        for shard in range(self.shards):
+            self.commands.append(self.context.Queue())
+            self.replies.append(self.context.Queue())
+            process = self.context.Process(target=_run_shard, name=f"reminder-shard-{shard}", daemon=True,
+                                           args=(shard, self.db_name, self.profile, self.lazy_horizon_minutes, self.max_sleep_seconds,
+                                                 self.commands[shard], self.replies[shard], self.notifications, go))
+            process.start()
+            self.processes.append(process)
+        for shard in range(self.shards):    # every shard loaded its reminders
+            self.replies[shard].get()
+        self.merger = threading.Thread(target=self.__merge_notifications, name="reminder-shard-merger", daemon=True)
+        self.merger.start()
+        self.started_at = time.perf_counter()
+        go.set()
+
+    def stop(self) -> None:
+        for shard_commands in self.commands:
+            shard_commands.put(STOP)
+        for process in self.processes:
+            process.join()
+        self.notifications.put(STOP)
+        self.merger.join()
+
+    def add_reminder(self, title: str, message: str, recurrence_type: str, start_dt_wrapper: DateTimeWrapper, end_dt_wrapper: DateTimeWrapper = None, next_recur_dt_wrapper: DateTimeWrapper = None, interval: int = 1, list: List[int] = None) -> str:
+        reminder_id = str(uuid4())  # chosen here, the id decides the shard
+        return self.__call(shard_of(reminder_id, self.shards), "add_reminder",
+                           title, message, recurrence_type, start_dt_wrapper, end_dt_wrapper, next_recur_dt_wrapper, interval, list, reminder_id=reminder_id)
+
+    def update_reminder(self, reminder_id: str, *args, **kwargs) -> None:
+        self.__call(shard_of(reminder_id, self.shards), "update_reminder", reminder_id, *args, **kwargs)
+
+    def remove_reminder(self, reminder_id: str) -> None:
+        self.__call(shard_of(reminder_id, self.shards), "remove_reminder", reminder_id)
+
+    def count_reminders(self) -> int:
+        return sum(self.__call_all("count_reminders"))
+
+    def get_all_reminders(self) -> List[Tuple]:
+        # every shard lists in next recurrence order, ties broken by id
+        return [*heapq.merge(*self.__call_all("get_all_reminders"), key=lambda reminder: (reminder[3].epoch_minutes, reminder[0]))]
+
+    def agenda(self, start_dt_wrapper: DateTimeWrapper, end_dt_wrapper: DateTimeWrapper, limit: int = None) -> List[Tuple]:
+        agendas = self.__call_all("agenda", start_dt_wrapper, end_dt_wrapper, limit)
+        return [*itertools.islice(heapq.merge(*agendas, key=lambda reminder: (reminder[3].epoch_minutes, reminder[0])), limit)]
+
+    def __call(self, shard: int, method: str, *args, **kwargs) -> Any:
+        with self.locks[shard]:
+            self.commands[shard].put((method, args, kwargs))
+            result, error = self.replies[shard].get()
+        if error is not None:
+            raise error
+        return result
+
+    def __call_all(self, method: str, *args, **kwargs) -> List[Any]:
+        # sent to every shard before waiting, so the shards work on it at the same time.
+        # the locks are taken in shard order, so two of these calls never wait on each other's locks
+        with contextlib.ExitStack() as stack:
+            for lock in self.locks:
+                stack.enter_context(lock)
+            for shard_commands in self.commands:
+                shard_commands.put((method, args, kwargs))
+            replies = [shard_replies.get() for shard_replies in self.replies]
+        for _, error in replies:
+            if error is not None:
+                raise error
+        return [result for result, _ in replies]
+
+    def __merge_notifications(self) -> None:
+        while True:
+            notifications = self.notifications.get()
+            if notifications == STOP:
+                return
+            for _, notification_text in notifications:
+                self.sink(notification_text)
+                self.delivered += 1
@@ -0,0 +1,63 @@
+from datetime_wrapper import DateTimeWrapper
+from reminder import ReminderManager
+from clock import ManualClock
+from typing import List, Tuple
+import time
+
+
+class SimulationResult:
+    def __init__(self, firings: List[Tuple[int, str]], fires: int, ticks: int, simulated_minutes: int, wall_seconds: float) -> None:
+        self.firings: List[Tuple[int, str]] = firings   # (epoch minutes, reminder_id) in firing order, when recorded
+        self.fires: int = fires
+        self.ticks: int = ticks
+        self.simulated_minutes: int = simulated_minutes
+        self.wall_seconds: float = wall_seconds
+
+    @property
+    def fires_per_second(self) -> float:
+        return self.fires / self.wall_seconds if self.wall_seconds else float("inf")
+
+    def __repr__(self) -> str:
+        return (f"SimulationResult(fires={self.fires}, ticks={self.ticks}, simulated_days={self.simulated_minutes / (24 * 60):.1f}, "
+                f"wall_seconds={self.wall_seconds:.3f}, fires_per_second={self.fires_per_second:.0f})")
+
+
+class Simulation:
+    """
+    Discrete-event replay of a ReminderManager built on a ManualClock: the clock jumps straight to the next time the manager
+    has work, see ReminderManager.next_wakeup, and the due reminders are fired there, so a year of schedules runs without sleeping.
+    Fired reminders are advanced and persisted as in real time, in a single transaction.
+    """
+    def __init__(self, reminder_manager: ReminderManager) -> None:
+        if not isinstance(reminder_manager.clock, ManualClock):
+            raise ValueError("the reminder manager has to read a ManualClock")
+        self.reminder_manager: ReminderManager = reminder_manager
+        self.clock: ManualClock = reminder_manager.clock
+
+    def run(self, until_dt_wrapper: DateTimeWrapper, record: bool = True) -> SimulationResult:
+        # fire everything due from the current time of the clock up to and including until_dt_wrapper,
+        # the firings are only kept with record, a year of them for many reminders takes a lot of memory
+        firings: List[Tuple[int, str]] = []
+        fires = ticks = 0
+        start_minutes = last_tick_minutes = self.clock.epoch_minutes
+        start = time.perf_counter()
+        with self.reminder_manager.db.batch():  # one transaction instead of one per tick, the writes are the same
+            while True:
+                next_dt_wrapper = self.reminder_manager.next_wakeup()
+                if next_dt_wrapper is None or next_dt_wrapper > until_dt_wrapper:
+                    break
+                # a backlog of missed recurrences is caught up by more ticks in the same minute, see ReminderManager.catch_up,
+                # else a tick happens at the latest next minute, in case the manager wants to wake up again for the same minute
+                same_minute = not ticks or self.reminder_manager.catch_up
+                tick_minutes = max(next_dt_wrapper.epoch_minutes, last_tick_minutes if same_minute else last_tick_minutes + 1)
+                if tick_minutes > until_dt_wrapper.epoch_minutes:
+                    break
+                self.clock.epoch_minutes = last_tick_minutes = tick_minutes
+                fired = self.reminder_manager.fire_due_occurrences()
+                fires += len(fired)
+                ticks += 1
+                if record:
+                    firings.extend((tick_minutes, reminder.reminder_id) for reminder, _ in fired)
+        wall_seconds = time.perf_counter() - start
+        self.clock.set(until_dt_wrapper)
+        return SimulationResult(firings, fires, ticks, until_dt_wrapper.epoch_minutes - start_minutes, wall_seconds)
@@ -0,0 +1,70 @@
+from datetime_wrapper import DateTimeWrapper
+from typing import Dict, Iterable, Iterator, List, Tuple
+import bisect
+
+
+class SortedIndex:
+    """
+    Reminder ids ordered by next recurrence time, ties broken by id.
+    Kept sorted with bisect so adding, removing and rescheduling one reminder never re-sorts the whole set.
+    """
+    def __init__(self) -> None:
+        self.keys: List[Tuple[int, str]] = []
+        self.key_of: Dict[str, Tuple[int, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, reminder_id: str) -> bool:
+        return reminder_id in self.key_of
+
+    def __iter__(self) -> Iterator[str]:
+        for _, reminder_id in self.keys:
+            yield reminder_id
+
+    def page(self, offset: int, limit: int) -> List[str]:
+        return [reminder_id for _, reminder_id in self.keys[offset:offset + limit]]
+
+    def iter_until(self, dt_wrapper: DateTimeWrapper) -> Iterator[str]:
+        # ids whose next recurrence is at or before dt_wrapper
+        for i in range(bisect.bisect_right(self.keys, (dt_wrapper.epoch_minutes, "\U0010ffff"))):
+            yield self.keys[i][1]
+
+    def add(self, reminder_id: str, next_recur_dt_wrapper: DateTimeWrapper) -> None:
+        # also used to reschedule, the old key is dropped first
+        key = (next_recur_dt_wrapper.epoch_minutes, reminder_id)
+        old_key = self.key_of.get(reminder_id)
+        if old_key == key:
+            return
+        if old_key is not None:
+            self.__delete_key(old_key)
+        bisect.insort(self.keys, key)
+        self.key_of[reminder_id] = key
+
+    def add_many(self, items: Iterable[Tuple[str, DateTimeWrapper]]) -> None:
+        # large loads and reschedules filter and sort once instead of one delete and insort per reminder
+        pending: Dict[str, Tuple[int, str]] = {}
+        for reminder_id, next_recur_dt_wrapper in items:
+            pending[reminder_id] = (next_recur_dt_wrapper.epoch_minutes, reminder_id)
+        if len(pending) <= 8:
+            for reminder_id, key in pending.items():
+                self.add(reminder_id, DateTimeWrapper.from_epoch_minutes(key[0]))
+            return
+        stale_keys = {self.key_of[reminder_id] for reminder_id in pending if reminder_id in self.key_of}
+        if stale_keys:
+            self.keys = [key for key in self.keys if key not in stale_keys]
+        self.key_of.update(pending)
+        self.keys.extend(pending.values())
+        self.keys.sort()    # timsort merges the sorted run with the appended one
+
+    def remove(self, reminder_id: str) -> None:
+        key = self.key_of.pop(reminder_id, None)
+        if key is not None:
+            self.__delete_key(key)
+
+    def clear(self) -> None:
+        self.keys.clear()
+        self.key_of.clear()
+
+    def __delete_key(self, key: Tuple[int, str]) -> None:
+        del self.keys[bisect.bisect_left(self.keys, key)]
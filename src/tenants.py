@@ -0,0 +1,185 @@
+from datetime_wrapper import DateTimeWrapper
+from clock import Clock, SYSTEM_CLOCK
+from reminder import Reminder, CatchUpQueue, reminder_from_row, DEFAULT_MISFIRE_POLICY, MISFIRE_POLICIES, MISFIRE_CAP, CATCH_UP_BUDGET_SECONDS, \
+    MISFIRE_GRACE_MINUTES
+from scheduler import Scheduler
+from db import DB, INHERIT_MISFIRE_POLICY
+from collections import OrderedDict
+from typing import Dict, List, Set, Tuple
+from uuid import uuid4
+
+
+HORIZON_MINUTES: int = 60
+MAX_RESIDENT_TENANTS: int = 1000
+
+class TenantReminderManager:
+    """
+    Reminders of many owners served by one process and one Scheduler, so a tick only looks at what is due however many tenants there are.
+    A tenant is loaded whole from the (owner, next_fire) index the first time it is used, and the least recently used tenants are evicted
+    once more than max_resident_tenants are loaded. The reminders of every other tenant stay in the db until they are due
+    within horizon_minutes, as in the lazy mode of ReminderManager, so they fire without their tenant being loaded.
+    Reminders that missed recurrences are caught up by their misfire policy as in ReminderManager.
+    """
+    def __init__(self, db: DB = None, horizon_minutes: int = HORIZON_MINUTES, max_resident_tenants: int = MAX_RESIDENT_TENANTS,
+                 clock: Clock = SYSTEM_CLOCK, misfire_policy: str = DEFAULT_MISFIRE_POLICY, misfire_cap: int = MISFIRE_CAP,
+                 catch_up_budget_seconds: float = CATCH_UP_BUDGET_SECONDS, misfire_grace_minutes: int = MISFIRE_GRACE_MINUTES) -> None:
+        self.db: DB = db if db is not None else DB()
+        self.horizon_minutes: int = horizon_minutes
+        self.max_resident_tenants: int = max_resident_tenants
+        self.scheduler: Scheduler = Scheduler()
+        self.reminders: Dict[str, Reminder] = {}
+        self.owner_of: Dict[str, str] = {}     # of every reminder in memory
+        self.tenants: OrderedDict = OrderedDict()   # loaded owner -> ids of their reminders, least recently used first
+        self.loaded_until: DateTimeWrapper = None
+        self.clock: Clock = clock
+        self.catch_up: CatchUpQueue = CatchUpQueue(misfire_policy, misfire_cap, catch_up_budget_seconds, misfire_grace_minutes)
+        current_dt_wrapper = self.clock.now_dt_wrapper()
+        self.__extend_horizon(current_dt_wrapper)
+        self.__queue_misfires(current_dt_wrapper)   # caught up by the first ticks
+
+    def load_tenant(self, owner: str) -> Set[str]:
+        # called by every method working on one tenant, loads it on first use
+        reminder_ids = self.tenants.get(owner)
+        if reminder_ids is not None:
+            self.tenants.move_to_end(owner)
+            return reminder_ids
+        reminder_ids = self.tenants[owner] = set()
+        for reminder_data in self.db.get_owner_reminders(owner):
+            reminder_ids.add(reminder_data[0])
+            if reminder_data[0] not in self.reminders:  # unless the horizon paged it in already
+                self.__admit(reminder_from_row(reminder_data), owner)
+        while len(self.tenants) > self.max_resident_tenants:
+            self.evict_tenant(next(iter(self.tenants)))
+        return reminder_ids
+
+    def evict_tenant(self, owner: str) -> None:
+        # the reminders due within the horizon stay scheduled
+        for reminder_id in self.tenants.pop(owner, ()):
+            if self.reminders[reminder_id].next_recur_dt_wrapper > self.loaded_until:
+                self.__forget(reminder_id)
+
+    def add_reminder(self, owner: str, title: str, message: str, recurrence_type: str, start_dt_wrapper: DateTimeWrapper, end_dt_wrapper: DateTimeWrapper = None,
+                     next_recur_dt_wrapper: DateTimeWrapper = None, interval: int = 1, list: List[int] = None, misfire_policy: str = None) -> str:
+        reminder_ids = self.load_tenant(owner)
+        reminder_id = str(uuid4())
+        reminder = Reminder(reminder_id, title, message, recurrence_type, start_dt_wrapper, end_dt_wrapper, next_recur_dt_wrapper, interval, list, misfire_policy)
+        self.db.add_reminder(reminder_id, title, message, recurrence_type, start_dt_wrapper, end_dt_wrapper, next_recur_dt_wrapper, interval, list, owner, misfire_policy)
+        reminder_ids.add(reminder_id)
+        self.__admit(reminder, owner)
+        return reminder_id
+
+    def update_reminder(self, owner: str, reminder_id: str, title: str = None, message: str = None, recurrence_type: str = None, start_dt_wrapper: DateTimeWrapper = None,
+                        end_dt_wrapper: DateTimeWrapper = None, next_recur_dt_wrapper: DateTimeWrapper = None, interval: int = None, list: List[int] = None,
+                        misfire_policy: str = None) -> None:
+        # misfire_policy INHERIT_MISFIRE_POLICY takes the policy of the manager again
+        if misfire_policy is not None and misfire_policy not in MISFIRE_POLICIES + (INHERIT_MISFIRE_POLICY,):
+            raise ValueError(f"unknown misfire policy {misfire_policy}, expected one of {', '.join(MISFIRE_POLICIES)}")
+        reminder_ids = self.__owned(owner, reminder_id)
+        schedule_changed = any(value is not None for value in (recurrence_type, start_dt_wrapper, end_dt_wrapper, interval, list))
+        if schedule_changed and next_recur_dt_wrapper is None:  # recur again from the (new) start time
+            next_recur_dt_wrapper = start_dt_wrapper or self.reminders[reminder_id].recurrence.start_dt_wrapper
+        self.db.update_reminder(reminder_id, title, message, recurrence_type, start_dt_wrapper, end_dt_wrapper, next_recur_dt_wrapper, interval, list, misfire_policy)
+        self.__forget(reminder_id)
+        reminder_ids.add(reminder_id)
+        self.__admit(reminder_from_row(self.db.get_reminder(reminder_id)), owner)
+        self.__queue_misfires(self.clock.now_dt_wrapper())     # caught up again if it is still late
+
+    def remove_reminder(self, owner: str, reminder_id: str) -> None:
+        self.__owned(owner, reminder_id)
+        self.__forget(reminder_id)
+        self.db.remove_reminder(reminder_id)
+
+    def get_tenant_reminders(self, owner: str) -> List[Tuple]:
+        # as ReminderManager.get_all_reminders, for one tenant
+        reminders = sorted((self.reminders[reminder_id] for reminder_id in self.load_tenant(owner)),
+                           key=lambda reminder: (reminder.next_recur_dt_wrapper.epoch_minutes, reminder.reminder_id))
+        return [(reminder.reminder_id, reminder.title, reminder.message, reminder.next_recur_dt_wrapper) for reminder in reminders]
+
+    def is_resident(self, owner: str) -> bool:
+        return owner in self.tenants
+
+    def next_wakeup(self) -> DateTimeWrapper:
+        if self.catch_up:
+            return self.clock.now_dt_wrapper()
+        next_dt_wrapper = self.scheduler.peek()
+        if next_dt_wrapper is None or self.loaded_until < next_dt_wrapper:  # wake up to page in the next reminders
+            next_dt_wrapper = self.loaded_until
+        return next_dt_wrapper
+
+    def seconds_until_next_due(self) -> float:
+        return max(0.0, (self.next_wakeup().my_datetime - self.clock.now()).total_seconds())
+
+    def fire_due_reminders(self) -> List[Tuple[str, Reminder]]:
+        # the (owner, reminder) that fired, once each, see fire_due_occurrences
+        return list({reminder.reminder_id: (owner, reminder) for owner, reminder, _ in self.fire_due_occurrences()}.values())
+
+    def fire_due_occurrences(self) -> List[Tuple[str, Reminder, DateTimeWrapper]]:
+        # advance and persist the due reminders of every tenant, one (owner, reminder, recurrence time) per notification
+        # as ReminderManager.fire_due_occurrences
+        current_dt_wrapper = self.clock.now_dt_wrapper()
+        self.__extend_horizon(current_dt_wrapper)
+        self.__queue_misfires(current_dt_wrapper)
+        due_fired = self.__fire_due(current_dt_wrapper)
+        caught_up_fired, caught_up = self.catch_up.run(current_dt_wrapper, self.reminders, self.scheduler)
+        fired = [(self.owner_of[reminder.reminder_id], reminder, occurrence_dt_wrapper) for reminder, occurrence_dt_wrapper in caught_up_fired + due_fired]
+        advanced = caught_up + [reminder for reminder, _ in due_fired]
+        finished = [reminder.reminder_id for reminder in advanced if reminder.task_finished()]
+        with self.db.batch():
+            self.db.update_next_fires((reminder.reminder_id, reminder.next_recur_dt_wrapper) for reminder in advanced if not reminder.task_finished())
+            self.db.remove_reminders(finished)
+        for reminder_id in finished:
+            self.__forget(reminder_id)
+        for reminder in advanced:
+            # paged in again once the horizon reaches it, unless its tenant is loaded
+            if reminder.reminder_id in self.reminders and self.owner_of[reminder.reminder_id] not in self.tenants and reminder.next_recur_dt_wrapper > self.loaded_until:
+                self.__forget(reminder.reminder_id)
+        return fired
+
+    def close(self) -> None:
+        self.db.close()
+
+    def __owned(self, owner: str, reminder_id: str) -> Set[str]:
+        reminder_ids = self.load_tenant(owner)
+        if reminder_id not in reminder_ids:
+            raise KeyError(f"{owner} has no reminder {reminder_id}")
+        return reminder_ids
+
+    def __fire_due(self, current_dt_wrapper: DateTimeWrapper) -> List[Tuple[Reminder, DateTimeWrapper]]:
+        # as Scheduler.fire_due, with the recurrence each reminder fired for, up to grace minutes before now
+        fired: List[Tuple[Reminder, DateTimeWrapper]] = []
+        for reminder_id in self.scheduler.pop_due(current_dt_wrapper):
+            reminder = self.reminders[reminder_id]
+            occurrence_dt_wrapper = reminder.recurrence.next_recur_dt_wrapper
+            if reminder.should_remind_now(current_dt_wrapper):
+                fired.append((reminder, occurrence_dt_wrapper))
+            if not reminder.task_finished():
+                self.scheduler.schedule(reminder_id, reminder.next_recur_dt_wrapper)
+        return fired
+
+    def __queue_misfires(self, current_dt_wrapper: DateTimeWrapper) -> None:
+        # take the reminders whose next recurrence passed without a tick off the scheduler
+        self.catch_up.extend(self.scheduler.pop_due(self.catch_up.missed_before(current_dt_wrapper).shifted(minutes=-1)))
+
+    def __extend_horizon(self, current_dt_wrapper: DateTimeWrapper) -> None:
+        horizon_dt_wrapper = current_dt_wrapper.shifted(minutes=self.horizon_minutes)
+        if self.loaded_until is not None and not horizon_dt_wrapper > self.loaded_until:
+            return
+        reminders_data = self.db.iter_owned_reminders_due_before(horizon_dt_wrapper, self.loaded_until)
+        self.loaded_until = horizon_dt_wrapper
+        for reminder_data in reminders_data:
+            if reminder_data[0] not in self.reminders:
+                self.__admit(reminder_from_row(reminder_data), reminder_data[10])
+
+    def __admit(self, reminder: Reminder, owner: str) -> None:
+        self.reminders[reminder.reminder_id] = reminder
+        self.owner_of[reminder.reminder_id] = owner
+        if not reminder.task_finished():
+            self.scheduler.schedule(reminder.reminder_id, reminder.next_recur_dt_wrapper)
+
+    def __forget(self, reminder_id: str) -> None:
+        self.scheduler.unschedule(reminder_id)
+        self.catch_up.discard(reminder_id)
+        del self.reminders[reminder_id]
+        owner = self.owner_of.pop(reminder_id)
+        if owner in self.tenants:
+            self.tenants[owner].discard(reminder_id)
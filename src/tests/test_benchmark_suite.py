@@ -0,0 +1,9 @@
+import pytest
+from benchmarks import suite
+
+
+@pytest.mark.parametrize("case", list(suite.CASES))
+def test_every_case_runs_at_a_tiny_size(case, capsys):
+    results = suite.run([10], [case])["results"]
+    assert results and all(key.startswith(f"{case}.") and key.endswith("[10]") for key in results)
+    assert all(seconds >= 0 for seconds in results.values())
@@ -0,0 +1,105 @@
+import pytest
+import atexit
+from datetime_wrapper import DateTimeWrapper
+from reminder import ReminderManager
+from db import DB
+import bulk
+
+
+ICS = """BEGIN:VCALENDAR\r
+VERSION:2.0\r
+BEGIN:VEVENT\r
+UID:1\r
+DTSTART:20240105T093000\r
+SUMMARY:stand\r
+  up\r
+DESCRIPTION:daily\\, short\\nmeeting\r
+RRULE:FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,FR;UNTIL=20241231T000000\r
+BEGIN:VALARM\r
+DESCRIPTION:alarm\r
+END:VALARM\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+DTSTART;VALUE=DATE:20240201\r
+SUMMARY:rent\r
+RRULE:FREQ=MONTHLY;BYMONTHDAY=1,15\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+DTSTART:20240301T080000\r
+SUMMARY:dentist\r
+X-REMINDER-MISFIRE-POLICY:skip\r
+END:VEVENT\r
+END:VCALENDAR\r
+"""
+
+@pytest.fixture
+def reminder_manager(tmp_path):
+    reminder_manager = ReminderManager(DB(str(tmp_path / "reminder_db")))
+    atexit.unregister(reminder_manager.on_exit)
+    yield reminder_manager
+    reminder_manager.db.close()
+
+def test_read_csv(tmp_path):
+    path = tmp_path / "reminders.csv"
+    path.write_text('title,message,recurrence_type,start,end,interval,list,misfire_policy\n'
+                    'gym,lift,Week,2024-01-01 18:00,,1,"1,3,5",\n'
+                    'water,,Hour,2024-01-01T09:00,2024-01-01 17:00,2,,fire_all\n')
+    assert list(bulk.read_csv(str(path))) == [
+        ("gym", "lift", "Week", DateTimeWrapper(2024, 1, 1, 18, 0), None, None, 1, [1, 3, 5], None),
+        ("water", "", "Hour", DateTimeWrapper(2024, 1, 1, 9, 0), DateTimeWrapper(2024, 1, 1, 17, 0), None, 2, None, "fire_all"),
+    ]
+
+def test_read_ics(tmp_path):
+    path = tmp_path / "reminders.ics"
+    path.write_text(ICS, newline="")
+    assert list(bulk.read_ics(str(path))) == [
+        ("stand up", "daily, short\nmeeting", "Week", DateTimeWrapper(2024, 1, 5, 9, 30), DateTimeWrapper(2024, 12, 31, 0, 0), None, 2, [1, 5], None),
+        ("rent", "", "Month", DateTimeWrapper(2024, 2, 1, 0, 0), None, None, 1, [1, 15], None),
+        ("dentist", "", "Once", DateTimeWrapper(2024, 3, 1, 8, 0), None, None, 1, None, "skip"),
+    ]
+
+@pytest.mark.parametrize(
+    "fields, reason",
+    [
+        ({"start": "2024-01-01 09:00"}, "title is required"),
+        ({"title": "t"}, "start is required"),
+        ({"title": "t", "start": "yesterday"}, "start 'yesterday' is not a date time"),
+        ({"title": "t", "start": "2024-01-01 09:00", "recurrence_type": "Year"}, "unknown recurrence type 'Year'"),
+        ({"title": "t", "start": "2024-01-01 09:00", "end": "2023-01-01 09:00", "recurrence_type": "Day"}, "end is before start"),
+        ({"title": "t", "start": "2024-01-01 09:00", "interval": 0, "recurrence_type": "Day"}, "interval must be at least 1"),
+        ({"title": "t", "start": "2024-01-01 09:00", "list": [0, 8], "recurrence_type": "Week"}, "week days go from 1"),
+        ({"title": "t", "start": "2024-01-01 09:00", "list": "32", "recurrence_type": "Month"}, "month days go from 1 to 31"),
+        ({"title": "t", "start": "2024-01-01 09:00", "list": [1], "recurrence_type": "Day"}, "Day reminders take no list"),
+        ({"title": "t", "start": "2024-01-01 09:00", "misfire_policy": "fire_twice"}, "unknown misfire policy 'fire_twice'"),
+    ],
+)
+def test_validate_record(fields, reason):
+    with pytest.raises(bulk.InvalidRecordError, match=f"^here: {reason}"):
+        bulk.validate_record(fields, "here")
+
+@pytest.mark.parametrize("suffix", [".csv", ".jsonl", ".ics"])
+def test_export_import_round_trip(reminder_manager, tmp_path, suffix):
+    reminder_manager.add_reminder("once", "a, b; c\\d" * 30, "Once", DateTimeWrapper(2030, 1, 1, 9, 0))
+    reminder_manager.add_reminder("week", "line\nbreak", "Week", DateTimeWrapper(2030, 1, 2, 9, 0), DateTimeWrapper(2031, 1, 1, 0, 0), None, 2, [2, 4])
+    reminder_manager.add_reminder("month", "", "Month", DateTimeWrapper(2030, 1, 3, 9, 0), None, DateTimeWrapper(2030, 1, 15, 9, 0), 1, [3, 15], misfire_policy="fire_all")
+    path = str(tmp_path / f"reminders{suffix}")
+    assert bulk.export_file(reminder_manager.db, path) == 3
+
+    imported = ReminderManager(DB(str(tmp_path / "imported_db")))
+    atexit.unregister(imported.on_exit)
+    assert bulk.import_file(imported, path) == 3
+    without_ids = lambda reminder_manager: [row[1:] for row in sorted(reminder_manager.db.get_all_reminders(), key=lambda row: row[1])]
+    assert without_ids(imported) == without_ids(reminder_manager)
+    assert [reminder[1] for reminder in imported.get_all_reminders()] == ["once", "week", "month"]
+    assert [reminder.misfire_policy for reminder in imported.reminders.values() if reminder.title == "month"] == ["fire_all"]
+    imported.db.close()
+
+def test_invalid_record_rolls_back_import(reminder_manager, tmp_path):
+    path = tmp_path / "reminders.jsonl"
+    path.write_text('{"title": "ok", "start": "2030-01-01 09:00"}\n'
+                    '{"title": "ok too", "start": "2030-01-01 10:00"}\n'
+                    '{"title": "bad", "start": "2030-01-01 10:00", "interval": "often"}\n')
+    with pytest.raises(bulk.InvalidRecordError, match="reminders.jsonl:3: interval 'often' is not an integer"):
+        bulk.import_file(reminder_manager, str(path), batch_size=1)
+    assert reminder_manager.db.get_all_reminders() == []
+    assert reminder_manager.reminders == {} and len(reminder_manager.scheduler) == 0
@@ -0,0 +1,51 @@
+import pytest
+import random
+from datetime_wrapper import DateTimeWrapper
+from reminder import Reminder
+from scheduler import Scheduler
+
+pytest.importorskip("numpy")
+from columnar import ColumnarScheduler
+
+
+def random_reminders(seed, count):
+    rng = random.Random(seed)
+    reminders = {}
+    for i in range(count):
+        start_dt_wrapper = DateTimeWrapper(2022, 1, 1, 0, 0).shifted(minutes=rng.randint(0, 10 * 24 * 60))
+        end_dt_wrapper = start_dt_wrapper.shifted(days=rng.randint(0, 10)) if rng.random() < 0.3 else None
+        recurrence_type = rng.choice(["Once", "Hour", "Day", "Week", "Month"])
+        weekdays_or_days = rng.sample(range(1, 8), 2) if recurrence_type == "Week" else rng.sample(range(1, 29), 2)
+        reminders[str(i)] = Reminder(str(i), "title", "message", recurrence_type, start_dt_wrapper, end_dt_wrapper, None, rng.randint(1, 3), weekdays_or_days)
+    return reminders
+
+def test_matches_heap_scheduler():
+    heap_reminders, columnar_reminders = random_reminders(0, 500), random_reminders(0, 500)
+    heap, columnar = Scheduler(), ColumnarScheduler(capacity=4)
+    for reminder_id in heap_reminders:
+        heap.schedule(reminder_id, heap_reminders[reminder_id].next_recur_dt_wrapper, heap_reminders[reminder_id].recurrence)
+        columnar.schedule(reminder_id, columnar_reminders[reminder_id].next_recur_dt_wrapper, columnar_reminders[reminder_id].recurrence)
+
+    current_dt_wrapper = DateTimeWrapper(2022, 1, 1, 0, 0)
+    for tick in range(300):
+        current_dt_wrapper = current_dt_wrapper.shifted(minutes=97)
+        heap_due = heap.fire_due(current_dt_wrapper, heap_reminders)
+        columnar_due = columnar.fire_due(current_dt_wrapper, columnar_reminders)
+        assert sorted(reminder.reminder_id for reminder in heap_due) == sorted(reminder.reminder_id for reminder in columnar_due)
+        for reminder in columnar_due:
+            heap_reminder = heap_reminders[reminder.reminder_id]
+            assert reminder.next_recur_dt_wrapper == heap_reminder.next_recur_dt_wrapper
+            assert reminder.task_finished() == heap_reminder.task_finished()
+        assert len(heap) == len(columnar)
+        assert heap.peek() == columnar.peek()
+
+def test_unschedule_and_reuse_slot():
+    columnar = ColumnarScheduler(capacity=1)
+    columnar.schedule("a", DateTimeWrapper(2022, 1, 1, 10, 30))
+    columnar.schedule("b", DateTimeWrapper(2022, 1, 2, 10, 30))
+    columnar.unschedule("a")
+    columnar.schedule("c", DateTimeWrapper(2022, 1, 3, 10, 30))
+    assert columnar.size == 2
+    assert columnar.peek() == DateTimeWrapper(2022, 1, 2, 10, 30)
+    assert columnar.pop_due(DateTimeWrapper(2022, 1, 3, 10, 30)) == ["b", "c"]
+    assert len(columnar) == 0 and columnar.peek() is None
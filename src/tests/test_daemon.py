@@ -0,0 +1,107 @@
+import asyncio
+from daemon import ReminderDaemon, NotificationSink, LogFileSink, UnixSocketSink
+from tests.test_reminder import minutes_from_now
+
+
+class RecordingSink(NotificationSink):
+    def __init__(self, delay_seconds=0):
+        super().__init__()
+        self.delay_seconds = delay_seconds
+        self.received = asyncio.Queue()
+
+    async def send(self, notification_text):
+        await asyncio.sleep(self.delay_seconds)
+        await self.received.put(notification_text)
+
+class FailingSink(NotificationSink):
+    async def send(self, notification_text):
+        raise OSError("sink is down")
+
+def run_daemon(tmp_path, sinks, scenario, **kwargs):
+    async def main():
+        reminder_daemon = ReminderDaemon(sinks, str(tmp_path / "reminder_db"), **kwargs)
+        daemon_task = asyncio.create_task(reminder_daemon.run())
+        while reminder_daemon.reminder_manager is None or reminder_daemon.wakeup is None:
+            await asyncio.sleep(0.01)
+        try:
+            return await asyncio.wait_for(scenario(reminder_daemon), 5)
+        finally:
+            reminder_daemon.stop()
+            await daemon_task
+    return asyncio.run(main())
+
+def test_slow_and_failing_sinks_do_not_delay_other_sinks(tmp_path):
+    async def scenario(reminder_daemon):
+        fast, slow, failing = reminder_daemon.sinks
+        await reminder_daemon.add_reminder("first", "message", "Once", minutes_from_now(-1))
+        await reminder_daemon.add_reminder("second", "message", "Once", minutes_from_now(-1))
+        received = [await fast.received.get(), await fast.received.get()]
+        assert slow.received.empty()
+        while reminder_daemon.dispatcher.failed < 2:
+            await asyncio.sleep(0.01)
+        assert await reminder_daemon.get_all_reminders() == []
+        return received
+
+    received = run_daemon(tmp_path, [RecordingSink(), RecordingSink(delay_seconds=60), FailingSink()], scenario, max_attempts=1, close_timeout_seconds=0.5)
+    assert sorted(text.split(",")[0].split("=")[1].strip() for text in received) == ["first", "second"]
+
+def test_close_delivers_queued_notifications(tmp_path):
+    async def scenario(reminder_daemon):
+        await reminder_daemon.add_reminder("first", "message", "Once", minutes_from_now(-1))
+        await reminder_daemon.add_reminder("second", "message", "Once", minutes_from_now(-1))
+        while await reminder_daemon.get_all_reminders():    # fired and queued, not delivered yet
+            await asyncio.sleep(0.01)
+        assert reminder_daemon.sinks[0].received.empty()
+        return reminder_daemon
+
+    reminder_daemon = run_daemon(tmp_path, [RecordingSink(delay_seconds=0.2)], scenario)
+    assert reminder_daemon.sinks[0].received.qsize() == 2 and reminder_daemon.dispatcher.dropped == 0
+
+def test_log_file_and_unix_socket_sinks(tmp_path):
+    log_path, socket_path = str(tmp_path / "reminders.log"), str(tmp_path / "reminders.sock")
+
+    async def scenario(reminder_daemon):
+        reader, writer = await asyncio.open_unix_connection(socket_path)
+        await asyncio.sleep(0.05)   # let the server register the client
+        await reminder_daemon.add_reminder("hello", "from the daemon", "Once", minutes_from_now(-1))
+        line = await reader.readline()
+        writer.close()
+        while reminder_daemon.sinks[0].delivered == 0:
+            await asyncio.sleep(0.01)
+        return line
+
+    line = run_daemon(tmp_path, [LogFileSink(log_path), UnixSocketSink(socket_path)], scenario)
+    assert b"tile = hello, message = from the daemon" in line
+    with open(log_path) as log_file:
+        assert "from the daemon" in log_file.read()
+
+class StalledWriter:
+    def __init__(self, delay_seconds=0):
+        self.delay_seconds = delay_seconds
+        self.lines = []
+        self.closed = False
+
+    def write(self, line):
+        self.lines.append(line)
+
+    async def drain(self):
+        await asyncio.sleep(self.delay_seconds)
+
+    def close(self):
+        self.closed = True
+
+def test_unix_socket_sink_drops_clients_that_time_out():
+    async def main():
+        sink = UnixSocketSink("unused", write_timeout_seconds=0.3)
+        stalled, slow, fast = StalledWriter(60), StalledWriter(0.2), StalledWriter()
+        sink.writers = [stalled, slow, fast]
+        start = asyncio.get_running_loop().time()
+        await sink.send("first")
+        elapsed = asyncio.get_running_loop().time() - start
+        await sink.send("second")
+        return sink, stalled, slow, fast, elapsed
+
+    sink, stalled, slow, fast, elapsed = asyncio.run(main())
+    assert elapsed < 0.5   # written concurrently, one after another would take the timeout plus the slow client
+    assert sink.writers == [slow, fast] and stalled.closed
+    assert stalled.lines == [b"first\n"] and slow.lines == fast.lines == [b"first\n", b"second\n"]
@@ -88,3 +88,15 @@ def test_get_diff_days_hours_minutes(dt_wrapper1, dt_wrapper2, expected_diff):
 )
 def test_get_diff_weeks(dt_wrapper1, dt_wrapper2, expected_diff):
     assert dt_wrapper1.get_diff_weeks(dt_wrapper2) == expected_diff
+
+@pytest.mark.parametrize(
+    "dt_wrapper, expected_epoch_minutes",
+    [
+        (DateTimeWrapper(1970, 1, 1, 0, 0), 0),
+        (DateTimeWrapper(1970, 1, 2, 1, 1), 24 * 60 + 61),
+        (DateTimeWrapper(2022, 1, 1, 10, 30), 27350550),
+    ],
+)
+def test_epoch_minutes(dt_wrapper, expected_epoch_minutes):
+    assert dt_wrapper.to_epoch_minutes() == expected_epoch_minutes
+    assert DateTimeWrapper.from_epoch_minutes(expected_epoch_minutes) == dt_wrapper
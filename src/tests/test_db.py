@@ -0,0 +1,224 @@
+import pytest
+import sqlite3
+import db
+from db import DB
+from datetime_wrapper import DateTimeWrapper
+
+
+LEGACY_SCHEMA = '''
+    CREATE TABLE datetime_wrappers (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        year INTEGER, month INTEGER, day INTEGER, hour INTEGER, minute INTEGER
+    );
+    CREATE TABLE reminders (
+        reminder_id TEXT PRIMARY KEY,
+        title TEXT,
+        message TEXT,
+        recurrence_type TEXT,
+        start_dt_wrapper_id INTEGER,
+        end_dt_wrapper_id INTEGER,
+        next_recur_dt_wrapper_id INTEGER,
+        interval INTEGER,
+        list TEXT
+    );
+    INSERT INTO datetime_wrappers (year, month, day, hour, minute) VALUES (2022, 1, 1, 10, 30);
+    INSERT INTO datetime_wrappers (year, month, day, hour, minute) VALUES (2022, 9, 9, 14, 30);
+    INSERT INTO datetime_wrappers (year, month, day, hour, minute) VALUES (2022, 3, 2, 10, 30);
+    INSERT INTO reminders VALUES ('a', 'title a', 'message a', 'Week', 1, 2, 3, 2, '1,3');
+    INSERT INTO reminders VALUES ('b', 'title b', 'message b', 'Once', 1, NULL, 1, 0, '');
+    INSERT INTO reminders VALUES ('c', 'title c', 'message c', 'Day', 4, NULL, 1, 1, '');
+'''
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "reminder_db")
+    monkeypatch.setattr(db, "DB_NAME", path)
+    return path
+
+@pytest.fixture
+def reminder_db(db_path):
+    reminder_db = DB()
+    yield reminder_db
+    reminder_db.close()
+
+def test_add_and_get_all_reminders(reminder_db):
+    reminder_db.add_reminder("a", "title", "message", "Week", DateTimeWrapper(2022, 1, 1, 10, 30), None, None, 2, [1, 3])
+    reminder_db.add_reminder("b", "title", "message", "Day", DateTimeWrapper(2022, 1, 1, 10, 30), misfire_policy="skip")
+    assert reminder_db.get_all_reminders() == [
+        ("a", "title", "message", "Week", 2, "1,3", 27350550, None, 27350550, None),
+        ("b", "title", "message", "Day", 1, "", 27350550, None, 27350550, "skip"),
+    ]
+
+def test_update_and_remove_reminder(reminder_db):
+    reminder_db.add_reminder("a", "title", "message", "Hour", DateTimeWrapper(2022, 1, 1, 10, 30))
+    reminder_db.update_reminder("a", title="new title", next_recur_dt_wrapper=DateTimeWrapper(2022, 1, 1, 11, 30))
+    assert reminder_db.get_all_reminders()[0][1] == "new title"
+    assert reminder_db.get_all_reminders()[0][8] == 27350550 + 60
+    reminder_db.remove_reminder("a")
+    assert reminder_db.get_all_reminders() == []
+
+def test_get_reminders_due_before(reminder_db):
+    for i, day in enumerate([3, 1, 2]):
+        reminder_db.add_reminder(str(i), "title", "message", "Day", DateTimeWrapper(2022, 1, day, 10, 30))
+    due = reminder_db.get_reminders_due_before(DateTimeWrapper(2022, 1, 2, 10, 30))
+    assert [row[0] for row in due] == ["1", "2"]
+
+def test_next_fire_query_uses_index(reminder_db):
+    plan = reminder_db.conn.execute("EXPLAIN QUERY PLAN SELECT * FROM reminders WHERE next_fire <= 0 ORDER BY next_fire").fetchall()
+    assert "reminders_next_fire" in plan[0][-1]
+
+def test_migrate_from_datetime_wrappers(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.executescript(LEGACY_SCHEMA)
+    conn.close()
+
+    reminder_db = DB()
+    rows = sorted(reminder_db.get_all_reminders())
+    reminder_db.close()
+
+    start = DateTimeWrapper(2022, 1, 1, 10, 30).to_epoch_minutes()
+    assert rows == [
+        ("a", "title a", "message a", "Week", 2, "1,3", start, DateTimeWrapper(2022, 9, 9, 14, 30).to_epoch_minutes(), DateTimeWrapper(2022, 3, 2, 10, 30).to_epoch_minutes(), None),
+        ("b", "title b", "message b", "Once", 0, "", start, None, start, None),
+        ("c", "title c", "message c", "Day", 1, "", start, None, start, None),  # dangling start row falls back to next recurrence
+    ]
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == db.SCHEMA_VERSION
+    assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'datetime_wrappers'").fetchall() == []
+    conn.close()
+
+def test_batch_commits_once(reminder_db):
+    with reminder_db.batch():
+        reminder_db.add_reminder("a", "title", "message", "Day", DateTimeWrapper(2022, 1, 1, 10, 30))
+        with reminder_db.batch():
+            reminder_db.add_reminder("b", "title", "message", "Day", DateTimeWrapper(2022, 1, 1, 10, 30))
+        reminder_db.update_reminder("a", title="new title")
+        assert reminder_db.conn.in_transaction
+    assert not reminder_db.conn.in_transaction
+    assert len(reminder_db.get_all_reminders()) == 2
+
+def test_batch_rolls_back_on_error(reminder_db):
+    reminder_db.add_reminder("a", "title", "message", "Day", DateTimeWrapper(2022, 1, 1, 10, 30))
+    with pytest.raises(ValueError):
+        with reminder_db.batch():
+            reminder_db.remove_reminder("a")
+            reminder_db.add_reminder("b", "title", "message", "Day", DateTimeWrapper(2022, 1, 1, 10, 30))
+            raise ValueError
+    assert [row[0] for row in reminder_db.get_all_reminders()] == ["a"]
+
+def test_bulk_add_update_and_remove(reminder_db):
+    start_dt_wrapper = DateTimeWrapper(2022, 1, 1, 10, 30)
+    reminder_db.add_reminders((str(i), "title", "message", "Day", start_dt_wrapper, None, None, 1, None, None) for i in range(3))
+    reminder_db.update_next_fires([("0", DateTimeWrapper(2022, 1, 3, 10, 30)), ("2", DateTimeWrapper(2022, 1, 2, 10, 30))])
+    assert [row[0] for row in reminder_db.get_reminders_due_before(DateTimeWrapper(2022, 1, 5, 0, 0))] == ["1", "2", "0"]
+    reminder_db.remove_reminders(["0", "1"])
+    assert [row[0] for row in reminder_db.get_all_reminders()] == ["2"]
+
+@pytest.mark.parametrize(
+    "profile, expected_journal_mode, expected_synchronous",
+    [
+        ("compat", "delete", 2),
+        ("durable", "wal", 2),
+        ("fast", "wal", 1),
+        (db.StorageProfile(journal_mode="memory", synchronous="off"), "memory", 0),
+    ],
+)
+def test_storage_profile(tmp_path, profile, expected_journal_mode, expected_synchronous):
+    reminder_db = DB(str(tmp_path / "profile_db"), profile)
+    assert reminder_db.conn.execute("PRAGMA journal_mode").fetchone()[0] == expected_journal_mode
+    assert reminder_db.conn.execute("PRAGMA synchronous").fetchone()[0] == expected_synchronous
+    reminder_db.close()
+
+@pytest.mark.parametrize(
+    "settings",
+    [
+        dict(journal_mode="wal; DROP TABLE reminders"),
+        dict(synchronous="sometimes"),
+        dict(temp_store="disk"),
+        dict(cache_size_kib="1; DROP TABLE reminders"),
+    ],
+)
+def test_storage_profile_rejects_unknown_settings(settings):
+    with pytest.raises(ValueError):
+        db.StorageProfile(**settings)
+
+def test_wal_reader_sees_committed_writes_while_writer_is_open(tmp_path):
+    path = str(tmp_path / "shared_db")
+    writer, reader = DB(path, "fast"), DB(path, "fast")
+    with writer.batch():
+        writer.add_reminder("a", "title", "message", "Day", DateTimeWrapper(2022, 1, 1, 10, 30))
+        assert reader.get_all_reminders() == []   # readers are not blocked by the open write transaction
+    assert len(reader.get_all_reminders()) == 1
+    writer.close()
+    reader.close()
+
+@pytest.fixture
+def searchable_db(reminder_db):
+    rows = [
+        ("a", "Dentist", "call the dentist office", "Once", DateTimeWrapper(2022, 1, 3, 9, 0)),
+        ("b", "Standup", "daily team meeting", "Day", DateTimeWrapper(2022, 1, 1, 9, 30)),
+        ("c", "Team lunch", "Café on the corner", "Week", DateTimeWrapper(2022, 1, 2, 12, 0)),
+        ("d", "Rent", "pay the rent", "Month", DateTimeWrapper(2022, 1, 1, 8, 0)),
+    ]
+    reminder_db.add_reminders((reminder_id, title, message, recurrence_type, start_dt_wrapper, None, None, 1, None, None)
+                              for reminder_id, title, message, recurrence_type, start_dt_wrapper in rows)
+    return reminder_db
+
+@pytest.mark.parametrize(
+    "filters, expected_ids",
+    [
+        ({}, ["d", "b", "c", "a"]),
+        ({"text": "team"}, ["b", "c"]),
+        ({"text": "TEAM meet"}, ["b"]),     # every word, as a prefix
+        ({"text": "cafe"}, ["c"]),
+        ({"text": 'rent" OR "team'}, []),   # never parsed as query syntax
+        ({"text": "  ..  "}, ["d", "b", "c", "a"]),
+        ({"recurrence_type": "Day"}, ["b"]),
+        ({"text": "team", "recurrence_type": "Week"}, ["c"]),
+        ({"from_dt_wrapper": DateTimeWrapper(2022, 1, 1, 9, 30), "until_dt_wrapper": DateTimeWrapper(2022, 1, 2, 12, 0)}, ["b", "c"]),
+        ({"text": "the", "until_dt_wrapper": DateTimeWrapper(2022, 1, 2, 0, 0)}, ["d"]),
+    ],
+)
+def test_search_reminders(searchable_db, filters, expected_ids):
+    assert [row[0] for row in searchable_db.search_reminders(**filters)] == expected_ids
+    assert searchable_db.count_search_results(**filters) == len(expected_ids)
+
+def test_search_paging_and_sync(searchable_db):
+    assert [row[0] for row in searchable_db.search_reminders(offset=1, limit=2)] == ["b", "c"]
+    searchable_db.update_reminder("a", title="Doctor")
+    searchable_db.update_next_fires([("c", DateTimeWrapper(2022, 1, 9, 12, 0))])
+    searchable_db.remove_reminder("b")
+    assert [row[0] for row in searchable_db.search_reminders("dentist")] == ["a"]    # still in the message
+    assert [row[0] for row in searchable_db.search_reminders("doctor")] == ["a"]
+    assert [row[0] for row in searchable_db.search_reminders("team")] == ["c"]
+    assert searchable_db.search_reminders("team")[0][8] == DateTimeWrapper(2022, 1, 9, 12, 0).to_epoch_minutes()
+
+def test_upgrade_from_version_2(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.executescript('''
+        CREATE TABLE reminders (reminder_id TEXT PRIMARY KEY, title TEXT, message TEXT, recurrence_type TEXT,
+                                start_at INTEGER, end_at INTEGER, next_fire INTEGER, interval INTEGER, list TEXT);
+        CREATE INDEX reminders_next_fire ON reminders (next_fire);
+        INSERT INTO reminders VALUES ('a', 'Dentist', 'message', 'Once', 27350550, NULL, 27350550, 0, '');
+        PRAGMA user_version = 2;
+    ''')
+    conn.close()
+
+    reminder_db = DB()
+    assert [row[0] for row in reminder_db.search_reminders("dent")] == ["a"]    # existing rows are indexed
+    assert [row[0] for row in reminder_db.get_owner_reminders("")] == ["a"]
+    assert reminder_db.conn.execute("PRAGMA user_version").fetchone()[0] == db.SCHEMA_VERSION
+    reminder_db.close()
+
+def test_owner_reminders(reminder_db):
+    start_dt_wrapper = DateTimeWrapper(2022, 1, 1, 10, 30)
+    reminder_db.add_reminder("a", "title", "message", "Day", start_dt_wrapper.shifted(days=1), owner="alice")
+    reminder_db.add_reminders([(str(i), "title", "message", "Day", start_dt_wrapper.shifted(days=-i), None, None, 1, None, None) for i in range(3)], owner="bob")
+    reminder_db.add_reminder("c", "title", "message", "Day", start_dt_wrapper)
+    assert [row[0] for row in reminder_db.get_owner_reminders("bob")] == ["2", "1", "0"]
+    assert reminder_db.count_owner_reminders("alice") == 1 and reminder_db.count_owner_reminders("") == 1
+    assert [(row[0], row[10]) for row in reminder_db.iter_owned_reminders_due_before(start_dt_wrapper, start_dt_wrapper.shifted(days=-2))] == [
+        ("1", "bob"), ("0", "bob"), ("c", ""),
+    ]
+    plan = reminder_db.conn.execute("EXPLAIN QUERY PLAN SELECT * FROM reminders WHERE owner = 'bob' ORDER BY next_fire").fetchall()
+    assert "reminders_owner_next_fire" in plan[0][-1]
@@ -0,0 +1,110 @@
+import pytest
+import threading
+import atexit
+from datetime_wrapper import DateTimeWrapper
+from dispatch import DispatchPipeline, CallbackSink, PrintSink
+from reminder import Reminder, ReminderManager
+from metrics import Metrics
+from db import DB
+from tests.test_reminder import minutes_from_now
+
+
+MINUTE = DateTimeWrapper(2024, 1, 1, 9, 0)
+
+def make_occurrences(*titles):
+    return [(Reminder(title, title, "message", "Day", MINUTE), MINUTE) for title in titles]
+
+class BlockingSink(CallbackSink):
+    # holds its first delivery until released, so the next dispatches queue up behind it
+    def __init__(self):
+        super().__init__(self.__record)
+        self.deliveries = []
+        self.entered = threading.Event()
+        self.released = threading.Event()
+
+    def __record(self, notifications, fire_dt_wrapper):
+        self.entered.set()
+        self.released.wait(5)
+        self.deliveries.append(([notification[1] for notification in notifications], fire_dt_wrapper))
+
+@pytest.fixture
+def metrics():
+    return Metrics()
+
+def test_same_minute_is_coalesced_while_queued(metrics):
+    sink = BlockingSink()
+    pipeline = DispatchPipeline({"blocking": sink}, workers=1, metrics=metrics)
+    pipeline.dispatch(make_occurrences("a"), MINUTE)
+    assert sink.entered.wait(5)
+    pipeline.dispatch(make_occurrences("b"), MINUTE)
+    pipeline.dispatch(make_occurrences("c", "d"), MINUTE)
+    pipeline.dispatch(make_occurrences("e"), MINUTE.shifted(minutes=1))
+    assert metrics.gauge("dispatch_queue_depth", "", sink="blocking").value == 2
+    sink.released.set()
+    pipeline.close()
+    assert sink.deliveries == [(["a"], MINUTE), (["b", "c", "d"], MINUTE), (["e"], MINUTE.shifted(minutes=1))]
+    assert pipeline.delivered == 5 and pipeline.coalesced == 2
+    assert metrics.counter("dispatch_coalesced_total", "", sink="blocking").value == 2
+    assert metrics.histogram("dispatch_batch_size", "", sink="blocking").count == 3
+
+def test_batches_are_split_at_max_batch_size():
+    deliveries = []
+    pipeline = DispatchPipeline({"callback": CallbackSink(lambda notifications, _: deliveries.append(len(notifications)))}, workers=1, max_batch_size=2)
+    pipeline.dispatch(make_occurrences(*"abcde"), MINUTE)
+    pipeline.close()
+    assert deliveries == [2, 2, 1]
+
+def test_full_queue_drops_instead_of_blocking(metrics):
+    sink = BlockingSink()
+    pipeline = DispatchPipeline({"blocking": sink}, workers=1, queue_size=1, metrics=metrics)
+    pipeline.dispatch(make_occurrences("a"), MINUTE)
+    assert sink.entered.wait(5)
+    pipeline.dispatch(make_occurrences("b"), MINUTE)
+    pipeline.dispatch(make_occurrences("c", "d"), MINUTE.shifted(minutes=1))    # another minute needs another batch
+    sink.released.set()
+    pipeline.close()
+    assert [titles for titles, _ in sink.deliveries] == [["a"], ["b"]]
+    assert pipeline.dropped == 2 and metrics.counter("dispatch_dropped_total", "", sink="blocking").value == 2
+
+def test_a_stuck_sink_does_not_hold_back_the_others():
+    stuck, deliveries = BlockingSink(), []
+    pipeline = DispatchPipeline({"stuck": stuck, "callback": CallbackSink(lambda notifications, _: deliveries.append(len(notifications)))},
+                                close_timeout_seconds=0.1)
+    pipeline.dispatch(make_occurrences("a"), MINUTE)
+    assert stuck.entered.wait(5)
+    pipeline.dispatch(make_occurrences("b"), MINUTE.shifted(minutes=1))
+    pipeline.dispatch(make_occurrences("c"), MINUTE.shifted(minutes=2))
+    pipeline.close()
+    assert deliveries == [1, 1, 1]
+    assert pipeline.dropped == 2    # still queued for the stuck sink when the close timed out
+    stuck.released.set()
+
+@pytest.mark.parametrize("failures, delivered, failed", [(2, 1, 0), (3, 0, 1)])
+def test_failed_deliveries_are_retried(metrics, failures, delivered, failed):
+    attempts = []
+    def deliver(notifications, fire_dt_wrapper):
+        attempts.append(len(notifications))
+        if len(attempts) <= failures:
+            raise ConnectionError("sink is down")
+    pipeline = DispatchPipeline({"flaky": CallbackSink(deliver)}, workers=1, max_attempts=3, backoff_seconds=0.001, metrics=metrics)
+    pipeline.dispatch(make_occurrences("a"), MINUTE)
+    pipeline.close()
+    assert len(attempts) == 3
+    assert (pipeline.delivered, pipeline.failed) == (delivered, failed)
+    assert metrics.counter("dispatch_retries_total", "", sink="flaky").value == 2
+
+def test_manager_dispatches_a_tick_as_one_batch_per_sink(tmp_path, capsys):
+    deliveries = []
+    pipeline = DispatchPipeline({"print": PrintSink(), "callback": CallbackSink(lambda notifications, _: deliveries.append(notifications))})
+    reminder_manager = ReminderManager(DB(str(tmp_path / "reminder_db")), dispatcher=pipeline)
+    atexit.unregister(reminder_manager.on_exit)
+    start_dt_wrapper = minutes_from_now(-1)
+    first_id = reminder_manager.add_reminder("first", "message", "Day", start_dt_wrapper)
+    second_id = reminder_manager.add_reminder("second", "message", "Once", minutes_from_now(0))
+    reminder_manager.notify_due_reminders()
+    reminder_manager.close()
+    assert [[notification[:3] for notification in notifications] for notifications in deliveries] == [[(first_id, "first", "message"), (second_id, "second", "message")]]
+    assert deliveries[0][0][3] == start_dt_wrapper.shifted(days=1)  # the next recurrence as of the fire
+    assert deliveries[0][0][4] == start_dt_wrapper  # the missed recurrence it fired for
+    out = capsys.readouterr().out
+    assert "first" in out and "second" in out
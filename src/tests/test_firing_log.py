@@ -0,0 +1,152 @@
+import pytest
+import atexit
+import contextlib
+from datetime_wrapper import DateTimeWrapper
+from firing_log import FiringLog
+from reminder import ReminderManager
+from clock import ManualClock
+from db import DB
+from tests.test_reminder import minutes_from_now
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    return str(tmp_path / "firing_log.jsonl")
+
+@pytest.fixture
+def reminder_db(tmp_path):
+    reminder_db = DB(str(tmp_path / "reminder_db"))
+    yield reminder_db
+    reminder_db.close()
+
+def test_append_and_replay(log_path):
+    firing_log = FiringLog(log_path, group_size=3, group_seconds=60)
+    firing_log.append([("a", DateTimeWrapper.from_epoch_minutes(1)), ("b", DateTimeWrapper.from_epoch_minutes(2))])
+    assert firing_log.syncs == 0
+    firing_log.append([("a", DateTimeWrapper.from_epoch_minutes(3))])
+    assert firing_log.syncs == 1 and firing_log.unsynced == 0
+    firing_log.append([])
+    assert list(firing_log.replay()) == [("a", 1), ("b", 2), ("a", 3)]
+    firing_log.close()
+    assert len(FiringLog(log_path)) == 3
+
+def test_torn_last_line_is_skipped(log_path):
+    with open(log_path, "w") as f:
+        f.write('["a", 1]\n["b", 2')
+    firing_log = FiringLog(log_path)
+    firing_log.append([("c", DateTimeWrapper.from_epoch_minutes(3))])
+    assert list(firing_log.replay()) == [("a", 1), ("c", 3)]
+    firing_log.close()
+
+def test_compact(log_path, reminder_db):
+    reminder_db.add_reminder("a", "title", "message", "Day", DateTimeWrapper.from_epoch_minutes(0))
+    firing_log = FiringLog(log_path)
+    firing_log.append([("a", DateTimeWrapper.from_epoch_minutes(1440)), ("removed", DateTimeWrapper.from_epoch_minutes(5))])
+    firing_log.append([("a", DateTimeWrapper.from_epoch_minutes(2880))])
+    assert firing_log.compact(reminder_db) == 2
+    assert reminder_db.get_reminder("a")[8] == 2880
+    assert len(firing_log) == 0 and list(firing_log.replay()) == []
+    firing_log.close()
+
+@pytest.mark.parametrize("fails", [False, True])
+def test_compact_waits_for_the_batch(log_path, reminder_db, fails):
+    reminder_db.add_reminder("a", "title", "message", "Day", DateTimeWrapper.from_epoch_minutes(0))
+    firing_log = FiringLog(log_path)
+    firing_log.append([("a", DateTimeWrapper.from_epoch_minutes(1440))])
+    with pytest.raises(RuntimeError) if fails else contextlib.nullcontext():
+        with reminder_db.batch():
+            assert firing_log.compact(reminder_db) == 0
+            reader = DB(reminder_db.db_name)    # sees committed rows only
+            assert reader.get_reminder("a")[8] == 0
+            reader.close()
+            assert len(firing_log) == 1
+            if fails:
+                raise RuntimeError()
+    assert len(firing_log) == (1 if fails else 0)   # a rolled back batch leaves the log as it was
+    assert reminder_db.get_reminder("a")[8] == (0 if fails else 1440)
+    firing_log.close()
+
+def test_a_discarded_entry_is_not_replayed(log_path):
+    firing_log = FiringLog(log_path)
+    firing_log.append([("a", DateTimeWrapper.from_epoch_minutes(1440)), ("b", DateTimeWrapper.from_epoch_minutes(60))])
+    firing_log.discard("a")
+    firing_log.discard("c")     # nothing logged, nothing written
+    assert firing_log.pending == {"b": 60}
+    firing_log.close()
+    reopened = FiringLog(log_path)
+    assert reopened.pending == {"b": 60} and len(reopened) == 3
+    reopened.close()
+
+@pytest.mark.parametrize("lazy_horizon_minutes", [None, 60])
+def test_manager_logs_fires_and_replays_them(log_path, reminder_db, lazy_horizon_minutes):
+    def make_manager():
+        reminder_manager = ReminderManager(reminder_db, lazy_horizon_minutes, firing_log=FiringLog(log_path))
+        atexit.unregister(reminder_manager.on_exit)
+        return reminder_manager
+
+    reminder_manager = make_manager()
+    hourly_id = reminder_manager.add_reminder("hourly", "message", "Hour", minutes_from_now(-90))
+    daily_id = reminder_manager.add_reminder("daily", "message", "Day", minutes_from_now(-5))
+    reminder_manager.fire_due_reminders()
+    assert reminder_db.get_reminder(hourly_id)[8] == minutes_from_now(-90).epoch_minutes  # only in the log so far
+    assert len(reminder_manager.firing_log) == 2
+
+    reminder_manager.firing_log.close()     # a crash before compaction, the log is replayed by the next manager
+    reloaded = make_manager()
+    assert reminder_db.get_reminder(hourly_id)[8] == minutes_from_now(30).epoch_minutes
+    assert [reminder[0] for reminder in reloaded.get_all_reminders()] == [hourly_id, daily_id]
+
+    reloaded.firing_log.append([(daily_id, minutes_from_now(999))])   # logged before the update
+    reloaded.update_reminder(daily_id, start_dt_wrapper=minutes_from_now(10))
+    reloaded.compact_firing_log()
+    reloaded.firing_log.close()
+    assert reminder_db.get_reminder(daily_id)[8] == minutes_from_now(10).epoch_minutes
+
+def test_lazy_queries_show_logged_next_fires_without_compacting(log_path, reminder_db):
+    clock = ManualClock(DateTimeWrapper(2030, 1, 1, 9, 0))
+    reminder_manager = ReminderManager(reminder_db, 60, firing_log=FiringLog(log_path), clock=clock)
+    atexit.unregister(reminder_manager.on_exit)
+    daily_id = reminder_manager.add_reminder("daily", "message", "Day", DateTimeWrapper(2030, 1, 1, 9, 0))
+    later_id = reminder_manager.add_reminder("later", "message", "Day", DateTimeWrapper(2030, 1, 1, 12, 0))
+    reminder_manager.fire_due_reminders()
+    tomorrow = DateTimeWrapper(2030, 1, 2, 9, 0)
+    assert reminder_manager.get_all_reminders()[-1] == (daily_id, "daily", "message", tomorrow)
+    assert (daily_id, "daily", "message", tomorrow) in reminder_manager.get_reminders_page(0, 10)
+    assert reminder_manager.search("daily") == [(daily_id, "daily", "message", tomorrow)]
+    assert reminder_manager.count_search_results("daily") == 1
+    agenda = reminder_manager.agenda(DateTimeWrapper(2030, 1, 1, 10, 0), DateTimeWrapper(2030, 1, 2, 10, 0))
+    assert [(reminder_id, dt_wrapper) for reminder_id, _, _, dt_wrapper in agenda] == [(later_id, DateTimeWrapper(2030, 1, 1, 12, 0)), (daily_id, tomorrow)]
+    assert len(reminder_manager.firing_log) == 1     # nothing compacted
+    assert reminder_db.get_reminder(daily_id)[8] == DateTimeWrapper(2030, 1, 1, 9, 0).epoch_minutes
+    reminder_manager.close()
+
+def test_an_update_keeps_the_logged_next_fire(log_path, reminder_db):
+    clock = ManualClock(DateTimeWrapper(2030, 1, 1, 9, 0))
+    reminder_manager = ReminderManager(reminder_db, firing_log=FiringLog(log_path), clock=clock)
+    atexit.unregister(reminder_manager.on_exit)
+    daily_id = reminder_manager.add_reminder("daily", "message", "Day", DateTimeWrapper(2030, 1, 1, 9, 0))
+    reminder_manager.fire_due_reminders()
+    reminder_manager.update_reminder(daily_id, title="renamed")
+    assert reminder_db.get_reminder(daily_id)[1:2] + reminder_db.get_reminder(daily_id)[8:9] == ("renamed", DateTimeWrapper(2030, 1, 2, 9, 0).epoch_minutes)
+    assert reminder_manager.firing_log.pending == {}
+    reminder_manager.close()
+
+def test_lazy_horizon_pages_in_logged_reminders_without_compacting(log_path, reminder_db):
+    clock = ManualClock(DateTimeWrapper(2030, 1, 1, 9, 0))
+    reminder_manager = ReminderManager(reminder_db, 60, firing_log=FiringLog(log_path), clock=clock)
+    atexit.unregister(reminder_manager.on_exit)
+    daily_id = reminder_manager.add_reminder("daily", "message", "Day", DateTimeWrapper(2030, 1, 1, 9, 0))
+    assert [reminder.reminder_id for reminder in reminder_manager.fire_due_reminders()] == [daily_id]
+    assert daily_id not in reminder_manager.reminders    # paged out, its next recurrence only logged
+
+    fired = []
+    for _ in range(24 * 60):
+        clock.advance(1)
+        fired += [(reminder.reminder_id, clock.now_dt_wrapper()) for reminder in reminder_manager.fire_due_reminders()]
+    assert fired == [(daily_id, DateTimeWrapper(2030, 1, 2, 9, 0))]
+    assert len(reminder_manager.firing_log) == 2     # the horizon moved every tick without compacting the log
+    assert reminder_db.get_reminder(daily_id)[8] == DateTimeWrapper(2030, 1, 1, 9, 0).epoch_minutes
+    reminder_manager.close()     # compacts
+    reopened = DB(reminder_db.db_name)
+    assert reopened.get_reminder(daily_id)[8] == DateTimeWrapper(2030, 1, 3, 9, 0).epoch_minutes
+    reopened.close()
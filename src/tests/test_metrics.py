@@ -0,0 +1,117 @@
+import pytest
+import atexit
+import json
+import threading
+from metrics import Metrics, Histogram
+from reminder import ReminderManager
+from db import DB, TIMED_METHODS
+from tests.test_reminder import minutes_from_now
+
+
+@pytest.fixture
+def metrics():
+    return Metrics()
+
+@pytest.mark.parametrize(
+    "value, expected_counts",
+    [
+        (0.5, [1, 1, 1]),
+        (1, [1, 1, 1]),     # buckets are upper bounds, inclusive
+        (1.5, [0, 1, 1]),
+        (10, [0, 0, 1]),
+    ],
+)
+def test_histogram_buckets(value, expected_counts):
+    histogram = Histogram((1, 2))
+    histogram.observe(value)
+    assert histogram.cumulative_counts() == expected_counts
+    assert histogram.sum == value and histogram.count == 1
+
+def test_same_name_and_labels_is_the_same_metric(metrics):
+    metrics.counter("calls_total", "calls", method="a").inc()
+    metrics.counter("calls_total", "calls", method="a").inc(2)
+    metrics.counter("calls_total", "calls", method="b").inc()
+    assert metrics.counter("calls_total", "calls", method="a").value == 3
+    with pytest.raises(ValueError):
+        metrics.gauge("calls_total", "calls")
+
+def test_registering_while_snapshotting(metrics):
+    # dispatch workers register their metrics while the daemon writes snapshots
+    done = threading.Event()
+    def register():
+        for i in range(20000):
+            metrics.counter("registered_total", "Registered from another thread", sink=str(i)).inc()
+        done.set()
+    thread = threading.Thread(target=register)
+    thread.start()
+    while not done.is_set():
+        metrics.snapshot()
+    thread.join()
+    assert len(metrics.snapshot()["registered_total"]["samples"]) == 20000
+
+def test_prometheus_text(metrics):
+    metrics.counter("fired_total", "Reminders fired").inc(3)
+    metrics.gauge("resident", "In memory", shard='a"b').set(2.5)
+    metrics.histogram("tick_seconds", "Tick duration", (0.1, 1)).observe(0.5)
+    assert metrics.to_prometheus() == (
+        "# HELP fired_total Reminders fired\n"
+        "# TYPE fired_total counter\n"
+        "fired_total 3\n"
+        "# HELP resident In memory\n"
+        "# TYPE resident gauge\n"
+        'resident{shard="a\\"b"} 2.5\n'
+        "# HELP tick_seconds Tick duration\n"
+        "# TYPE tick_seconds histogram\n"
+        'tick_seconds_bucket{le="0.1"} 0\n'
+        'tick_seconds_bucket{le="1"} 1\n'
+        'tick_seconds_bucket{le="+Inf"} 1\n'
+        "tick_seconds_sum 0.5\n"
+        "tick_seconds_count 1\n"
+    )
+
+@pytest.mark.parametrize("file_name", ["metrics.prom", "metrics.json"])
+def test_write(metrics, tmp_path, file_name):
+    metrics.counter("fired_total", "Reminders fired").inc()
+    path = str(tmp_path / file_name)
+    metrics.write(path)
+    with open(path) as f:
+        text = f.read()
+    if file_name.endswith(".json"):
+        assert json.loads(text) == {"fired_total": {"type": "counter", "help": "Reminders fired", "samples": [{"labels": {}, "value": 1}]}}
+    else:
+        assert text == metrics.to_prometheus()
+
+def test_db_calls_and_commits(metrics, tmp_path):
+    reminder_db = DB(str(tmp_path / "reminder_db"), metrics=metrics)
+    with reminder_db.batch():
+        reminder_db.add_reminder("a", "title", "message", "Day", minutes_from_now(5))
+        reminder_db.add_reminder("b", "title", "message", "Day", minutes_from_now(5))
+    reminder_db.remove_reminder("a")
+    assert reminder_db.count_reminders() == 1
+    reminder_db.close()
+    assert metrics.counter("reminder_db_commits_total", "").value == 2
+    assert metrics.histogram("reminder_db_call_seconds", "", method="add_reminder").count == 2
+    assert metrics.histogram("reminder_db_call_seconds", "", method="count_reminders").count == 1
+
+def test_db_without_metrics_is_not_instrumented(tmp_path):
+    reminder_db = DB(str(tmp_path / "reminder_db"))
+    assert not any(method in vars(reminder_db) for method in TIMED_METHODS)
+    reminder_db.close()
+
+def test_manager_records_ticks_and_catch_ups(metrics, tmp_path):
+    reminder_db = DB(str(tmp_path / "reminder_db"))
+    reminder_db.add_reminder("late", "title", "message", "Hour", minutes_from_now(-90))
+    reminder_db.add_reminder("later", "title", "message", "Day", minutes_from_now(10))
+    reminder_manager = ReminderManager(reminder_db, metrics=metrics)
+    atexit.unregister(reminder_manager.on_exit)
+    assert [reminder.reminder_id for reminder in reminder_manager.fire_due_reminders()] == ["late"]
+    assert reminder_manager.fire_due_reminders() == []
+    reminder_manager.close()
+
+    assert metrics.gauge("reminder_load_seconds", "").value > 0
+    assert metrics.histogram("reminder_tick_seconds", "").count == 2
+    assert metrics.counter("reminder_fired_total", "").value == 1
+    assert metrics.gauge("reminder_resident", "").value == 2
+    assert metrics.counter("reminder_catch_ups_total", "").value == 1
+    lag = metrics.histogram("reminder_catch_up_lag_minutes", "")
+    assert lag.count == 1 and 90 <= lag.sum <= 91   # the minute may turn during the test
@@ -0,0 +1,37 @@
+import pytest
+from datetime_wrapper import DateTimeWrapper
+from occurrence_cache import OccurrenceCache
+from recurrence import Day, Hour
+
+
+WINDOW = (DateTimeWrapper(2022, 1, 1, 0, 0), DateTimeWrapper(2022, 1, 3, 0, 0))
+
+class TestOccurrenceCache:
+    @pytest.fixture
+    def cache(self):
+        return OccurrenceCache(maxsize=2)
+
+    def test_hit_until_recurred(self, cache):
+        recurrence = Day(DateTimeWrapper(2022, 1, 1, 10, 30))
+        expected = (DateTimeWrapper(2022, 1, 1, 10, 30).epoch_minutes, DateTimeWrapper(2022, 1, 2, 10, 30).epoch_minutes)
+        assert cache.occurrences("a", recurrence, *WINDOW) == expected
+        assert cache.occurrences("a", recurrence, *WINDOW) == expected
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        recurrence.should_recur(DateTimeWrapper(2022, 1, 1, 10, 30))
+        assert cache.occurrences("a", recurrence, *WINDOW) == expected[1:]
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    def test_invalidate(self, cache):
+        recurrence = Hour(DateTimeWrapper(2022, 1, 1, 10, 30), None, 24)
+        cache.occurrences("a", recurrence, *WINDOW)
+        cache.occurrences("b", recurrence, *WINDOW)
+        cache.invalidate("a")
+        assert len(cache) == 1 and "a" not in cache.windows
+
+    def test_evicts_least_recently_used(self, cache):
+        recurrence = Day(DateTimeWrapper(2022, 1, 1, 10, 30))
+        for reminder_id in ["a", "b", "a", "c"]:
+            cache.occurrences(reminder_id, recurrence, *WINDOW)
+        assert [key[0] for key in cache.entries] == ["a", "c"]
+        assert set(cache.windows) == {"a", "c"}
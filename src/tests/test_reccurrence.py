@@ -1,6 +1,8 @@
 import pytest
 from datetime_wrapper import DateTimeWrapper
-from recurrence import Once, Day, Hour, Week, Month
+from recurrence import Once, Day, Hour, Week, Month, _civil_from_days, _month_info
+from datetime import date, timedelta
+import random
 import copy
 
 
@@ -96,8 +98,7 @@ class TestRecurrence:
         self, start_dt_wrapper, recurrence_class, args, cur_dt_wrapper, expected_should_recur
     ):
         recurrence = recurrence_class(start_dt_wrapper, *args)
-        prev_dt_wrapper = copy.deepcopy(cur_dt_wrapper)
-        prev_dt_wrapper.increment(minutes=-1)
+        prev_dt_wrapper = cur_dt_wrapper.shifted(minutes=-1)
         assert recurrence.should_recur(prev_dt_wrapper) == True
         print(recurrence.next_recur_dt_wrapper)
         assert recurrence.should_recur(cur_dt_wrapper) == expected_should_recur
@@ -122,3 +123,127 @@ class TestRecurrence:
     ):
         recurrence_every_two_weeks.should_recur(cur_dt_wrapper)
         assert recurrence_every_two_weeks.should_recur(cur_dt_wrapper) == expected_should_recur
+
+
+def random_recurrences(seed, count):
+    rng = random.Random(seed)
+    recurrences = []
+    for _ in range(count):
+        start_dt_wrapper = DateTimeWrapper(rng.randint(2020, 2024), rng.randint(1, 12), rng.randint(1, 28), rng.randint(0, 23), rng.randint(0, 59))
+        interval = rng.randint(1, 5)
+        recurrence_class = rng.choice([Hour, Day, Week, Month])
+        if recurrence_class is Week:
+            recurrence = Week(start_dt_wrapper, None, interval, rng.sample(range(1, 8), rng.randint(1, 7)))
+        elif recurrence_class is Month:
+            recurrence = Month(start_dt_wrapper, None, interval, rng.sample(rng.choice([range(1, 32), range(27, 32)]), rng.randint(1, 4)))
+        else:
+            recurrence = recurrence_class(start_dt_wrapper, None, interval)
+        target_dt_wrapper = start_dt_wrapper.shifted(minutes=rng.randint(-60, 2 * 365 * 24 * 60))
+        recurrences.append((recurrence, target_dt_wrapper))
+    return recurrences
+
+
+class TestFirstRecurrenceAtOrAfter:
+    @pytest.mark.parametrize("recurrence, target_dt_wrapper", random_recurrences(seed=0, count=300))
+    def test_matches_stepping(self, recurrence, target_dt_wrapper):
+        stepped = copy.deepcopy(recurrence)
+        while stepped.next_recur_dt_wrapper < target_dt_wrapper:
+            stepped._set_next_recurrence_dt_wrapper()
+        assert recurrence._first_recurrence_at_or_after(target_dt_wrapper) == stepped.next_recur_dt_wrapper
+
+    @pytest.mark.parametrize("recurrence, target_dt_wrapper", random_recurrences(seed=1, count=100))
+    def test_matches_stepping_after_recurring(self, recurrence, target_dt_wrapper):
+        recurrence.should_recur(target_dt_wrapper)
+        target_dt_wrapper = target_dt_wrapper.shifted(days=200, minutes=7)
+        stepped = copy.deepcopy(recurrence)
+        while stepped.next_recur_dt_wrapper < target_dt_wrapper:
+            stepped._set_next_recurrence_dt_wrapper()
+        assert recurrence._first_recurrence_at_or_after(target_dt_wrapper) == stepped.next_recur_dt_wrapper
+
+    def test_does_not_mutate(self):
+        recurrence = Hour(DateTimeWrapper(2022, 1, 1, 10, 30), None, 2)
+        assert recurrence._first_recurrence_at_or_after(DateTimeWrapper(2023, 1, 1, 10, 31)) == DateTimeWrapper(2023, 1, 1, 12, 30)
+        assert recurrence.next_recur_dt_wrapper == DateTimeWrapper(2022, 1, 1, 10, 30)
+
+    @pytest.mark.parametrize("target_dt_wrapper", [DateTimeWrapper(2021, 1, 1, 10, 30), DateTimeWrapper(2023, 1, 1, 10, 30)])
+    def test_once(self, target_dt_wrapper):
+        assert Once(DateTimeWrapper(2022, 1, 1, 10, 30))._first_recurrence_at_or_after(target_dt_wrapper) == DateTimeWrapper(2022, 1, 1, 10, 30)
+
+
+class TestOccurrences:
+    @pytest.mark.parametrize("recurrence, window_start_dt_wrapper", random_recurrences(seed=2, count=150))
+    def test_matches_recurring(self, recurrence, window_start_dt_wrapper):
+        rng = random.Random(window_start_dt_wrapper.epoch_minutes)
+        if rng.random() < 0.5:
+            recurrence.end_dt_wrapper = recurrence.start_dt_wrapper.shifted(days=rng.randint(0, 400))
+        window_end_dt_wrapper = window_start_dt_wrapper.shifted(days=rng.randint(0, 60))
+        fired = []
+        recurring = copy.deepcopy(recurrence)
+        while not recurring.is_finished() and not recurring.next_recur_dt_wrapper > window_end_dt_wrapper:
+            fire_dt_wrapper = recurring.next_recur_dt_wrapper
+            assert recurring.should_recur(fire_dt_wrapper)
+            if not fire_dt_wrapper < window_start_dt_wrapper:
+                fired.append(fire_dt_wrapper)
+        next_recur_dt_wrapper = recurrence.next_recur_dt_wrapper
+        assert list(recurrence.occurrences(window_start_dt_wrapper, window_end_dt_wrapper)) == fired
+        assert recurrence.next_recur_dt_wrapper == next_recur_dt_wrapper and not recurrence.is_finished()
+
+    @pytest.mark.parametrize(
+        "window_start_dt_wrapper, window_end_dt_wrapper, expected",
+        [
+            (DateTimeWrapper(2022, 1, 1, 0, 0), DateTimeWrapper(2022, 1, 1, 10, 29), []),
+            (DateTimeWrapper(2022, 1, 1, 0, 0), DateTimeWrapper(2022, 1, 1, 10, 30), [DateTimeWrapper(2022, 1, 1, 10, 30)]),
+            (DateTimeWrapper(2022, 1, 1, 10, 31), DateTimeWrapper(2023, 1, 1, 0, 0), []),
+        ],
+    )
+    def test_once(self, window_start_dt_wrapper, window_end_dt_wrapper, expected):
+        recurrence = Once(DateTimeWrapper(2022, 1, 1, 10, 30))
+        assert list(recurrence.occurrences(window_start_dt_wrapper, window_end_dt_wrapper)) == expected
+
+    def test_first_recurrence_ignores_end(self):
+        recurrence = Day(DateTimeWrapper(2022, 1, 2, 10, 30), DateTimeWrapper(2022, 1, 1, 0, 0))
+        assert list(recurrence.occurrences(DateTimeWrapper(2022, 1, 1, 0, 0), DateTimeWrapper(2022, 2, 1, 0, 0))) == [DateTimeWrapper(2022, 1, 2, 10, 30)]
+
+
+class TestLookupTables:
+    @pytest.mark.parametrize("epoch_days", [-719162, -1, 0, 59, 10957, 11016, 11017, 19782, 2932896] + random.Random(3).sample(range(-200000, 200000), 50))
+    def test_civil_from_days(self, epoch_days):
+        expected = date(1970, 1, 1) + timedelta(days=epoch_days)
+        assert _civil_from_days(epoch_days) == (expected.year, expected.month, expected.day)
+
+    @pytest.mark.parametrize("year, month, expected_days", [(2023, 2, 28), (2024, 2, 29), (2000, 2, 29), (2100, 2, 28), (2024, 12, 31), (2024, 4, 30)])
+    def test_month_info(self, year, month, expected_days):
+        assert _month_info(year * 12 + month - 1) == ((date(year, month, 1) - date(1970, 1, 1)).days, expected_days)
+
+    @pytest.mark.parametrize(
+        "weekdays, interval, expected_days",
+        [
+            ([1, 3, 5], 1, [2, 4, 7, 9]),    # 2022-01-03 is a monday
+            ([1, 3, 5], 2, [2, 4, 14, 16]),
+            ([7], 1, [6, 13, 20, 27]),
+            ([1], 3, [21, 42, 63, 84]),
+        ],
+    )
+    def test_week_steps(self, weekdays, interval, expected_days):
+        recurrence = Week(DateTimeWrapper(2022, 1, 3, 9, 0), None, interval, weekdays)
+        steps = []
+        for _ in expected_days:
+            recurrence._set_next_recurrence_dt_wrapper()
+            steps.append(recurrence.next_recur_dt_wrapper)
+        assert steps == [DateTimeWrapper(2022, 1, 3, 9, 0).shifted(days=days) for days in expected_days]
+
+    @pytest.mark.parametrize(
+        "days, interval, expected",
+        [
+            ([15, 31], 1, [(2022, 1, 15), (2022, 1, 31), (2022, 2, 15), (2022, 3, 15)]),   # no 31st in february
+            ([30], 1, [(2022, 1, 30), (2022, 3, 2), (2022, 3, 30), (2022, 4, 30)]),        # the 30th of february spills over into march
+            ([10], 5, [(2022, 1, 10), (2022, 6, 10), (2022, 11, 10), (2023, 4, 10)]),
+        ],
+    )
+    def test_month_steps(self, days, interval, expected):
+        recurrence = Month(DateTimeWrapper(2022, 1, 5, 9, 0), None, interval, days)
+        steps = []
+        for _ in expected:
+            recurrence._set_next_recurrence_dt_wrapper()
+            steps.append(recurrence.next_recur_dt_wrapper)
+        assert steps == [DateTimeWrapper(year, month, day, 9, 0) for year, month, day in expected]
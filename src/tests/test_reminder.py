@@ -0,0 +1,235 @@
+import pytest
+import atexit
+from datetime_wrapper import DateTimeWrapper
+from reminder import ReminderManager, CATCH_UP_BATCH_SIZE, MISFIRE_GRACE_MINUTES
+from clock import ManualClock
+from db import DB, INHERIT_MISFIRE_POLICY
+
+
+START = DateTimeWrapper(2024, 1, 1, 9, 0)
+
+def minutes_from_now(minutes):
+    # wall clock minutes, for the daemon and timers that read it. the managers here read a ManualClock at START
+    dt_wrapper = DateTimeWrapper()
+    return DateTimeWrapper(dt_wrapper.year, dt_wrapper.month, dt_wrapper.day, dt_wrapper.hour, dt_wrapper.minute).shifted(minutes=minutes)
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "reminder_db")
+
+@pytest.fixture
+def make_manager(db_path):
+    managers = []
+    def make_manager(**kwargs):
+        kwargs.setdefault("clock", ManualClock(START))
+        reminder_manager = ReminderManager(DB(db_path), **kwargs)
+        atexit.unregister(reminder_manager.on_exit)
+        managers.append(reminder_manager)
+        return reminder_manager
+    yield make_manager
+    for reminder_manager in managers:
+        reminder_manager.db.close()
+
+def test_notify_due_reminders(make_manager, capsys):
+    reminder_manager = make_manager()
+    hourly_id = reminder_manager.add_reminder("hourly", "message", "Hour", START.shifted(minutes=-90))
+    reminder_manager.add_reminder("once", "message", "Once", START.shifted(minutes=-1))
+    later_id = reminder_manager.add_reminder("later", "message", "Day", START.shifted(minutes=60))
+    reminder_manager.notify_due_reminders()
+
+    out = capsys.readouterr().out
+    assert "hourly" in out and "once" in out and "later" not in out
+    assert [reminder[0] for reminder in reminder_manager.get_all_reminders()] == [hourly_id, later_id]
+    assert reminder_manager.reminders[hourly_id].next_recur_dt_wrapper == START.shifted(minutes=30)
+
+    reminder_manager.notify_due_reminders()
+    assert capsys.readouterr().out == ""
+
+    reloaded = make_manager()
+    assert reloaded.reminders[hourly_id].next_recur_dt_wrapper == START.shifted(minutes=30)
+
+def test_lazy_loading(make_manager, capsys):
+    eager = make_manager()
+    soon_id = eager.add_reminder("soon", "message", "Day", START.shifted(minutes=-5))
+    far_id = eager.add_reminder("far", "message", "Day", START.shifted(days=3))
+
+    lazy = make_manager(lazy_horizon_minutes=60)
+    assert list(lazy.reminders) == [soon_id]
+    assert [reminder[0] for reminder in lazy.get_all_reminders()] == [soon_id, far_id]
+
+    later_id = lazy.add_reminder("later", "message", "Day", START.shifted(days=2))
+    assert later_id not in lazy.reminders
+    assert [reminder[0] for reminder in lazy.get_all_reminders()] == [soon_id, later_id, far_id]
+
+    lazy.notify_due_reminders()
+    assert "soon" in capsys.readouterr().out
+    assert soon_id not in lazy.reminders   # its next recurrence is past the horizon
+
+    lazy.remove_reminder(far_id)
+    assert [reminder[0] for reminder in lazy.get_all_reminders()] == [soon_id, later_id]
+
+def test_update_reminder(make_manager):
+    reminder_manager = make_manager()
+    reminder_id = reminder_manager.add_reminder("title", "message", "Day", START.shifted(minutes=60))
+    reminder_manager.update_reminder(reminder_id, title="new title")
+    assert reminder_manager.get_all_reminders() == [(reminder_id, "new title", "message", START.shifted(minutes=60))]
+
+    reminder_manager.update_reminder(reminder_id, recurrence_type="Hour", start_dt_wrapper=START.shifted(minutes=-30))
+    assert reminder_manager.reminders[reminder_id].recurrence.__class__.__name__ == "Hour"
+    assert reminder_manager.scheduler.peek() == START.shifted(minutes=-30)
+    assert make_manager().get_all_reminders() == [(reminder_id, "new title", "message", START.shifted(minutes=-30))]
+
+@pytest.mark.parametrize("changes", [dict(title="new title"), dict(interval=2)])
+def test_update_unknown_reminder(make_manager, changes):
+    with pytest.raises(KeyError):
+        make_manager().update_reminder("unknown", **changes)
+
+def test_get_all_reminders_stays_ordered(make_manager):
+    reminder_manager = make_manager()
+    daily_id = reminder_manager.add_reminder("daily", "message", "Day", START.shifted(minutes=-30))
+    hourly_id = reminder_manager.add_reminder("hourly", "message", "Hour", START.shifted(minutes=-10))
+    later_id = reminder_manager.add_reminder("later", "message", "Once", START.shifted(minutes=120))
+    assert [reminder[0] for reminder in reminder_manager.get_all_reminders()] == [daily_id, hourly_id, later_id]
+
+    reminder_manager.fire_due_reminders()   # hourly moves to +50 minutes, daily to tomorrow
+    assert [reminder[0] for reminder in reminder_manager.get_all_reminders()] == [hourly_id, later_id, daily_id]
+
+    reminder_manager.update_reminder(later_id, start_dt_wrapper=START.shifted(minutes=10))
+    reminder_manager.remove_reminder(hourly_id)
+    assert [reminder[0] for reminder in reminder_manager.get_all_reminders()] == [later_id, daily_id]
+    assert [reminder[0] for reminder in make_manager().get_all_reminders()] == [later_id, daily_id]
+
+def test_agenda(make_manager):
+    reminder_manager = make_manager()
+    hourly_id = reminder_manager.add_reminder("hourly", "message", "Hour", DateTimeWrapper(2030, 1, 1, 9, 0), None, None, 4)
+    weekly_id = reminder_manager.add_reminder("weekly", "message", "Week", DateTimeWrapper(2030, 1, 1, 10, 0), None, None, 1, [2, 4])
+    reminder_manager.add_reminder("later", "message", "Once", DateTimeWrapper(2030, 2, 1, 9, 0))
+    window = (DateTimeWrapper(2030, 1, 1, 12, 0), DateTimeWrapper(2030, 1, 3, 10, 0))
+    expected = [
+        (hourly_id, DateTimeWrapper(2030, 1, 1, 13, 0)),
+        (hourly_id, DateTimeWrapper(2030, 1, 1, 17, 0)),
+        (hourly_id, DateTimeWrapper(2030, 1, 1, 21, 0)),
+        (hourly_id, DateTimeWrapper(2030, 1, 2, 1, 0)),
+        (hourly_id, DateTimeWrapper(2030, 1, 2, 5, 0)),
+        (hourly_id, DateTimeWrapper(2030, 1, 2, 9, 0)),
+        (hourly_id, DateTimeWrapper(2030, 1, 2, 13, 0)),
+        (hourly_id, DateTimeWrapper(2030, 1, 2, 17, 0)),
+        (hourly_id, DateTimeWrapper(2030, 1, 2, 21, 0)),
+        (hourly_id, DateTimeWrapper(2030, 1, 3, 1, 0)),
+        (hourly_id, DateTimeWrapper(2030, 1, 3, 5, 0)),
+        (hourly_id, DateTimeWrapper(2030, 1, 3, 9, 0)),
+        (weekly_id, DateTimeWrapper(2030, 1, 3, 10, 0)),
+    ]
+    assert [(reminder[0], reminder[3]) for reminder in reminder_manager.agenda(*window)] == expected
+    assert [(reminder[0], reminder[3]) for reminder in reminder_manager.agenda(*window, limit=2)] == expected[:2]
+    assert reminder_manager.occurrence_cache.hits == 2
+
+    reminder_manager.update_reminder(hourly_id, interval=12)
+    assert [(reminder[0], reminder[3]) for reminder in reminder_manager.agenda(*window)] == [
+        (hourly_id, DateTimeWrapper(2030, 1, 1, 21, 0)),
+        (hourly_id, DateTimeWrapper(2030, 1, 2, 9, 0)),
+        (hourly_id, DateTimeWrapper(2030, 1, 2, 21, 0)),
+        (hourly_id, DateTimeWrapper(2030, 1, 3, 9, 0)),
+        (weekly_id, DateTimeWrapper(2030, 1, 3, 10, 0)),
+    ]
+    reminder_manager.remove_reminder(weekly_id)
+    assert [reminder[0] for reminder in reminder_manager.agenda(*window)] == [hourly_id] * 4
+    assert [reminder[0] for reminder in make_manager(lazy_horizon_minutes=60).agenda(*window)] == [hourly_id] * 4
+
+@pytest.mark.parametrize("lazy_horizon_minutes", [None, 60])
+def test_get_reminders_page(make_manager, lazy_horizon_minutes):
+    eager = make_manager()
+    for i in range(7):
+        eager.add_reminder(f"title {i}", "message", "Day", START.shifted(minutes=-5 if i % 3 == 0 else i * 24 * 60))
+    reminder_manager = make_manager(lazy_horizon_minutes=lazy_horizon_minutes)
+    all_reminders = reminder_manager.get_all_reminders()
+    assert reminder_manager.count_reminders() == 7
+    pages = [reminder_manager.get_reminders_page(offset, 3) for offset in range(0, 9, 3)]
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert [reminder[:3] for page in pages for reminder in page] == [reminder[:3] for reminder in all_reminders]
+
+@pytest.mark.parametrize("lazy_horizon_minutes", [None, 60])
+def test_search(make_manager, lazy_horizon_minutes):
+    reminder_manager = make_manager(lazy_horizon_minutes=lazy_horizon_minutes)
+    hourly_id = reminder_manager.add_reminder("water plants", "balcony", "Hour", START.shifted(minutes=-90))
+    daily_id = reminder_manager.add_reminder("plan the day", "message", "Day", START.shifted(minutes=20))
+    reminder_manager.add_reminder("rent", "message", "Month", START.shifted(days=3))
+    reminder_manager.fire_due_reminders()
+    assert reminder_manager.search("pla") == [
+        (daily_id, "plan the day", "message", START.shifted(minutes=20)),
+        (hourly_id, "water plants", "balcony", START.shifted(minutes=30)),     # advanced by the tick
+    ]
+    assert reminder_manager.count_search_results("pla") == 2
+    assert [reminder[0] for reminder in reminder_manager.search("pla", "Hour")] == [hourly_id]
+    assert [reminder[0] for reminder in reminder_manager.search(until_dt_wrapper=START.shifted(minutes=60), offset=1, limit=5)] == [hourly_id]
+
+
+@pytest.mark.parametrize("lazy_horizon_minutes", [None, 60])
+@pytest.mark.parametrize(
+    "misfire_policy, misfire_cap, expected_fires",
+    [
+        ("fire_once", 10, 1),
+        ("fire_all", 10, 5),    # missed at -270, -210, -150, -90 and -30 minutes
+        ("fire_all", 3, 3),
+        ("skip", 10, 0),
+    ],
+)
+def test_misfire_policy(make_manager, db_path, lazy_horizon_minutes, misfire_policy, misfire_cap, expected_fires):
+    reminder_db = DB(db_path)
+    reminder_db.add_reminder("late", "title", "message", "Hour", START.shifted(minutes=-270))
+    reminder_db.add_reminder("on time", "title", "message", "Hour", START.shifted(minutes=-300))
+    reminder_db.close()
+    reminder_manager = make_manager(lazy_horizon_minutes=lazy_horizon_minutes, clock=ManualClock(START), misfire_policy=misfire_policy, misfire_cap=misfire_cap)
+    fired = [reminder.reminder_id for reminder, _ in reminder_manager.fire_due_occurrences()]
+    assert fired.count("late") == expected_fires
+    assert fired.count("on time") == min(6, misfire_cap) if misfire_policy == "fire_all" else 1     # the recurrence due now always fires
+    assert reminder_manager.db.get_reminder("late")[8] == START.shifted(minutes=30).epoch_minutes
+    assert reminder_manager.fire_due_reminders() == []
+
+@pytest.mark.parametrize("lazy_horizon_minutes", [None, 60])
+@pytest.mark.parametrize("misfire_policy", ["fire_once", "fire_all", "skip"])
+def test_a_tick_one_minute_late_is_not_a_misfire(make_manager, lazy_horizon_minutes, misfire_policy):
+    reminder_manager = make_manager(lazy_horizon_minutes=lazy_horizon_minutes, clock=ManualClock(START), misfire_policy=misfire_policy)
+    once_id = reminder_manager.add_reminder("once", "message", "Once", START)
+    daily_id = reminder_manager.add_reminder("daily", "message", "Day", START)
+    reminder_manager.clock.advance(1)
+    fired = [(reminder.reminder_id, occurrence_dt_wrapper) for reminder, occurrence_dt_wrapper in reminder_manager.fire_due_occurrences()]
+    assert sorted(fired) == sorted([(once_id, START), (daily_id, START)])
+    assert reminder_manager.db.get_reminder(once_id) is None
+    assert reminder_manager.db.get_reminder(daily_id)[8] == START.shifted(days=1).epoch_minutes
+
+def test_fire_all_keeps_the_most_recent_misfires(make_manager):
+    reminder_manager = make_manager(clock=ManualClock(START), misfire_policy="fire_all", misfire_cap=3)
+    hourly_id = reminder_manager.add_reminder("hourly", "message", "Hour", START.shifted(minutes=-270))
+    assert [occurrence_dt_wrapper for _, occurrence_dt_wrapper in reminder_manager.fire_due_occurrences()] == \
+           [START.shifted(minutes=-150), START.shifted(minutes=-90), START.shifted(minutes=-30)]
+    assert reminder_manager.reminders[hourly_id].next_recur_dt_wrapper == START.shifted(minutes=30)
+
+def test_misfire_policy_of_a_reminder(make_manager):
+    reminder_manager = make_manager(clock=ManualClock(START), misfire_policy="skip")
+    once_id = reminder_manager.add_reminder("once", "message", "Once", START.shifted(minutes=-10))
+    all_id = reminder_manager.add_reminder("all", "message", "Day", START.shifted(days=-3, minutes=-1), misfire_policy="fire_all")
+    assert reminder_manager.db.get_reminder(all_id)[9] == "fire_all"
+    assert [(reminder.reminder_id, occurrence_dt_wrapper) for reminder, occurrence_dt_wrapper in reminder_manager.fire_due_occurrences()] == \
+           [(all_id, START.shifted(days=-days, minutes=-1)) for days in (3, 2, 1, 0)]
+    assert reminder_manager.db.get_reminder(once_id) is None    # skipped and done
+    reminder_manager.update_reminder(all_id, misfire_policy="fire_once")
+    assert reminder_manager.reminders[all_id].misfire_policy == "fire_once"
+    reminder_manager.update_reminder(all_id, misfire_policy=INHERIT_MISFIRE_POLICY)
+    assert reminder_manager.reminders[all_id].misfire_policy is None and reminder_manager.db.get_reminder(all_id)[9] is None
+    with pytest.raises(ValueError):
+        reminder_manager.add_reminder("bad", "message", "Day", START, misfire_policy="fire_twice")
+
+def test_catch_up_is_spread_over_ticks(make_manager, db_path):
+    reminder_db = DB(db_path, "fast")
+    with reminder_db.batch():
+        reminder_db.add_reminders((f"late {i}", "title", "message", "Day", START.shifted(minutes=-1 - MISFIRE_GRACE_MINUTES - i), None, None, 1, None, None) for i in range(2 * CATCH_UP_BATCH_SIZE + 1))
+        reminder_db.add_reminder("on time", "title", "message", "Day", START)
+    reminder_db.close()
+    reminder_manager = make_manager(clock=ManualClock(START), catch_up_budget_seconds=0)   # one batch per tick
+    assert reminder_manager.next_wakeup() == START
+    fired = reminder_manager.fire_due_reminders()
+    assert len(fired) == CATCH_UP_BATCH_SIZE + 1 and "on time" in [reminder.reminder_id for reminder in fired]
+    assert reminder_manager.seconds_until_next_due() == 0    # the backlog keeps the timer ticking
+    assert [len(reminder_manager.fire_due_reminders()) for _ in range(3)] == [CATCH_UP_BATCH_SIZE, 1, 0]
+    assert reminder_manager.next_wakeup() > START
@@ -0,0 +1,44 @@
+import pytest
+from datetime_wrapper import DateTimeWrapper
+from scheduler import Scheduler
+
+
+class TestScheduler:
+    @pytest.fixture
+    def scheduler(self):
+        scheduler = Scheduler()
+        scheduler.schedule("c", DateTimeWrapper(2022, 1, 3, 10, 30))
+        scheduler.schedule("a", DateTimeWrapper(2022, 1, 1, 10, 30))
+        scheduler.schedule("b", DateTimeWrapper(2022, 1, 2, 10, 30))
+        return scheduler
+
+    @pytest.mark.parametrize(
+        "cur_dt_wrapper, expected_due",
+        [
+            (DateTimeWrapper(2021, 12, 31, 10, 30), []),
+            (DateTimeWrapper(2022, 1, 1, 10, 30), ["a"]),
+            (DateTimeWrapper(2022, 1, 2, 10, 29), ["a"]),
+            (DateTimeWrapper(2022, 1, 3, 10, 30), ["a", "b", "c"]),
+        ],
+    )
+    def test_pop_due(self, scheduler, cur_dt_wrapper, expected_due):
+        assert scheduler.pop_due(cur_dt_wrapper) == expected_due
+        assert len(scheduler) == 3 - len(expected_due)
+
+    def test_unschedule(self, scheduler):
+        scheduler.unschedule("a")
+        assert "a" not in scheduler
+        assert scheduler.peek() == DateTimeWrapper(2022, 1, 2, 10, 30)
+        assert scheduler.pop_due(DateTimeWrapper(2022, 1, 3, 10, 30)) == ["b", "c"]
+
+    def test_unschedule_many(self, scheduler):
+        scheduler.unschedule_many(["a", "c"])
+        assert len(scheduler.heap) == 1   # rebuilt without the removed entries
+        assert scheduler.peek() == DateTimeWrapper(2022, 1, 2, 10, 30)
+        assert scheduler.pop_due(DateTimeWrapper(2022, 1, 3, 10, 30)) == ["b"]
+
+    def test_reschedule(self, scheduler):
+        scheduler.schedule("a", DateTimeWrapper(2022, 1, 4, 10, 30))
+        assert len(scheduler) == 3
+        assert scheduler.pop_due(DateTimeWrapper(2022, 1, 3, 10, 30)) == ["b", "c"]
+        assert scheduler.pop_due(DateTimeWrapper(2022, 1, 4, 10, 30)) == ["a"]
@@ -0,0 +1,60 @@
+import pytest
+import threading
+import time
+from sharded import ShardedReminderManager, shard_of
+from tests.test_reminder import minutes_from_now
+
+
+@pytest.mark.parametrize("shards", [1, 3, 8])
+def test_shard_of_is_stable_and_in_range(shards):
+    reminder_ids = [f"reminder {i}" for i in range(200)]
+    assignments = [shard_of(reminder_id, shards) for reminder_id in reminder_ids]
+    assert assignments == [shard_of(reminder_id, shards) for reminder_id in reminder_ids]
+    assert set(assignments) == set(range(shards))
+
+@pytest.fixture
+def notifications():
+    return []
+
+@pytest.fixture
+def sharded(tmp_path, notifications):
+    sharded = ShardedReminderManager(str(tmp_path / "reminder_db"), shards=3, sink=notifications.append)
+    sharded.start()
+    yield sharded
+    sharded.stop()
+
+def test_routes_calls_to_shards(sharded, tmp_path):
+    later_ids = [sharded.add_reminder(f"later {i}", "message", "Day", minutes_from_now(60 + i)) for i in range(12)]
+    assert sharded.count_reminders() == 12
+    assert [reminder[0] for reminder in sharded.get_all_reminders()] == later_ids
+    assert {shard_of(reminder_id, 3) for reminder_id in later_ids} == {0, 1, 2}
+
+    sharded.update_reminder(later_ids[0], title="renamed", start_dt_wrapper=minutes_from_now(500))
+    sharded.remove_reminder(later_ids[1])
+    reminders = sharded.get_all_reminders()
+    assert [reminder[0] for reminder in reminders] == later_ids[2:] + later_ids[:1]
+    assert reminders[-1][1] == "renamed"
+    with pytest.raises(KeyError):
+        sharded.remove_reminder(later_ids[1])
+
+    window = (minutes_from_now(0), minutes_from_now(65))
+    assert [reminder[0] for reminder in sharded.agenda(*window)] == later_ids[2:6]
+
+def test_merges_notifications(sharded, notifications):
+    for i in range(9):
+        sharded.add_reminder(f"due {i}", "message", "Once", minutes_from_now(-1))
+    deadline = time.monotonic() + 30
+    while sharded.delivered < 9 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert sorted(text.split(",")[0].split("=")[1].strip() for text in notifications) == [f"due {i}" for i in range(9)]
+    assert sharded.count_reminders() == 0
+
+def test_a_busy_shard_does_not_block_the_others(sharded):
+    reminder_ids = [sharded.add_reminder(f"later {i}", "message", "Day", minutes_from_now(60 + i)) for i in range(12)]
+    other_id = next(reminder_id for reminder_id in reminder_ids if shard_of(reminder_id, 3) != 0)
+    with sharded.locks[0]:  # as if a slow call were in flight on shard 0
+        remover = threading.Thread(target=sharded.remove_reminder, args=(other_id,))
+        remover.start()
+        remover.join(10)
+        assert not remover.is_alive()
+    assert sharded.count_reminders() == 11
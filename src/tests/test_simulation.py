@@ -0,0 +1,79 @@
+import pytest
+import atexit
+from datetime_wrapper import DateTimeWrapper
+from reminder import Reminder, ReminderManager, CATCH_UP_BATCH_SIZE, MISFIRE_GRACE_MINUTES
+from simulation import Simulation
+from clock import ManualClock
+from db import DB
+
+
+START = DateTimeWrapper(2024, 1, 1, 9, 0)
+
+@pytest.fixture
+def make_manager(tmp_path):
+    managers = []
+    def make_manager(**kwargs):
+        reminder_manager = ReminderManager(DB(str(tmp_path / f"reminder_db_{len(managers)}"), "fast"), clock=ManualClock(START), **kwargs)
+        atexit.unregister(reminder_manager.on_exit)
+        managers.append(reminder_manager)
+        return reminder_manager
+    yield make_manager
+    for reminder_manager in managers:
+        reminder_manager.db.close()
+
+def add_schedules(reminder_manager):
+    reminder_manager.add_reminder("once", "message", "Once", START.shifted(days=3))
+    reminder_manager.add_reminder("hourly", "message", "Hour", START.shifted(minutes=30), START.shifted(days=2), interval=5)
+    reminder_manager.add_reminder("daily", "message", "Day", START, interval=2)
+    reminder_manager.add_reminder("weekly", "message", "Week", START.shifted(days=1), None, None, 1, [1, 3, 6])
+    reminder_manager.add_reminder("monthly", "message", "Month", START.shifted(days=10), None, None, 1, [1, 15, 31])
+
+def test_manager_reads_the_clock(make_manager):
+    reminder_manager = make_manager()
+    reminder_manager.add_reminder("soon", "message", "Once", START.shifted(minutes=10))
+    assert reminder_manager.seconds_until_next_due() == 10 * 60
+    reminder_manager.clock.advance(10)
+    assert [reminder.title for reminder in reminder_manager.fire_due_reminders()] == ["soon"]
+
+def test_should_remind_now_reads_the_given_clock():
+    reminder = Reminder("id", "title", "message", "Day", START)
+    assert not reminder.should_remind_now(clock=ManualClock(START.shifted(minutes=-1)))
+    assert reminder.should_remind_now(clock=ManualClock(START))
+    assert reminder.next_recur_dt_wrapper == START.shifted(days=1)
+
+def test_a_year_of_a_daily_reminder(make_manager):
+    reminder_manager = make_manager()
+    reminder_id = reminder_manager.add_reminder("daily", "message", "Day", START)
+    result = Simulation(reminder_manager).run(START.shifted(days=365))
+    assert result.fires == result.ticks == 366  # both ends included
+    assert result.firings == [(START.epoch_minutes + day * 24 * 60, reminder_id) for day in range(366)]
+    assert result.simulated_minutes == 365 * 24 * 60 and result.fires_per_second > 0
+    assert reminder_manager.clock.now_dt_wrapper() == START.shifted(days=365)
+    assert reminder_manager.db.get_reminder(reminder_id)[8] == START.shifted(days=366).epoch_minutes
+
+@pytest.mark.parametrize("kwargs", [{}, {"lazy_horizon_minutes": 60}, {"engine": "columnar"}])
+def test_firings_match_the_agenda(make_manager, kwargs):
+    reminder_manager = make_manager(**kwargs)
+    add_schedules(reminder_manager)
+    until_dt_wrapper = START.shifted(days=90)
+    expected = [(occurrence.epoch_minutes, title) for _, title, _, occurrence in reminder_manager.agenda(START, until_dt_wrapper)]
+    titles = {reminder[0]: reminder[1] for reminder in reminder_manager.db.get_all_reminders()}
+    firings = Simulation(reminder_manager).run(until_dt_wrapper).firings
+    assert sorted((minutes, titles[reminder_id]) for minutes, reminder_id in firings) == sorted(expected)
+    assert [title for _, title in expected].count("hourly") == 10
+
+def test_simulation_needs_a_manual_clock(tmp_path):
+    reminder_manager = ReminderManager(DB(str(tmp_path / "reminder_db")))
+    atexit.unregister(reminder_manager.on_exit)
+    with pytest.raises(ValueError):
+        Simulation(reminder_manager)
+    reminder_manager.db.close()
+
+def test_a_backlog_is_caught_up_in_its_minute(make_manager):
+    reminder_manager = make_manager(catch_up_budget_seconds=0)     # one batch per tick
+    with reminder_manager.db.batch():
+        for i in range(CATCH_UP_BATCH_SIZE + 1):
+            reminder_manager.add_reminder(f"late {i}", "message", "Day", START.shifted(minutes=-1 - MISFIRE_GRACE_MINUTES - i))
+    result = Simulation(reminder_manager).run(START.shifted(minutes=10))
+    assert result.ticks == 2 and result.fires == CATCH_UP_BATCH_SIZE + 1
+    assert {minutes for minutes, _ in result.firings} == {START.epoch_minutes}
@@ -0,0 +1,48 @@
+import pytest
+import random
+from datetime_wrapper import DateTimeWrapper
+from sorted_index import SortedIndex
+
+
+class TestSortedIndex:
+    @pytest.fixture
+    def index(self):
+        index = SortedIndex()
+        index.add("c", DateTimeWrapper(2022, 1, 3, 10, 30))
+        index.add("a", DateTimeWrapper(2022, 1, 1, 10, 30))
+        index.add("b", DateTimeWrapper(2022, 1, 1, 10, 30))
+        return index
+
+    def test_order(self, index):
+        assert list(index) == ["a", "b", "c"]
+        assert len(index) == 3 and "a" in index
+
+    @pytest.mark.parametrize(
+        "reminder_id, next_recur_dt_wrapper, expected_order",
+        [
+            ("a", DateTimeWrapper(2022, 1, 4, 10, 30), ["b", "c", "a"]),
+            ("c", DateTimeWrapper(2021, 12, 31, 10, 30), ["c", "a", "b"]),
+            ("b", DateTimeWrapper(2022, 1, 1, 10, 30), ["a", "b", "c"]),
+            ("d", DateTimeWrapper(2022, 1, 2, 10, 30), ["a", "b", "d", "c"]),
+        ],
+    )
+    def test_reschedule(self, index, reminder_id, next_recur_dt_wrapper, expected_order):
+        index.add(reminder_id, next_recur_dt_wrapper)
+        assert list(index) == expected_order
+        assert len(index.keys) == len(index.key_of)
+
+    def test_remove(self, index):
+        index.remove("b")
+        index.remove("missing")
+        assert list(index) == ["a", "c"]
+
+    @pytest.mark.parametrize("batch_size", [3, 100])
+    def test_add_many_matches_sorted(self, batch_size):
+        rng = random.Random(batch_size)
+        index = SortedIndex()
+        expected = {}
+        for _ in range(5):
+            items = [(str(rng.randrange(150)), DateTimeWrapper.from_epoch_minutes(rng.randrange(1000))) for _ in range(batch_size)]
+            index.add_many(items)
+            expected.update((reminder_id, dt_wrapper.epoch_minutes) for reminder_id, dt_wrapper in items)
+            assert list(index) == sorted(expected, key=lambda reminder_id: (expected[reminder_id], reminder_id))
@@ -0,0 +1,80 @@
+import pytest
+from tenants import TenantReminderManager
+from db import DB
+from clock import ManualClock
+from datetime_wrapper import DateTimeWrapper
+from tests.test_reminder import minutes_from_now
+
+
+@pytest.fixture
+def reminder_db(tmp_path):
+    reminder_db = DB(str(tmp_path / "reminder_db"))
+    yield reminder_db
+    reminder_db.close()
+
+def test_tenants_only_see_their_reminders(reminder_db):
+    tenant_manager = TenantReminderManager(reminder_db)
+    alice_id = tenant_manager.add_reminder("alice", "alice's", "message", "Day", minutes_from_now(120))
+    bob_id = tenant_manager.add_reminder("bob", "bob's", "message", "Day", minutes_from_now(60))
+    assert [reminder[0] for reminder in tenant_manager.get_tenant_reminders("alice")] == [alice_id]
+    with pytest.raises(KeyError):
+        tenant_manager.remove_reminder("bob", alice_id)
+    with pytest.raises(KeyError):
+        tenant_manager.update_reminder("alice", bob_id, title="mine now")
+    tenant_manager.update_reminder("bob", bob_id, title="renamed", start_dt_wrapper=minutes_from_now(30))
+    assert tenant_manager.get_tenant_reminders("bob") == [(bob_id, "renamed", "message", minutes_from_now(30))]
+    tenant_manager.remove_reminder("alice", alice_id)
+    assert tenant_manager.get_tenant_reminders("alice") == [] and reminder_db.count_owner_reminders("alice") == 0
+
+def test_least_recently_used_tenant_is_evicted(reminder_db):
+    tenant_manager = TenantReminderManager(reminder_db, horizon_minutes=60, max_resident_tenants=2)
+    soon_id = tenant_manager.add_reminder("alice", "soon", "message", "Day", minutes_from_now(30))
+    later_id = tenant_manager.add_reminder("alice", "later", "message", "Day", minutes_from_now(24 * 60))
+    tenant_manager.add_reminder("bob", "bob's", "message", "Day", minutes_from_now(24 * 60))
+    tenant_manager.get_tenant_reminders("alice")    # bob is now the least recently used
+    tenant_manager.add_reminder("carol", "carol's", "message", "Day", minutes_from_now(24 * 60))
+    assert [tenant_manager.is_resident(owner) for owner in ("alice", "bob", "carol")] == [True, False, True]
+
+    tenant_manager.add_reminder("dave", "dave's", "message", "Day", minutes_from_now(24 * 60))
+    assert not tenant_manager.is_resident("alice")
+    assert soon_id in tenant_manager.reminders and later_id not in tenant_manager.reminders   # still due within the horizon
+    assert [reminder[0] for reminder in tenant_manager.get_tenant_reminders("alice")] == [soon_id, later_id]
+
+def test_due_reminders_of_unloaded_tenants_fire(reminder_db):
+    reminder_db.add_reminder("once", "once", "message", "Once", minutes_from_now(-1), owner="alice")
+    reminder_db.add_reminder("daily", "daily", "message", "Day", minutes_from_now(-5), owner="bob")
+    reminder_db.add_reminder("hourly", "hourly", "message", "Hour", minutes_from_now(-5), owner="bob")
+    reminder_db.add_reminder("far", "far", "message", "Day", minutes_from_now(24 * 60), owner="bob")
+    tenant_manager = TenantReminderManager(reminder_db, horizon_minutes=60)
+    assert sorted(tenant_manager.reminders) == ["daily", "hourly", "once"]
+
+    fired = tenant_manager.fire_due_reminders()
+    assert sorted((owner, reminder.reminder_id) for owner, reminder in fired) == [("alice", "once"), ("bob", "daily"), ("bob", "hourly")]
+    assert sorted(tenant_manager.reminders) == ["hourly"]   # the next day is past the horizon, the once reminder is done
+    assert reminder_db.get_reminder("once") is None
+    assert reminder_db.get_reminder("daily")[8] == minutes_from_now(24 * 60 - 5).epoch_minutes
+    assert tenant_manager.fire_due_reminders() == []
+    assert 0 < tenant_manager.seconds_until_next_due() <= 55 * 60
+
+@pytest.mark.parametrize("catch_up_budget_seconds", [0, 1])
+def test_missed_recurrences_are_caught_up_by_misfire_policy(reminder_db, catch_up_budget_seconds):
+    now = DateTimeWrapper(2030, 1, 1, 9, 0)
+    reminder_db.add_reminder("all", "all", "message", "Day", now.shifted(days=-2), owner="alice", misfire_policy="fire_all")
+    reminder_db.add_reminder("skipped", "skipped", "message", "Hour", now.shifted(minutes=-30), owner="bob")
+    tenant_manager = TenantReminderManager(reminder_db, clock=ManualClock(now), misfire_policy="skip", catch_up_budget_seconds=catch_up_budget_seconds)
+    assert tenant_manager.next_wakeup() == now    # the backlog is caught up right away
+    assert [(owner, reminder.reminder_id, occurrence_dt_wrapper) for owner, reminder, occurrence_dt_wrapper in tenant_manager.fire_due_occurrences()] == \
+           [("alice", "all", now.shifted(days=-2)), ("alice", "all", now.shifted(days=-1)), ("alice", "all", now)]
+    assert reminder_db.get_reminder("skipped")[8] == now.shifted(minutes=30).epoch_minutes
+    assert tenant_manager.fire_due_reminders() == []
+    assert tenant_manager.next_wakeup() == now.shifted(minutes=30)
+
+def test_a_tick_one_minute_late_is_not_a_misfire(reminder_db):
+    now = DateTimeWrapper(2030, 1, 1, 9, 0)
+    clock = ManualClock(now)
+    tenant_manager = TenantReminderManager(reminder_db, clock=clock, misfire_policy="skip")
+    once_id = tenant_manager.add_reminder("alice", "once", "message", "Once", now)
+    clock.advance(1)
+    assert [(owner, reminder.reminder_id, occurrence_dt_wrapper) for owner, reminder, occurrence_dt_wrapper in tenant_manager.fire_due_occurrences()] == \
+           [("alice", once_id, now)]
+    assert reminder_db.get_reminder(once_id) is None
@@ -0,0 +1,55 @@
+import pytest
+import atexit
+from reminder import ReminderManager
+from timer import AsyncioReminderTimer, MAX_SLEEP_SECONDS
+from db import DB
+from tests.test_reminder import minutes_from_now
+
+
+class FakeHandle:
+    def __init__(self, delay_seconds):
+        self.delay_seconds = delay_seconds
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+class FakeLoop:
+    def __init__(self):
+        self.handles = []
+
+    def call_later(self, delay_seconds, callback):
+        self.handles.append(FakeHandle(delay_seconds))
+        return self.handles[-1]
+
+@pytest.fixture
+def reminder_manager(tmp_path):
+    reminder_manager = ReminderManager(DB(str(tmp_path / "reminder_db")))
+    atexit.unregister(reminder_manager.on_exit)
+    yield reminder_manager
+    reminder_manager.db.close()
+
+def test_sleeps_until_next_due(reminder_manager):
+    loop = FakeLoop()
+    timer = AsyncioReminderTimer(reminder_manager, loop)
+    timer.start()
+    assert loop.handles[-1].delay_seconds == MAX_SLEEP_SECONDS    # nothing scheduled
+
+    reminder_manager.add_reminder("later", "message", "Day", minutes_from_now(5))
+    assert loop.handles[-2].cancelled
+    assert 4 * 60 < loop.handles[-1].delay_seconds <= 5 * 60
+
+    reminder_id = reminder_manager.add_reminder("sooner", "message", "Day", minutes_from_now(2))
+    assert 60 < loop.handles[-1].delay_seconds <= 2 * 60
+
+    reminder_manager.update_reminder(reminder_id, start_dt_wrapper=minutes_from_now(-1))
+    assert loop.handles[-1].delay_seconds == 0
+    assert timer.wakeups == 1
+
+def test_stop(reminder_manager):
+    loop = FakeLoop()
+    timer = AsyncioReminderTimer(reminder_manager, loop)
+    timer.start()
+    timer.stop()
+    reminder_manager.add_reminder("later", "message", "Day", minutes_from_now(5))
+    assert len(loop.handles) == 1 and loop.handles[0].cancelled
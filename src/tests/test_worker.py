@@ -0,0 +1,48 @@
+import pytest
+import threading
+import time
+from reminder import ReminderManager
+from worker import ReminderWorker
+from db import DB
+from tests.test_reminder import minutes_from_now
+
+
+def wait_for(worker, condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        worker.poll_results()
+        time.sleep(0.005)
+
+@pytest.fixture
+def worker(tmp_path):
+    worker = ReminderWorker(lambda: ReminderManager(DB(str(tmp_path / "reminder_db"))))
+    worker.start()
+    yield worker
+    worker.stop(timeout=5)
+    assert not worker.thread.is_alive()
+
+def test_commands_run_on_the_worker_thread(worker):
+    results = []
+    worker.submit(lambda reminder_manager: reminder_manager.add_reminder("later", "message", "Day", minutes_from_now(60)), results.append)
+    worker.submit(lambda reminder_manager: (threading.get_ident(), reminder_manager.get_all_reminders()), results.append)
+    wait_for(worker, lambda: len(results) == 2)
+
+    reminder_id, (thread_id, reminders) = results
+    assert thread_id == worker.thread.ident != threading.get_ident()
+    assert [reminder[0] for reminder in reminders] == [reminder_id]
+
+def test_errors_go_to_errback(worker):
+    errors = []
+    worker.submit(lambda reminder_manager: reminder_manager.remove_reminder("missing"), errback=errors.append)
+    wait_for(worker, lambda: errors)
+    assert isinstance(errors[0], KeyError)
+
+def test_ticks_off_the_calling_thread(worker, capsys):
+    fired = []
+    worker.add_fire_listener(fired.append)
+    worker.submit(lambda reminder_manager: reminder_manager.add_reminder("due", "message", "Once", minutes_from_now(-1)))
+    wait_for(worker, lambda: fired)
+    assert [reminder.title for reminder in fired[0]] == ["due"]
+    worker.stop(timeout=5)  # delivers what the dispatch pipeline still holds
+    assert "due" in capsys.readouterr().out
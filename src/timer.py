@@ -0,0 +1,119 @@
+from datetime_wrapper import DateTimeWrapper
+from reminder import Reminder, ReminderManager
+from abc import ABC, abstractmethod
+from typing import Callable, List, Tuple
+import asyncio
+import time
+
+
+MAX_SLEEP_SECONDS: float = 3600    # re-check at least this often in case the wall clock jumps
+
+class ReminderTimer(ABC):
+    """
+    Sleeps until the earliest next recurrence instead of polling, and re-arms early whenever reminders are added, updated or removed.
+    """
+    def __init__(self, reminder_manager: ReminderManager, max_sleep_seconds: float = MAX_SLEEP_SECONDS) -> None:
+        self.reminder_manager: ReminderManager = reminder_manager
+        self.max_sleep_seconds: float = max_sleep_seconds
+        self.running: bool = False
+        self.ticking: bool = False
+        self.wakeups: int = 0
+        self.reminder_manager.add_schedule_listener(self.wake)
+
+    @abstractmethod
+    def _call_later(self, delay_seconds: float) -> None:
+        pass
+
+    @abstractmethod
+    def _cancel(self) -> None:
+        pass
+
+    def start(self) -> None:
+        self.running = True
+        self.tick()
+
+    def stop(self) -> None:
+        self.running = False
+        self._cancel()
+
+    def wake(self) -> None:
+        if self.running and not self.ticking:   # a tick re-arms by itself when it is done
+            self._cancel()
+            self.__arm()
+
+    def tick(self) -> None:
+        # fires what is due and re-arms, called when the armed delay ran out or by loops that track the deadline themselves
+        self.wakeups += 1
+        self.ticking = True
+        try:
+            self._fire_due()
+        finally:
+            self.ticking = False
+        if self.running:
+            self.__arm()
+
+    def _fire_due(self) -> None:
+        self.reminder_manager.notify_due_reminders()
+
+    def __arm(self) -> None:
+        delay_seconds = self.reminder_manager.seconds_until_next_due()
+        if delay_seconds is None or delay_seconds > self.max_sleep_seconds:
+            delay_seconds = self.max_sleep_seconds
+        self._call_later(delay_seconds)
+
+
+class TkReminderTimer(ReminderTimer):
+    def __init__(self, root, reminder_manager: ReminderManager, max_sleep_seconds: float = MAX_SLEEP_SECONDS) -> None:
+        super().__init__(reminder_manager, max_sleep_seconds)
+        self.root = root
+        self.after_id: str = None
+
+    def _call_later(self, delay_seconds: float) -> None:
+        self.after_id = self.root.after(int(delay_seconds * 1000), self.tick)
+
+    def _cancel(self) -> None:
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+
+
+class AsyncioReminderTimer(ReminderTimer):
+    def __init__(self, reminder_manager: ReminderManager, loop: asyncio.AbstractEventLoop = None, max_sleep_seconds: float = MAX_SLEEP_SECONDS) -> None:
+        super().__init__(reminder_manager, max_sleep_seconds)
+        self.loop: asyncio.AbstractEventLoop = loop or asyncio.get_event_loop()
+        self.handle: asyncio.TimerHandle = None
+
+    def _call_later(self, delay_seconds: float) -> None:
+        self.handle = self.loop.call_later(delay_seconds, self.tick)
+
+    def _cancel(self) -> None:
+        if self.handle is not None:
+            self.handle.cancel()
+            self.handle = None
+
+
+class DeadlineReminderTimer(ReminderTimer):
+    """
+    Armed by recording a deadline, for loops that wait on a command queue until then, see worker.ReminderWorker.
+    The fired (reminder, recurrence time) occurrences are handed to on_fired instead of printed.
+    """
+    def __init__(self, reminder_manager: ReminderManager, on_fired: Callable[[List[Tuple[Reminder, DateTimeWrapper]]], None],
+                 max_sleep_seconds: float = MAX_SLEEP_SECONDS) -> None:
+        super().__init__(reminder_manager, max_sleep_seconds)
+        self.on_fired: Callable[[List[Tuple[Reminder, DateTimeWrapper]]], None] = on_fired
+        self.deadline: float = None
+
+    def _call_later(self, delay_seconds: float) -> None:
+        self.deadline = time.monotonic() + delay_seconds
+
+    def _cancel(self) -> None:
+        self.deadline = None
+
+    def _fire_due(self) -> None:
+        occurrences = self.reminder_manager.fire_due_occurrences()
+        if occurrences:
+            self.on_fired(occurrences)
+
+    def seconds_left(self) -> float:
+        # None when not armed
+        return None if self.deadline is None else max(0.0, self.deadline - time.monotonic())
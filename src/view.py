@@ -1,15 +1,21 @@
 import tkinter as tk
 from tkinter import messagebox, simpledialog, ttk
 from datetime_wrapper import DateTimeWrapper
+from typing import Dict, Tuple
 
 
 TEXT_ENTRY_WIDTH = 50
 TIME_ENTRY_WIDTH = 20
+PAGE_SIZE = 15
+COLUMNS = ("title", "next", "message")
+COLUMN_WIDTHS = (150, 120, 230)
+RECURRENCE_TYPES = ["Once", "Hour", "Day", "Week", "Month"]
+ALL_TYPES = "All"
 
 class AddReminderWindow(tk.Toplevel):
-    def __init__(self, parent, app_instance, reminder_manager):
+    def __init__(self, parent, app_instance, worker):
         super().__init__(parent)
-        self.reminder_manager = reminder_manager
+        self.worker = worker
         self.title("Add Reminder")
 
         self.title_entry = tk.Entry(self, width=TEXT_ENTRY_WIDTH)
@@ -38,7 +44,7 @@ class AddReminderWindow(tk.Toplevel):
         self.recurrence_label.grid(row=7, column=0, padx=5, pady=5)
         self.recurrence_type = tk.StringVar()
         self.recurrence_type_picker = ttk.Combobox(self, textvariable=self.recurrence_type)
-        self.recurrence_type_picker["values"] = ["Once", "Hour", "Day", "Week", "Month"]
+        self.recurrence_type_picker["values"] = RECURRENCE_TYPES
         self.recurrence_type_picker.current(0)
         self.recurrence_type_picker.grid(row=7, column=1, padx=5, pady=5)
 
@@ -63,20 +69,54 @@ class AddReminderWindow(tk.Toplevel):
             messagebox.showwarning("Invalid Time", "Please enter time in the correct format")
             return
 
-        reminder_id = self.reminder_manager.add_reminder(title, message, recurrence_type, start_dt_wrapper, None, None, 1, None)
-        self.app_instance.add_reminder((reminder_id, title, message, start_dt_wrapper))
+        self.worker.submit(lambda reminder_manager: reminder_manager.add_reminder(title, message, recurrence_type, start_dt_wrapper, None, None, 1, None),
+                           self.app_instance.add_reminder, self.app_instance.show_error)
         self.destroy()
 
 class ReminderAppView:
-    def __init__(self, master, reminder_manager):
+    """
+    Virtual list of the reminders. The tree only holds the rows of the visible page, which are queried from the manager
+    on every scroll or edit and patched in place, so the cost of a redraw does not grow with the number of reminders.
+    Every manager call goes through the worker thread, the view only handles the results.
+    """
+    def __init__(self, master, worker, page_size: int = PAGE_SIZE):
         self.master = master
         self.master.title("Reminder App")
         
-        self.reminder_manager = reminder_manager
-        self.reminders = self.reminder_manager.get_all_reminders()
-
-        self.reminder_listbox = tk.Listbox(master, width=50, height=15)
-        self.reminder_listbox.pack(pady=10)
+        self.worker = worker
+        self.worker.add_fire_listener(lambda reminders: self.update_reminder_list())
+        self.page_size: int = page_size
+        self.refreshing: bool = False
+        self.refresh_again: bool = False    # the list changed while a page query was in flight
+        self.offset: int = 0    # index of the first visible reminder
+        self.total: int = 0
+        self.shown: Dict[str, Tuple] = {}   # row values by reminder id, in display order
+
+        # typing or picking a type filters the list through ReminderManager.search
+        search_frame = tk.Frame(master)
+        search_frame.pack(pady=(10, 0))
+        tk.Label(search_frame, text="Search:").pack(side=tk.LEFT)
+        self.search_text = tk.StringVar()
+        self.search_entry = tk.Entry(search_frame, textvariable=self.search_text, width=TEXT_ENTRY_WIDTH)
+        self.search_entry.pack(side=tk.LEFT, padx=5)
+        self.search_type = tk.StringVar(value=ALL_TYPES)
+        self.search_type_picker = ttk.Combobox(search_frame, textvariable=self.search_type, values=[ALL_TYPES, *RECURRENCE_TYPES], state="readonly", width=8)
+        self.search_type_picker.pack(side=tk.LEFT)
+        self.search_text.trace_add("write", lambda *args: self.search())
+        self.search_type_picker.bind("<<ComboboxSelected>>", lambda event: self.search())
+
+        list_frame = tk.Frame(master)
+        list_frame.pack(pady=10)
+        self.reminder_tree = ttk.Treeview(list_frame, columns=COLUMNS, show="headings", height=page_size, selectmode="browse")
+        for column, width in zip(COLUMNS, COLUMN_WIDTHS):
+            self.reminder_tree.heading(column, text=column.capitalize())
+            self.reminder_tree.column(column, width=width)
+        self.reminder_tree.pack(side=tk.LEFT)
+        self.scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.reminder_tree.bind("<MouseWheel>", lambda event: self.yview("scroll", -1 if event.delta > 0 else 1, "units"))
+        self.reminder_tree.bind("<Button-4>", lambda event: self.yview("scroll", -1, "units"))
+        self.reminder_tree.bind("<Button-5>", lambda event: self.yview("scroll", 1, "units"))
 
         self.add_button = tk.Button(master, text="Add Reminder", command=self.open_add_window)
         self.add_button.pack(pady=5)
@@ -87,24 +127,86 @@ class ReminderAppView:
         self.update_reminder_list()
 
     def open_add_window(self):
-        add_window = AddReminderWindow(self.master, self, self.reminder_manager)
+        add_window = AddReminderWindow(self.master, self, self.worker)
 
-    def add_reminder(self, reminder):
-        self.reminders.append(reminder)
+    def add_reminder(self, reminder_id):
         self.update_reminder_list()
 
     def remove_reminder(self):
         try:
-            selected_index = self.reminder_listbox.curselection()[0]
-            reminder_id, _, _, _ = self.reminders[selected_index]
-            self.reminder_manager.remove_reminder(reminder_id)
-            del self.reminders[selected_index]
-            self.update_reminder_list()
+            reminder_id = self.reminder_tree.selection()[0]
         except IndexError:
             messagebox.showwarning("Warning", "No reminder selected.")
+            return
+        self.worker.submit(lambda reminder_manager: reminder_manager.remove_reminder(reminder_id),
+                           lambda result: self.on_removed(reminder_id), self.show_error)
+
+    def on_removed(self, reminder_id):
+        # only once the worker removed it, a failed removal leaves the row where it was
+        if self.shown.pop(reminder_id, None) is not None:
+            self.reminder_tree.delete(reminder_id)
+        self.update_reminder_list()     # the page query fills the gap
+
+    def show_error(self, error):
+        self.refreshing = False
+        messagebox.showerror("Error", str(error))
+
+    def search(self):
+        self.offset = 0
+        self.update_reminder_list()
+
+    def yview(self, *args):
+        # scrollbar and mouse wheel commands, in rows of the whole list
+        if args[0] == "moveto":
+            self.offset = int(float(args[1]) * self.total)
+        elif args[0] == "scroll":
+            self.offset += int(args[1]) * (self.page_size if args[2] == "pages" else 1)
+        self.update_reminder_list()
 
     def update_reminder_list(self):
-        self.reminder_listbox.delete(0, tk.END)
-        for reminder in self.reminders:
-            reminder_id, title, message, next_recur_dtwrapper = reminder
-            self.reminder_listbox.insert(tk.END, f"{title} ({next_recur_dtwrapper}): {message}")
+        if self.refreshing:     # one page query at a time, scrolling fast would queue up stale ones
+            self.refresh_again = True
+            return
+        self.refreshing = True
+        offset, page_size = self.offset, self.page_size
+        text = self.search_text.get().strip()
+        recurrence_type = None if self.search_type.get() == ALL_TYPES else self.search_type.get()
+        def query_page(reminder_manager):
+            if text or recurrence_type:
+                total = reminder_manager.count_search_results(text, recurrence_type)
+                offset_in_range = max(0, min(offset, total - page_size))
+                return offset_in_range, total, reminder_manager.search(text, recurrence_type, offset=offset_in_range, limit=page_size)
+            total = reminder_manager.count_reminders()
+            offset_in_range = max(0, min(offset, total - page_size))
+            return offset_in_range, total, reminder_manager.get_reminders_page(offset_in_range, page_size)
+        self.worker.submit(query_page, self.show_page, self.show_error)
+
+    def show_page(self, result):
+        self.refreshing = False
+        if self.refresh_again:
+            self.refresh_again = False
+            self.update_reminder_list()
+            return
+        self.offset, self.total, page = result
+        rows = []
+        for reminder_id, title, message, next_recur_dtwrapper in page:
+            rows.append((reminder_id, (title, str(next_recur_dtwrapper), message)))
+
+        # touch only the rows that left, moved, changed or appeared
+        wanted = dict(rows)
+        for reminder_id in self.shown.keys() - wanted.keys():
+            self.reminder_tree.delete(reminder_id)
+        for index, (reminder_id, values) in enumerate(rows):
+            if reminder_id not in self.shown:
+                self.reminder_tree.insert("", index, iid=reminder_id, values=values)
+                continue
+            if self.shown[reminder_id] != values:
+                self.reminder_tree.item(reminder_id, values=values)
+            if self.reminder_tree.index(reminder_id) != index:
+                self.reminder_tree.move(reminder_id, "", index)
+        self.shown = wanted
+
+        if self.total:
+            self.scrollbar.set(self.offset / self.total, min(1.0, (self.offset + self.page_size) / self.total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
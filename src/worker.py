@@ -0,0 +1,106 @@
+from datetime_wrapper import DateTimeWrapper
+from reminder import Reminder, ReminderManager
+from dispatch import DispatchPipeline, DispatchSink, PrintSink
+from timer import DeadlineReminderTimer, MAX_SLEEP_SECONDS
+from typing import Any, Callable, Dict, List, Tuple
+import traceback
+import threading
+import atexit
+import queue
+import sys
+
+
+RESULT_POLL_MS: int = 50
+STOP = "<stop>"
+
+class ReminderWorker:
+    """
+    Single thread that owns the ReminderManager, its DB connection and its timer.
+    Other threads post commands, functions of the manager, and receive their results through poll_results,
+    so a UI thread never waits on a commit. Fired reminders are delivered to sinks, printed when none are given,
+    by a DispatchPipeline unless the manager comes with a dispatcher of its own.
+    """
+    def __init__(self, make_reminder_manager: Callable[[], ReminderManager], max_sleep_seconds: float = MAX_SLEEP_SECONDS,
+                 sinks: Dict[str, DispatchSink] = None) -> None:
+        # the manager is made on the worker thread since sqlite connections stay on the thread that opened them
+        self.make_reminder_manager: Callable[[], ReminderManager] = make_reminder_manager
+        self.max_sleep_seconds: float = max_sleep_seconds
+        self.sinks: Dict[str, DispatchSink] = sinks if sinks is not None else {"print": PrintSink()}
+        self.commands: queue.Queue = queue.Queue()
+        self.results: queue.Queue = queue.Queue()
+        self.fire_listeners: List[Callable[[List[Reminder]], None]] = []
+        self.reminder_manager: ReminderManager = None
+        self.timer: DeadlineReminderTimer = None
+        self.thread = threading.Thread(target=self.__run, name="reminder-worker", daemon=True)
+
+    def start(self) -> None:
+        self.thread.start()
+
+    def stop(self, timeout: float = None) -> None:
+        self.commands.put(STOP)
+        self.thread.join(timeout)
+
+    def submit(self, command: Callable[[ReminderManager], Any], callback: Callable[[Any], None] = None, errback: Callable[[Exception], None] = None) -> None:
+        self.commands.put((command, callback, errback))
+
+    def add_fire_listener(self, listener: Callable[[List[Reminder]], None]) -> None:
+        # called through poll_results with the reminders of every tick that fired some
+        self.fire_listeners.append(listener)
+
+    def poll_results(self) -> int:
+        # runs the callbacks of the finished commands on the calling thread
+        count = 0
+        while True:
+            try:
+                callback, result = self.results.get_nowait()
+            except queue.Empty:
+                return count
+            callback(result)
+            count += 1
+
+    def attach(self, root, interval_ms: int = RESULT_POLL_MS) -> None:
+        # poll from the tk main loop, tk widgets may only be touched from its thread
+        def poll():
+            self.poll_results()
+            root.after(interval_ms, poll)
+        poll()
+
+    def __on_fired(self, occurrences: List[Tuple[Reminder, DateTimeWrapper]]) -> None:
+        self.reminder_manager.notify(occurrences)
+        reminders = list({reminder.reminder_id: reminder for reminder, _ in occurrences}.values())
+        for listener in self.fire_listeners:
+            self.results.put((listener, reminders))
+
+    def __run(self) -> None:
+        self.reminder_manager = self.make_reminder_manager()
+        atexit.unregister(self.reminder_manager.on_exit)    # closed on this thread below
+        if self.reminder_manager.dispatcher is None:    # closed with the manager
+            self.reminder_manager.dispatcher = DispatchPipeline(self.sinks, metrics=self.reminder_manager.metrics)
+        self.timer = DeadlineReminderTimer(self.reminder_manager, self.__on_fired, self.max_sleep_seconds)
+        self.timer.start()
+        try:
+            while True:
+                if self.timer.seconds_left() == 0:  # due even if commands keep coming
+                    self.timer.tick()
+                try:
+                    item = self.commands.get(timeout=self.timer.seconds_left())
+                except queue.Empty:
+                    continue
+                if item is STOP:
+                    return
+                self.__execute(*item)
+        finally:
+            self.timer.stop()
+            self.reminder_manager.on_exit()
+
+    def __execute(self, command: Callable[[ReminderManager], Any], callback: Callable[[Any], None], errback: Callable[[Exception], None]) -> None:
+        try:
+            result = command(self.reminder_manager)
+        except Exception as e:
+            if errback is not None:
+                self.results.put((errback, e))
+            else:
+                traceback.print_exc(file=sys.stderr)
+            return
+        if callback is not None:
+            self.results.put((callback, result))